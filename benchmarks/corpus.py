@@ -0,0 +1,101 @@
+"""
+Synthetic vendor-site corpus for the pipeline benchmarks.
+
+Every site has a home page linking to all of its pages, plus product, service
+and solution pages that link to `fan_out` other pages. Each page mixes unique
+body text (with the keywords, bullets and "Features:" lines the extractors look
+for) with a shared header/footer sized to `boilerplate_ratio`.
+"""
+
+import random
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+SECTIONS = ['products', 'services', 'solutions']
+
+KEYWORDS = [
+    'consulting', 'cloud', 'python', 'kubernetes', 'aws', 'docker', 'analytics',
+    'cybersecurity', 'healthcare', 'banking', 'integration', 'automation',
+    'ISO 27001', 'SOC 2', 'Salesforce', 'postgresql', 'support', 'training',
+]
+
+
+@dataclass
+class CorpusConfig:
+    """Shape of the generated corpus."""
+    sites: int = 2
+    pages: int = 50
+    fan_out: int = 10
+    page_words: int = 400
+    boilerplate_ratio: float = 0.3
+    seed: int = 1
+
+
+def _sentence(rng: random.Random, vocabulary: List[str], words: int) -> str:
+    text = ' '.join(rng.choice(vocabulary) for _ in range(words))
+    return text[0].upper() + text[1:] + '.'
+
+
+def _boilerplate(rng: random.Random, vocabulary: List[str], words: int, links: List[str]) -> Tuple[str, str]:
+    """Build a shared header and footer totalling roughly `words` words."""
+    nav = ''.join(f'<li><a href="{link}">{link.strip("/").split("/")[-1] or "home"}</a></li>' for link in links)
+    header_words = words // 2
+    header = f'<header><nav><ul>{nav}</ul></nav><p>{_sentence(rng, vocabulary, max(header_words, 1))}</p></header>'
+    footer = (
+        f'<footer><p>{_sentence(rng, vocabulary, max(words - header_words, 1))}</p>'
+        f'<p>We use cookies to improve your experience.</p><p>© 2024 Example Vendor</p></footer>'
+    )
+    return header, footer
+
+
+def _body(rng: random.Random, vocabulary: List[str], words: int, title: str) -> str:
+    parts = [f'<h1>{title}</h1>']
+    written = 0
+    while written < words:
+        length = rng.randint(12, 30)
+        parts.append(f'<p>{_sentence(rng, vocabulary, length)}</p>')
+        written += length
+        if rng.random() < 0.3:
+            parts.append(f'<ul><li>• {_sentence(rng, vocabulary, 8)}</li><li>• {_sentence(rng, vocabulary, 8)}</li></ul>')
+            written += 16
+        if rng.random() < 0.2:
+            parts.append(f'<p>Features: {_sentence(rng, vocabulary, 10)}</p>')
+            written += 10
+    parts.append(f'<p>Pricing from ${rng.randint(10, 900)} per month.</p>')
+    return '\n'.join(parts)
+
+
+def generate_site(config: CorpusConfig, site_index: int) -> Dict[str, str]:
+    """
+    Generate one vendor site.
+
+    Returns:
+        Mapping of URL path to HTML document
+    """
+    rng = random.Random(config.seed * 1000 + site_index)
+    vocabulary = [f'term{i}' for i in range(1500)] + [keyword.lower() for keyword in KEYWORDS] * 5
+    paths = [f'/{SECTIONS[i % len(SECTIONS)]}/item-{i}/' for i in range(config.pages)]
+
+    boilerplate_words = int(config.page_words * config.boilerplate_ratio)
+    body_words = config.page_words - boilerplate_words
+    header, footer = _boilerplate(rng, vocabulary, boilerplate_words, ['/'] + paths[:5])
+
+    def document(title: str, body: str, links: List[str]) -> str:
+        anchors = ''.join(f'<li><a href="{link}">Read about {link.strip("/").replace("/", " ")}</a></li>' for link in links)
+        return (
+            f'<!DOCTYPE html><html lang="en"><head><title>{title} - Example Vendor {site_index}</title>'
+            f'<meta name="description" content="Example Vendor {site_index} {title}"></head>'
+            f'<body>{header}<main>{body}<ul class="related">{anchors}</ul></main>{footer}</body></html>'
+        )
+
+    site = {'/': document('Home', _body(rng, vocabulary, body_words, 'Home'), paths)}
+    for index, path in enumerate(paths):
+        title = f'{path.split("/")[1].title()} {index}'
+        links = rng.sample(paths, min(config.fan_out, len(paths)))
+        site[path] = document(title, _body(rng, vocabulary, body_words, title), links)
+    return site
+
+
+def generate_corpus(config: CorpusConfig) -> List[Dict[str, str]]:
+    """Generate all sites of the corpus."""
+    return [generate_site(config, index) for index in range(config.sites)]
@@ -0,0 +1,86 @@
+"""
+Local HTTP server for the benchmark corpus.
+
+Each synthetic site is served on its own port (so crawlers see distinct hosts)
+from a child process, keeping server CPU out of the benchmarked process.
+"""
+
+import http.server
+import multiprocessing
+import socketserver
+import threading
+
+from corpus import CorpusConfig, generate_corpus
+
+
+class _ThreadingServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def _make_handler(site):
+    encoded = {path: html.encode('utf-8') for path, html in site.items()}
+
+    class FixtureHandler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            path = self.path.split('?', 1)[0].split('#', 1)[0]
+            body = encoded.get(path) or encoded.get(path.rstrip('/') + '/')
+            if body is None:
+                body = b'Not found'
+                self.send_response(404)
+                self.send_header('Content-Type', 'text/plain')
+            else:
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FixtureHandler
+
+
+def _serve(config, ports, stop):
+    servers = []
+    for site in generate_corpus(config):
+        server = _ThreadingServer(('127.0.0.1', 0), _make_handler(site))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    ports.put([server.server_address[1] for server in servers])
+    stop.wait()
+    for server in servers:
+        server.shutdown()
+
+
+class FixtureServer:
+    """Serve a corpus in a child process; use as a context manager."""
+
+    def __init__(self, config: CorpusConfig):
+        self.config = config
+        self.base_urls = []
+        self._process = None
+        self._stop = None
+
+    def start(self):
+        ports = multiprocessing.Queue()
+        self._stop = multiprocessing.Event()
+        self._process = multiprocessing.Process(target=_serve, args=(self.config, ports, self._stop), daemon=True)
+        self._process.start()
+        self.base_urls = [f'http://127.0.0.1:{port}/' for port in ports.get(timeout=60)]
+        return self
+
+    def stop(self):
+        if self._process is not None:
+            self._stop.set()
+            self._process.join(timeout=10)
+            self._process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+End-to-end pipeline benchmarks.
+
+Serves a synthetic corpus of vendor sites from a local HTTP server and drives
+the scrapers, extractors, converters and the SQLite store over it, then prints
+one JSON report with wall time, CPU time and pages/sec per stage, and the
+process's peak RSS after each stage. Stages run in one process, so a stage's
+own memory shows only as growth of that peak (peak_rss_growth_kb).
+
+Usage:
+    python benchmarks/run_benchmarks.py --pages 100 --sites 3 --output bench.json
+    python benchmarks/run_benchmarks.py --stages web_scraper,db_writes
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import traceback
+from contextlib import contextmanager, redirect_stdout
+from dataclasses import asdict
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCHMARK_DIR.parent
+
+# The web_app modules import each other as top-level packages (models, services)
+sys.path.insert(0, str(REPO_ROOT / 'web_app'))
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(BENCHMARK_DIR))
+
+from corpus import CorpusConfig
+from fixture_server import FixtureServer
+
+
+class StageSkipped(Exception):
+    """Raised by a stage whose dependencies or inputs are unavailable."""
+
+
+@contextmanager
+def no_politeness_delay():
+    """Disable the fixed per-request sleeps of the crawlers while benchmarking."""
+    original = time.sleep
+    time.sleep = lambda seconds: None
+    try:
+        yield
+    finally:
+        time.sleep = original
+
+
+def _import(module_name):
+    try:
+        return __import__(module_name, fromlist=['*'])
+    except (ImportError, SyntaxError) as e:
+        raise StageSkipped(f'cannot import {module_name}: {e}')
+
+
+def _write_research_output(vendors, research_dir):
+    """Write scraped vendors in the research_output layout the extractors read."""
+    research_dir.mkdir(exist_ok=True)
+    for index, vendor in enumerate(vendors):
+        vendor_dir = research_dir / f'vendor_{index}'
+        vendor_dir.mkdir(exist_ok=True)
+        with open(vendor_dir / 'vendor_info.json', 'w', encoding='utf-8') as f:
+            json.dump(vendor, f, indent=2, ensure_ascii=False)
+
+
+# Stages -----------------------------------------------------------------------
+#
+# Each stage takes the shared benchmark context and returns a dict of counters;
+# "pages" (or "rows") is used to derive a throughput figure.
+
+def stage_web_scraper(ctx):
+    web_scraper = _import('src.scrapers.web_scraper')
+    scraper = web_scraper.WebScraper(delay=0)
+    urls = [base + path.lstrip('/') for base, site in zip(ctx['base_urls'], ctx['sites']) for path in site]
+    results = scraper.scrape_multiple_urls(urls)
+    return {'pages': len(results), 'requested': len(urls)}
+
+
+def stage_markdown_render(ctx):
+    """Markdown throughput: markdownify over the extracted text vs rendering the extraction tree."""
+    trafilatura = _import('trafilatura')
+    trafilatura_xml = _import('trafilatura.xml')
+    markdownify = _import('markdownify')
+    renderer = _import('src.processors.markdown_renderer')
+    # Extraction is shared by both paths and not timed; the old path converted the plain text
+    documents, texts = [], []
+    for site in ctx['sites']:
+        for html in site.values():
+            document = trafilatura.bare_extraction(
+                html, include_comments=False, include_tables=True, include_images=False,
+                include_links=True, include_formatting=True, as_dict=False)
+            if document is not None and document.body is not None:
+                documents.append(document)
+                texts.append(trafilatura_xml.xmltotxt(document.body, False))
+    if not documents:
+        raise StageSkipped('trafilatura extracted no pages')
+
+    start = time.perf_counter()
+    for text in texts:
+        markdownify.markdownify(text, heading_style='ATX')
+    markdownify_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for document in documents:
+        renderer.render_markdown(document.body)
+    renderer_seconds = time.perf_counter() - start
+
+    return {
+        'pages': len(documents),
+        'markdownify_seconds': round(markdownify_seconds, 4),
+        'renderer_seconds': round(renderer_seconds, 4),
+        'markdownify_pages_per_sec': round(len(documents) / markdownify_seconds, 2) if markdownify_seconds else None,
+        'renderer_pages_per_sec': round(len(documents) / renderer_seconds, 2) if renderer_seconds else None,
+        'speedup': round(markdownify_seconds / renderer_seconds, 2) if renderer_seconds else None,
+    }
+
+
+def stage_scraper_service(ctx):
+    scraper_service = _import('services.scraper_service')
+    service = scraper_service.ScraperService()
+    vendors = []
+    with no_politeness_delay():
+        for base_url in ctx['base_urls']:
+            vendor = service.scrape_vendor(base_url)
+            if vendor:
+                vendors.append(vendor)
+    ctx['vendors'] = vendors
+    _write_research_output(vendors, ctx['workdir'] / 'research_output')
+    return {
+        'pages': sum(vendor['total_pages_scraped'] for vendor in vendors),
+        'duplicates_skipped': sum(vendor.get('duplicate_pages_skipped', 0) for vendor in vendors),
+    }
+
+
+def stage_playwright_scraper(ctx):
+    server = _import('complete_server_playwright')
+    if not shutil.which('curl'):
+        raise StageSkipped('curl is not installed')
+    scraper = server.PlaywrightScraper()
+    scraper.render_js = False  # Measure the static path; browser startup would dominate
+    saved = []
+    with no_politeness_delay():
+        for base_url in ctx['base_urls']:
+            scraper.scrape_entire_site(base_url, save_callback=saved.append)
+    return {'pages': len(saved), 'bytes': sum(len(page['content']) for page in saved)}
+
+
+def stage_extractor_service(ctx):
+    if not ctx.get('vendors'):
+        raise StageSkipped('needs scraper_service output')
+    extractor_service = _import('services.extractor_service')
+    extractor = extractor_service.ExtractorService()
+    services = products = 0
+    for vendor in ctx['vendors']:
+        result = extractor.extract_from_raw_data(vendor)
+        services += len(result['services'])
+        products += len(result['products'])
+    return {'pages': sum(len(vendor['pages']) for vendor in ctx['vendors']), 'services': services, 'products': products}
+
+
+def _run_research_extractor(ctx, module_name, class_name):
+    if not (ctx['workdir'] / 'research_output').exists():
+        raise StageSkipped('needs scraper_service output')
+    module = _import(module_name)
+    extractor = getattr(module, class_name)('research_output')
+    vendors = extractor.extract_all_vendors()
+    return {'pages': sum(len(vendor.get('pages', [])) for vendor in ctx.get('vendors', [])), 'vendors': len(vendors)}
+
+
+def stage_enhanced_extractor(ctx):
+    return _run_research_extractor(ctx, 'enhanced_product_service_extractor', 'EnhancedProductServiceExtractor')
+
+
+def stage_database_extractor(ctx):
+    return _run_research_extractor(ctx, 'vendor_database_extractor', 'VendorDatabaseExtractor')
+
+
+def _run_converter(ctx, module_name, class_name):
+    vendor_files = list((ctx['workdir'] / 'vendor_database').glob('*.md'))
+    if not vendor_files:
+        raise StageSkipped('needs extractor output')
+    module = _import(module_name)
+    getattr(module, class_name)('vendor_database').convert_all_formats()
+    return {'vendors': len(vendor_files)}
+
+
+def stage_enhanced_converter(ctx):
+    return _run_converter(ctx, 'enhanced_database_converter', 'EnhancedDatabaseConverter')
+
+
+def stage_markdown_converter(ctx):
+    return _run_converter(ctx, 'markdown_to_database', 'MarkdownToDatabaseConverter')
+
+
+def stage_db_writes(ctx):
+    if not ctx.get('vendors'):
+        raise StageSkipped('needs scraper_service output')
+    simple_web_server = _import('simple_web_server')
+    db = simple_web_server.SimpleVendorDB(str(ctx['workdir'] / 'bench_vendors.db'))
+    rows = 0
+    for vendor in ctx['vendors']:
+        vendor_id = db.add_vendor(vendor['name'], vendor['url'], vendor.get('description', ''))
+        db.save_scrape_result(vendor_id, vendor)
+        rows += 1 + len(vendor['pages'])
+        for page in vendor['pages']:
+            db.add_service(vendor_id, page.get('title', ''), 'benchmark', page.get('content', '')[:500], page.get('url', ''), '')
+            rows += 1
+    return {'rows': rows}
+
+
+STAGES = [
+    ('web_scraper', stage_web_scraper),
+    ('markdown_render', stage_markdown_render),
+    ('scraper_service', stage_scraper_service),
+    ('playwright_scraper', stage_playwright_scraper),
+    ('extractor_service', stage_extractor_service),
+    ('enhanced_extractor', stage_enhanced_extractor),
+    ('database_extractor', stage_database_extractor),
+    ('enhanced_converter', stage_enhanced_converter),
+    ('markdown_converter', stage_markdown_converter),
+    ('db_writes', stage_db_writes),
+]
+
+
+def _peak_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes elsewhere
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def run_stage(name, func, ctx, verbose=False):
+    """Run one stage and measure wall time, CPU time (own and subprocesses) and the process's peak RSS."""
+    peak_before = _peak_rss_kb()
+    children_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu_before = time.process_time()
+    start = time.perf_counter()
+    report = {'stage': name}
+    try:
+        if verbose:
+            counters = func(ctx)
+        else:
+            with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+                counters = func(ctx)
+        report['status'] = 'ok'
+        report.update(counters)
+    except StageSkipped as e:
+        report['status'] = 'skipped'
+        report['reason'] = str(e)
+    except Exception as e:
+        report['status'] = 'error'
+        report['reason'] = f'{type(e).__name__}: {e}'
+        if verbose:
+            traceback.print_exc()
+
+    wall = time.perf_counter() - start
+    children_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    report['wall_seconds'] = round(wall, 4)
+    report['cpu_seconds'] = round(time.process_time() - cpu_before, 4)
+    report['child_cpu_seconds'] = round(
+        (children_after.ru_utime + children_after.ru_stime) - (children_before.ru_utime + children_before.ru_stime), 4
+    )
+    # ru_maxrss is a high-water mark of the whole process, so it includes every earlier stage
+    report['process_peak_rss_kb'] = _peak_rss_kb()
+    report['peak_rss_growth_kb'] = report['process_peak_rss_kb'] - peak_before
+    for unit in ('pages', 'rows'):
+        if report['status'] == 'ok' and wall > 0 and unit in report:
+            report[f'{unit}_per_sec'] = round(report[unit] / wall, 2)
+    return report
+
+
+def run_benchmarks(config, stage_names=None, verbose=False):
+    """Run the selected stages against a freshly served corpus and return the report."""
+    from corpus import generate_corpus
+
+    selected = [(name, func) for name, func in STAGES if not stage_names or name in stage_names]
+    workdir = Path(tempfile.mkdtemp(prefix='vendor_bench_'))
+    previous_cwd = os.getcwd()
+
+    with FixtureServer(config) as server:
+        ctx = {'base_urls': server.base_urls, 'sites': generate_corpus(config), 'workdir': workdir}
+        # Extractors and converters write to fixed relative directories
+        os.chdir(workdir)
+        try:
+            stages = [run_stage(name, func, ctx, verbose) for name, func in selected]
+        finally:
+            os.chdir(previous_cwd)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'corpus': asdict(config),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'stages': stages,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the vendor research pipeline against a local corpus')
+    parser.add_argument('--sites', type=int, default=2, help='Number of vendor sites')
+    parser.add_argument('--pages', type=int, default=50, help='Pages per site (excluding the home page)')
+    parser.add_argument('--fan-out', type=int, default=10, help='Links from each page to other pages')
+    parser.add_argument('--page-words', type=int, default=400, help='Approximate words per page')
+    parser.add_argument('--boilerplate-ratio', type=float, default=0.3, help='Fraction of each page that is shared boilerplate')
+    parser.add_argument('--seed', type=int, default=1, help='Corpus random seed')
+    parser.add_argument('--stages', help=f'Comma-separated subset of: {", ".join(name for name, _ in STAGES)}')
+    parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+    parser.add_argument('--verbose', action='store_true', help='Show output from the benchmarked code')
+    args = parser.parse_args()
+
+    config = CorpusConfig(
+        sites=args.sites,
+        pages=args.pages,
+        fan_out=args.fan_out,
+        page_words=args.page_words,
+        boilerplate_ratio=args.boilerplate_ratio,
+        seed=args.seed,
+    )
+    stage_names = set(args.stages.split(',')) if args.stages else None
+    if stage_names:
+        unknown = stage_names - {name for name, _ in STAGES}
+        if unknown:
+            parser.error(f'unknown stages: {", ".join(sorted(unknown))}')
+
+    report = run_benchmarks(config, stage_names, args.verbose)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
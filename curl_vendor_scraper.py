@@ -4,13 +4,21 @@ Curl-based Vendor Scraper - Uses curl to bypass Python SSL issues
 
 import json
 import re
-import time
-import subprocess
 import os
 from urllib.parse import urljoin, urlparse
 from datetime import datetime
+from functools import partial
 from bs4 import BeautifulSoup
 
+from src.crawl.canonical import collapse_links
+from src.crawl.fetch_policy import shared_fetch_policy
+from src.crawl.fetcher import fetch_with_curl
+from src.crawl.rate_limiter import shared_rate_limiter
+from src.crawl.relevance import rank_discovered
+from src.crawl.url_rules import rules_for
+from src.pipeline.pages import parse_html_page
+from src.pipeline.stages import Pipeline
+
 class CurlVendorScraper:
     """Vendor scraper that uses curl to fetch content."""
     
@@ -18,31 +26,32 @@ class CurlVendorScraper:
         # Regex patterns for extraction
         self.email_pattern = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
         self.phone_pattern = re.compile(r'(\+?1[-.\s]?)?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})')
+        
+        # Per-host politeness (replaces a fixed sleep after every page)
+        self.rate_limiter = shared_rate_limiter()
+        self.fetch_policy = shared_fetch_policy()
+        # Relevant pages are fetched and parsed as separate stages; sized by the PIPELINE_* settings
+        self.pipeline = Pipeline(self.fetch_url_with_curl, partial(parse_html_page, separator=''))
     
     def fetch_url_with_curl(self, url):
         """Fetch URL content using curl."""
-        try:
-            print(f"Fetching: {url}")
-            
-            # Use curl to fetch the content
-            cmd = [
-                'curl', '-s', '-L', '--max-time', '30',
-                '-H', 'User-Agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
-                '-H', 'Accept: text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                url
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            
-            if result.returncode == 0:
-                return result.stdout
-            else:
-                print(f"Curl error: {result.stderr}")
-                return None
-                
-        except Exception as e:
-            print(f"Error fetching {url}: {e}")
-            return None
+        print(f"Fetching: {url}")
+        
+        # Use curl to fetch the content; waits on the per-host rate limiter
+        result = fetch_with_curl(
+            url,
+            headers=[
+                'User-Agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
+                'Accept: text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            ],
+            rate_limiter=self.rate_limiter,
+            policy=self.fetch_policy
+        )
+        
+        if result.ok:
+            return result.text
+        print(f"Fetch failed ({result.failure}): {result.error}")
+        return None
     
     def scrape_vendor_site(self, base_url):
         """Scrape entire vendor website, focusing on products/services."""
@@ -65,16 +74,13 @@ class CurlVendorScraper:
         
         print(f"Found {len(relevant_pages)} relevant pages to scrape")
         
-        # Scrape each relevant page
+        # Scrape each relevant page (fetched concurrently, parsed in worker processes)
         all_content = []
-        for page_url in relevant_pages:
-            print(f"Scraping page: {page_url}")
-            page_content = self.fetch_url_with_curl(page_url)
-            if page_content:
-                page_soup = BeautifulSoup(page_content, 'html.parser')
-                page_data = self._extract_page_content(page_soup, page_url)
-                all_content.append(page_data)
-            time.sleep(1)  # Be respectful
+        for batch in self.pipeline.iter_batches(relevant_pages):
+            for item in batch:
+                if item.ok:
+                    print(f"Scraped page: {item.url}")
+                    all_content.append(self._extract_page_content(item.value))
         
         # Combine all content
         vendor_info['pages'] = all_content
@@ -149,45 +155,19 @@ class CurlVendorScraper:
                     if full_url not in relevant_pages:
                         relevant_pages.append(full_url)
         
-        return relevant_pages
+        # Queue each page once, as its canonical English variant, most relevant first
+        return rank_discovered(soup, base_url, collapse_links(soup, base_url, relevant_pages))
     
     def _is_valid_internal_link(self, link_url, base_url):
         """Check if link is a valid internal link."""
-        try:
-            parsed_link = urlparse(link_url)
-            parsed_base = urlparse(base_url)
-            
-            # Must be same domain
-            if parsed_link.netloc != parsed_base.netloc:
-                return False
-            
-            # Skip common non-content URLs
-            skip_patterns = [
-                '/login', '/signup', '/register', '/logout',
-                '/search', '/cart', '/checkout', '/account',
-                '.pdf', '.doc', '.docx', '.xls', '.xlsx',
-                '.zip', '.rar', '.tar', '.gz',
-                'javascript:', 'mailto:', 'tel:',
-                '#', '?'  # Skip anchors and query params for now
-            ]
-            
-            for pattern in skip_patterns:
-                if pattern in link_url.lower():
-                    return False
-            
-            return True
-            
-        except Exception:
-            return False
+        # Same-site pages, minus account pages, documents, anchors and query-string variants
+        return rules_for(base_url).allows(link_url, base_url)
     
-    def _extract_page_content(self, soup, url):
-        """Extract content from a specific page."""
-        # Get page title
-        title = soup.find('title')
-        title_text = title.get_text().strip() if title else ""
-        
-        # Extract main content
-        main_content = self._extract_main_content(soup)
+    def _extract_page_content(self, page):
+        """Extract contact info, services and technologies from a parsed page."""
+        url = page['url']
+        title_text = page['title']
+        main_content = page['content']
         
         # Extract contact info from this page
         contact_info = self._extract_contact_info(main_content)
@@ -207,27 +187,6 @@ class CurlVendorScraper:
             'technology_stack': tech_stack
         }
     
-    def _extract_main_content(self, soup):
-        """Extract main content from page."""
-        # Try to find main content areas
-        content_selectors = [
-            'main', 'article', '.content', '#content', '.main-content',
-            '.page-content', '.post-content', '.entry-content',
-            '.services', '.products', '.solutions'
-        ]
-        
-        for selector in content_selectors:
-            element = soup.select_one(selector)
-            if element:
-                return element.get_text(strip=True)
-        
-        # Fallback to body
-        body = soup.find('body')
-        if body:
-            return body.get_text(strip=True)
-        
-        return ""
-    
     def _extract_contact_info(self, content):
         """Extract contact information from content."""
         contact_info = {}
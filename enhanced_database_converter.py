@@ -9,6 +9,9 @@ import re
 from pathlib import Path
 from datetime import datetime
 
+from src.processors.extraction_rules import RuleRunner
+from src.utils.json_stream import write_json_array
+
 class EnhancedDatabaseConverter:
     """Converts enhanced vendor markdown files to comprehensive database formats."""
     
@@ -16,6 +19,8 @@ class EnhancedDatabaseConverter:
         self.vendor_database_dir = Path(vendor_database_dir)
         self.output_dir = Path("database_exports")
         self.output_dir.mkdir(exist_ok=True)
+        # Section patterns span whole vendor files, so they are budgeted but not chunked
+        self.rules = RuleRunner('enhanced_converter')
     
     def convert_all_formats(self):
         """Convert all enhanced vendor markdown files to comprehensive database formats."""
@@ -28,34 +33,31 @@ class EnhancedDatabaseConverter:
         
         print(f"Found {len(vendor_files)} vendor files to convert")
         
-        # Convert to JSON
-        self._convert_to_json(vendor_files)
-        
-        # Convert to CSV
-        self._convert_to_csv(vendor_files)
-        
-        # Convert to SQL
-        self._convert_to_sql(vendor_files)
+        with self.rules.run() as rule_stats:
+            # Convert to JSON
+            self._convert_to_json(vendor_files)
+            
+            # Convert to CSV
+            self._convert_to_csv(vendor_files)
+            
+            # Convert to SQL
+            self._convert_to_sql(vendor_files)
         
         print(f"\n✓ Conversion completed! Files saved to: {self.output_dir}")
+        print(f"\nSlowest parsing patterns:\n{rule_stats.format()}")
     
     def _convert_to_json(self, vendor_files):
         """Convert markdown files to JSON format."""
         print("\nConverting to JSON format...")
         
-        vendors_data = []
-        
-        for vendor_file in vendor_files:
-            vendor_data = self._parse_enhanced_markdown_file(vendor_file)
-            if vendor_data:
-                vendors_data.append(vendor_data)
+        # Parse and write one vendor at a time instead of building the full list
+        parsed_vendors = (self._parse_enhanced_markdown_file(vendor_file) for vendor_file in vendor_files)
         
-        # Save as JSON
         json_file = self.output_dir / "enhanced_vendors_database.json"
         with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(vendors_data, f, indent=2, ensure_ascii=False)
+            count = write_json_array(f, (vendor for vendor in parsed_vendors if vendor), indent=2, ensure_ascii=False)
         
-        print(f"  ✓ Saved JSON: {json_file.name}")
+        print(f"  ✓ Saved JSON: {json_file.name} ({count} vendors)")
     
     def _convert_to_csv(self, vendor_files):
         """Convert markdown files to comprehensive CSV format."""
@@ -677,7 +679,7 @@ INSERT INTO vendors (vendor_id, company_name, website, domain, description, titl
         
         # Find services section
         section_pattern = r'## Services Offered\n(.*?)(?=\n## |\n---|\Z)'
-        section_match = re.search(section_pattern, content, re.DOTALL)
+        section_match = self.rules.search(section_pattern, content, re.DOTALL, chunked=False)
         
         if not section_match:
             return services
@@ -686,7 +688,7 @@ INSERT INTO vendors (vendor_id, company_name, website, domain, description, titl
         
         # Extract individual services
         service_pattern = r'### \d+\. (.+?)\n- \*\*Category\*\*: (.+?)\n- \*\*URL\*\*: (.+?)\n- \*\*Description\*\*: (.+?)(?:\n- \*\*Pricing\*\*: (.+?))?'
-        matches = re.findall(service_pattern, section_content, re.DOTALL)
+        matches = self.rules.findall(service_pattern, section_content, re.DOTALL, chunked=False)
         
         for match in matches:
             service_name = match[0].strip()
@@ -719,7 +721,7 @@ INSERT INTO vendors (vendor_id, company_name, website, domain, description, titl
         
         # Find products section
         section_pattern = r'## Products\n(.*?)(?=\n## |\n---|\Z)'
-        section_match = re.search(section_pattern, content, re.DOTALL)
+        section_match = self.rules.search(section_pattern, content, re.DOTALL, chunked=False)
         
         if not section_match:
             return products
@@ -728,7 +730,7 @@ INSERT INTO vendors (vendor_id, company_name, website, domain, description, titl
         
         # Extract individual products
         product_pattern = r'### \d+\. (.+?)\n- \*\*Category\*\*: (.+?)\n- \*\*URL\*\*: (.+?)\n- \*\*Description\*\*: (.+?)(?:\n- \*\*Pricing\*\*: (.+?))?'
-        matches = re.findall(product_pattern, section_content, re.DOTALL)
+        matches = self.rules.findall(product_pattern, section_content, re.DOTALL, chunked=False)
         
         for match in matches:
             product_name = match[0].strip()
@@ -771,7 +773,7 @@ INSERT INTO vendors (vendor_id, company_name, website, domain, description, titl
         
         # Find the service section
         service_pattern = rf'### \d+\. {re.escape(service_name)}.*?(?=’### \d+\. |\Z)'
-        service_match = re.search(service_pattern, content, re.DOTALL)
+        service_match = self.rules.search(service_pattern, content, re.DOTALL, chunked=False)
         
         if not service_match:
             return items
@@ -780,7 +782,7 @@ INSERT INTO vendors (vendor_id, company_name, website, domain, description, titl
         
         # Extract items
         item_pattern = rf'- \*\*{item_type}\*\*:\n(.*?)(?=\n- \*\*|\n### |\Z)'
-        item_match = re.search(item_pattern, service_content, re.DOTALL)
+        item_match = self.rules.search(item_pattern, service_content, re.DOTALL, chunked=False)
         
         if item_match:
             items_text = item_match.group(1)
@@ -800,7 +802,7 @@ INSERT INTO vendors (vendor_id, company_name, website, domain, description, titl
         
         # Find the product section
         product_pattern = rf'### \d+\. {re.escape(product_name)}.*?(?=’### \d+\. |\Z)'
-        product_match = re.search(product_pattern, content, re.DOTALL)
+        product_match = self.rules.search(product_pattern, content, re.DOTALL, chunked=False)
         
         if not product_match:
             return items
@@ -809,7 +811,7 @@ INSERT INTO vendors (vendor_id, company_name, website, domain, description, titl
         
         # Extract items
         item_pattern = rf'- \*\*{item_type}\*\*:\n(.*?)(?=\n- \*\*|\n### |\Z)'
-        item_match = re.search(item_pattern, product_content, re.DOTALL)
+        item_match = self.rules.search(item_pattern, product_content, re.DOTALL, chunked=False)
         
         if item_match:
             items_text = item_match.group(1)
@@ -827,7 +829,7 @@ INSERT INTO vendors (vendor_id, company_name, website, domain, description, titl
         """Extract a specific field for a product."""
         # Find the product section
         product_pattern = rf'### \d+\. {re.escape(product_name)}.*?(?=’### \d+\. |\Z)'
-        product_match = re.search(product_pattern, content, re.DOTALL)
+        product_match = self.rules.search(product_pattern, content, re.DOTALL, chunked=False)
         
         if not product_match:
             return ''
@@ -836,7 +838,7 @@ INSERT INTO vendors (vendor_id, company_name, website, domain, description, titl
         
         # Extract field
         field_pattern = rf'- \*\*{field_name}\*\*: (.+?)(?=\n- \*\*|\n### |\Z)'
-        field_match = re.search(field_pattern, product_content, re.DOTALL)
+        field_match = self.rules.search(field_pattern, product_content, re.DOTALL, chunked=False)
         
         if field_match:
             return field_match.group(1).strip()
@@ -846,14 +848,14 @@ INSERT INTO vendors (vendor_id, company_name, website, domain, description, titl
     def _extract_field(self, content, field_name):
         """Extract a field value from markdown content."""
         pattern = rf'- \*\*{field_name}\*\*: (.+)'
-        match = re.search(pattern, content)
+        match = self.rules.search(pattern, content, chunked=False)
         return match.group(1).strip() if match else ''
     
     def _extract_list_items(self, content, section_name):
         """Extract list items from a section."""
         # Find the section
         section_pattern = rf'## {section_name}\n(.*?)(?=\n## |\n---|\Z)'
-        section_match = re.search(section_pattern, content, re.DOTALL)
+        section_match = self.rules.search(section_pattern, content, re.DOTALL, chunked=False)
         
         if not section_match:
             return []
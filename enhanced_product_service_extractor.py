@@ -2,44 +2,88 @@
 Enhanced Product and Service Extractor - Extracts comprehensive information for each distinct product and service
 """
 
+import argparse
+import io
 import json
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
 from datetime import datetime
 from pathlib import Path
 from urllib.parse import urlparse
 
+from src.analytics.tag_index import TagIndex, tags_from_record
+from src.processors.boilerplate import remove_boilerplate
+from src.processors.extraction_rules import RuleRunner
+
 class EnhancedProductServiceExtractor:
     """Extracts comprehensive product and service information from vendor data."""
     
-    def __init__(self, research_output_dir="research_output"):
+    def __init__(self, research_output_dir="research_output", index_tags=True):
         self.research_output_dir = Path(research_output_dir)
         self.database_output_dir = Path("vendor_database")
         self.database_output_dir.mkdir(exist_ok=True)
-    
-    def extract_all_vendors(self):
-        """Extract comprehensive product and service information from all vendors."""
-        vendor_dirs = [d for d in self.research_output_dir.iterdir() if d.is_dir()]
+        # Tag bitmaps for faceted search, updated per vendor as it is extracted
+        # (worker processes leave the index to the parent)
+        self.tag_index = TagIndex(self.database_output_dir / "tag_index.db") if index_tags else None
+        # Runs the content patterns with chunking and a per-page time budget
+        self.rules = RuleRunner('enhanced_extractor')
+    
+    def extract_all_vendors(self, workers=1):
+        """
+        Extract comprehensive product and service information from all vendors.
+        
+        Vendors are processed in directory name order. With workers > 1 the
+        vendor directories are extracted (and their markdown files written) in
+        that many processes; results and output are still taken in directory
+        order, so the tag index, master database and log match a sequential run.
+        """
+        vendor_dirs = sorted((d for d in self.research_output_dir.iterdir() if d.is_dir()), key=lambda d: d.name)
         
         print(f"Found {len(vendor_dirs)} vendor directories to process")
         
         all_vendor_data = []
         
-        for vendor_dir in vendor_dirs:
-            print(f"Processing: {vendor_dir.name}")
-            vendor_data = self._extract_comprehensive_vendor_data(vendor_dir)
-            if vendor_data:
-                all_vendor_data.append(vendor_data)
-                self._save_vendor_to_database(vendor_data)
+        with self.rules.run() as rule_stats:
+            for vendor_data in self._process_vendor_dirs(vendor_dirs, workers, rule_stats):
+                if vendor_data:
+                    all_vendor_data.append(vendor_data)
+                    self.tag_index.update_vendor(vendor_data['vendor_id'], tags_from_record(vendor_data))
+        
+        self.tag_index.save()
         
         # Create master database file
         self._create_master_database(all_vendor_data)
         
         print(f"\n✓ Processed {len(all_vendor_data)} vendors")
         print(f"Database files saved to: {self.database_output_dir}")
+        print(f"\nSlowest extraction patterns:\n{rule_stats.format()}")
         
         return all_vendor_data
     
+    def _process_vendor_dirs(self, vendor_dirs, workers, rule_stats):
+        """Yield each vendor directory's data in order, extracting in a process pool when workers > 1."""
+        if workers <= 1 or len(vendor_dirs) <= 1:
+            for vendor_dir in vendor_dirs:
+                yield self._process_vendor_dir(vendor_dir)
+            return
+        
+        print(f"Extracting with {workers} worker processes")
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(str(self.research_output_dir),)) as pool:
+            for vendor_data, output, stats in pool.map(_process_in_worker, vendor_dirs):
+                print(output, end='')
+                rule_stats.merge(stats)
+                yield vendor_data
+    
+    def _process_vendor_dir(self, vendor_dir):
+        """Extract one vendor directory and save its database markdown file."""
+        print(f"Processing: {vendor_dir.name}")
+        vendor_data = self._extract_comprehensive_vendor_data(vendor_dir)
+        if vendor_data:
+            self._save_vendor_to_database(vendor_data)
+        return vendor_data
+    
     def _extract_comprehensive_vendor_data(self, vendor_dir):
         """Extract comprehensive data from a vendor directory."""
         try:
@@ -55,6 +99,11 @@ class EnhancedProductServiceExtractor:
             with open(vendor_info_file, 'r', encoding='utf-8') as f:
                 vendor_data = json.load(f)
             
+            # Drop headers, menus and footers repeated across the site's pages
+            stats = remove_boilerplate(vendor_data.get('pages', []))
+            if stats['removed_bytes']:
+                print(f"  Removed {stats['removed_bytes']} bytes of boilerplate from {stats['pages']} pages")
+            
             # Extract comprehensive vendor information
             extracted_data = {
                 'vendor_id': self._generate_vendor_id(vendor_data.get('name', '')),
@@ -201,7 +250,7 @@ class EnhancedProductServiceExtractor:
         ]
         
         for pattern in desc_patterns:
-            matches = re.findall(pattern, content)
+            matches = self.rules.findall(pattern, content)
             if matches:
                 return matches[0].strip()
         
@@ -223,7 +272,7 @@ class EnhancedProductServiceExtractor:
         ]
         
         for pattern in feature_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
+            matches = self.rules.findall(pattern, content, re.IGNORECASE)
             for match in matches:
                 feature = match.strip()
                 if len(feature) > 10 and len(feature) < 200:
@@ -246,7 +295,7 @@ class EnhancedProductServiceExtractor:
         ]
         
         for pattern in benefit_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
+            matches = self.rules.findall(pattern, content, re.IGNORECASE)
             for match in matches:
                 benefit = match.strip()
                 if len(benefit) > 10 and len(benefit) < 200:
@@ -268,7 +317,7 @@ class EnhancedProductServiceExtractor:
         ]
         
         for pattern in use_case_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
+            matches = self.rules.findall(pattern, content, re.IGNORECASE)
             for match in matches:
                 use_case = match.strip()
                 if len(use_case) > 10 and len(use_case) < 200:
@@ -278,8 +327,8 @@ class EnhancedProductServiceExtractor:
     
     def _extract_service_pricing(self, content):
         """Extract service pricing from content."""
-        price_pattern = re.compile(r'[\$€£¥]\s*[\d,]+(?:\.\d{2})?(?:\s*(?:per|/)\s*(?:month|year|hour|day|user|seat))?', re.IGNORECASE)
-        prices = price_pattern.findall(content)
+        price_pattern = r'[\$€£¥]\s*[\d,]+(?:\.\d{2})?(?:\s*(?:per|/)\s*(?:month|year|hour|day|user|seat))?'
+        prices = self.rules.findall(price_pattern, content, re.IGNORECASE)
         return prices[0] if prices else None
     
     def _extract_service_category(self, url, title):
@@ -318,7 +367,7 @@ class EnhancedProductServiceExtractor:
         ]
         
         for pattern in desc_patterns:
-            matches = re.findall(pattern, content)
+            matches = self.rules.findall(pattern, content)
             if matches:
                 return matches[0].strip()
         
@@ -341,7 +390,7 @@ class EnhancedProductServiceExtractor:
         ]
         
         for pattern in feature_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
+            matches = self.rules.findall(pattern, content, re.IGNORECASE)
             for match in matches:
                 feature = match.strip()
                 if len(feature) > 10 and len(feature) < 200:
@@ -365,7 +414,7 @@ class EnhancedProductServiceExtractor:
         ]
         
         for pattern in benefit_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
+            matches = self.rules.findall(pattern, content, re.IGNORECASE)
             for match in matches:
                 benefit = match.strip()
                 if len(benefit) > 10 and len(benefit) < 200:
@@ -388,7 +437,7 @@ class EnhancedProductServiceExtractor:
         ]
         
         for pattern in use_case_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
+            matches = self.rules.findall(pattern, content, re.IGNORECASE)
             for match in matches:
                 use_case = match.strip()
                 if len(use_case) > 10 and len(use_case) < 200:
@@ -398,8 +447,8 @@ class EnhancedProductServiceExtractor:
     
     def _extract_product_pricing(self, content):
         """Extract product pricing from content."""
-        price_pattern = re.compile(r'[\$€£¥]\s*[\d,]+(?:\.\d{2})?(?:\s*(?:per|/)\s*(?:month|year|hour|day|user|seat))?', re.IGNORECASE)
-        prices = price_pattern.findall(content)
+        price_pattern = r'[\$€£¥]\s*[\d,]+(?:\.\d{2})?(?:\s*(?:per|/)\s*(?:month|year|hour|day|user|seat))?'
+        prices = self.rules.findall(price_pattern, content, re.IGNORECASE)
         return prices[0] if prices else None
     
     def _extract_product_category(self, url, title):
@@ -433,7 +482,7 @@ class EnhancedProductServiceExtractor:
         ]
         
         for pattern in audience_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
+            matches = self.rules.findall(pattern, content, re.IGNORECASE)
             if matches:
                 return matches[0].strip()
         
@@ -449,7 +498,7 @@ class EnhancedProductServiceExtractor:
         ]
         
         for pattern in req_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
+            matches = self.rules.findall(pattern, content, re.IGNORECASE)
             if matches:
                 return matches[0].strip()
         
@@ -465,7 +514,7 @@ class EnhancedProductServiceExtractor:
         ]
         
         for pattern in deploy_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
+            matches = self.rules.findall(pattern, content, re.IGNORECASE)
             if matches:
                 return matches[0].strip()
         
@@ -481,7 +530,7 @@ class EnhancedProductServiceExtractor:
         ]
         
         for pattern in support_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
+            matches = self.rules.findall(pattern, content, re.IGNORECASE)
             if matches:
                 return matches[0].strip()
         
@@ -507,24 +556,24 @@ class EnhancedProductServiceExtractor:
         
         # Remove duplicates from lists
         for service in merged.values():
-            service['features'] = list(set(service['features']))
-            service['benefits'] = list(set(service['benefits']))
-            service['use_cases'] = list(set(service['use_cases']))
+            service['features'] = list(dict.fromkeys(service['features']))
+            service['benefits'] = list(dict.fromkeys(service['benefits']))
+            service['use_cases'] = list(dict.fromkeys(service['use_cases']))
         
         return list(merged.values())
     
     def _extract_technology_stack(self, vendor_data):
         """Extract technology stack from vendor data."""
-        all_tech = set()
+        all_tech = {}  # Keys in first-seen order, unlike a set
         
         # Get tech stack from main vendor data
         if 'technology_stack' in vendor_data:
-            all_tech.update(vendor_data['technology_stack'])
+            all_tech.update(dict.fromkeys(vendor_data['technology_stack']))
         
         # Get tech stack from individual pages
         for page in vendor_data.get('pages', []):
             if 'technology_stack' in page:
-                all_tech.update(page['technology_stack'])
+                all_tech.update(dict.fromkeys(page['technology_stack']))
         
         return list(all_tech)
     
@@ -534,11 +583,11 @@ class EnhancedProductServiceExtractor:
         
         for page in vendor_data.get('pages', []):
             content = page.get('content', '')
-            price_pattern = re.compile(r'[\$€£¥]\s*[\d,]+(?:\.\d{2})?(?:\s*(?:per|/)\s*(?:month|year|hour|day|user|seat))?', re.IGNORECASE)
-            prices = price_pattern.findall(content)
+            price_pattern = r'[\$€£¥]\s*[\d,]+(?:\.\d{2})?(?:\s*(?:per|/)\s*(?:month|year|hour|day|user|seat))?'
+            prices = self.rules.findall(price_pattern, content, re.IGNORECASE)
             pricing_info.extend(prices)
         
-        return list(set(pricing_info))  # Remove duplicates
+        return list(dict.fromkeys(pricing_info))  # Remove duplicates
     
     def _extract_industry_focus(self, vendor_data):
         """Extract industry focus from vendor data."""
@@ -560,7 +609,7 @@ class EnhancedProductServiceExtractor:
             if industry in content_lower:
                 industries.append(industry.title())
         
-        return list(set(industries))
+        return list(dict.fromkeys(industries))
     
     def _extract_geographic_presence(self, vendor_data):
         """Extract geographic presence from vendor data."""
@@ -580,7 +629,7 @@ class EnhancedProductServiceExtractor:
             elif '/ja/' in url:
                 geo_indicators.append('Japan')
         
-        return list(set(geo_indicators))
+        return list(dict.fromkeys(geo_indicators))
     
     def _extract_features(self, vendor_data):
         """Extract general features from vendor data."""
@@ -596,13 +645,13 @@ class EnhancedProductServiceExtractor:
             ]
             
             for pattern in feature_patterns:
-                matches = re.findall(pattern, content)
+                matches = self.rules.findall(pattern, content)
                 for match in matches:
                     feature = match.strip()
                     if len(feature) > 10 and len(feature) < 200:
                         features.append(feature)
         
-        return list(set(features))[:20]  # Limit to top 20 unique features
+        return list(dict.fromkeys(features))[:20]  # Limit to top 20 unique features
     
     def _extract_benefits(self, vendor_data):
         """Extract general benefits from vendor data."""
@@ -619,13 +668,13 @@ class EnhancedProductServiceExtractor:
             ]
             
             for pattern in benefit_patterns:
-                matches = re.findall(pattern, content, re.IGNORECASE)
+                matches = self.rules.findall(pattern, content, re.IGNORECASE)
                 for match in matches:
                     benefit = match.strip()
                     if len(benefit) > 10 and len(benefit) < 200:
                         benefits.append(benefit)
         
-        return list(set(benefits))[:20]  # Limit to top 20 unique benefits
+        return list(dict.fromkeys(benefits))[:20]  # Limit to top 20 unique benefits
     
     def _extract_use_cases(self, vendor_data):
         """Extract general use cases from vendor data."""
@@ -641,13 +690,13 @@ class EnhancedProductServiceExtractor:
             ]
             
             for pattern in use_case_patterns:
-                matches = re.findall(pattern, content, re.IGNORECASE)
+                matches = self.rules.findall(pattern, content, re.IGNORECASE)
                 for match in matches:
                     use_case = match.strip()
                     if len(use_case) > 10 and len(use_case) < 200:
                         use_cases.append(use_case)
         
-        return list(set(use_cases))[:20]  # Limit to top 20 unique use cases
+        return list(dict.fromkeys(use_cases))[:20]  # Limit to top 20 unique use cases
     
     def _extract_integrations(self, vendor_data):
         """Extract integration information from vendor data."""
@@ -663,13 +712,13 @@ class EnhancedProductServiceExtractor:
             ]
             
             for pattern in integration_patterns:
-                matches = re.findall(pattern, content, re.IGNORECASE)
+                matches = self.rules.findall(pattern, content, re.IGNORECASE)
                 for match in matches:
                     integration = match.strip()
                     if len(integration) > 10 and len(integration) < 200:
                         integrations.append(integration)
         
-        return list(set(integrations))[:15]  # Limit to top 15 unique integrations
+        return list(dict.fromkeys(integrations))[:15]  # Limit to top 15 unique integrations
     
     def _extract_certifications(self, vendor_data):
         """Extract certification information from vendor data."""
@@ -685,13 +734,13 @@ class EnhancedProductServiceExtractor:
             ]
             
             for pattern in cert_patterns:
-                matches = re.findall(pattern, content, re.IGNORECASE)
+                matches = self.rules.findall(pattern, content, re.IGNORECASE)
                 for match in matches:
                     cert = match.strip()
                     if len(cert) > 10 and len(cert) < 200:
                         certifications.append(cert)
         
-        return list(set(certifications))[:15]  # Limit to top 15 unique certifications
+        return list(dict.fromkeys(certifications))[:15]  # Limit to top 15 unique certifications
     
     def _generate_vendor_id(self, company_name):
         """Generate a unique vendor ID from company name."""
@@ -907,15 +956,34 @@ Total Vendors: {len(all_vendor_data)}
         
         print(f"✓ Created master database: {master_file.name}")
 
+# Extractor of a worker process in --workers mode, created by _init_worker
+_worker_extractor = None
+
+def _init_worker(research_output_dir):
+    global _worker_extractor
+    _worker_extractor = EnhancedProductServiceExtractor(research_output_dir, index_tags=False)
+
+def _process_in_worker(vendor_dir):
+    """Extract one vendor directory in a worker; its output is returned for the parent to print in order."""
+    output = io.StringIO()
+    with redirect_stdout(output), _worker_extractor.rules.run() as stats:
+        vendor_data = _worker_extractor._process_vendor_dir(vendor_dir)
+    return vendor_data, output.getvalue(), stats
+
 def main():
     """Main function to extract comprehensive vendor data."""
+    parser = argparse.ArgumentParser(description='Extract product and service information from research_output/')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Vendor directories to extract in parallel processes (0 = one per CPU, default 1)')
+    args = parser.parse_args()
+    
     extractor = EnhancedProductServiceExtractor()
     
     print("Starting enhanced product and service extraction...")
     print("=" * 60)
     
     # Extract all vendor data
-    vendor_data = extractor.extract_all_vendors()
+    vendor_data = extractor.extract_all_vendors(workers=args.workers or os.cpu_count() or 1)
     
     print("\n" + "=" * 60)
     print("Enhanced vendor data extraction completed!")
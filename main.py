@@ -8,7 +8,12 @@ import json
 from pathlib import Path
 from typing import List
 
-from src.research.vendor_researcher import VendorResearcher
+from src.analytics.catalog import DEFAULT_EXPORT_DIR, load_catalog
+from src.analytics.tag_index import TagIndex
+from src.crawl.relevance import RELEVANCE_MODEL_FILE, load_labels, train, training_examples
+from src.research.vendor_researcher import SUMMARY_TABLE_ROWS, VendorResearcher
+from src.utils.metrics import REGISTRY, dump_metrics
+from src.utils.profiling import PROFILE_MODES, RunProfiler
 from rich.console import Console
 from rich.panel import Panel
 
@@ -23,7 +28,11 @@ def cli():
 @click.argument('urls', nargs=-1, required=True)
 @click.option('--output-dir', '-o', default='research_output', help='Output directory for results')
 @click.option('--file', '-f', help='File containing URLs (one per line)')
-def research(urls, output_dir, file):
+@click.option('--profile', type=click.Choice(PROFILE_MODES),
+              help='Profile the run (cprofile: pstats; sample: wall-clock stacks for flamegraphs)')
+@click.option('--retry-failed', is_flag=True,
+              help='Only fetch URLs that failed (or were never fetched) in previous runs')
+def research(urls, output_dir, file, profile, retry_failed):
     """Research vendors by scraping their websites."""
     
     # Collect URLs
@@ -51,16 +60,40 @@ def research(urls, output_dir, file):
     # Initialize researcher
     researcher = VendorResearcher(output_dir=output_dir)
     
-    # Conduct research
+    # Conduct research; large batches are only written to disk, not held for the results table
+    keep_results = len(all_urls) <= SUMMARY_TABLE_ROWS
+    profiler = RunProfiler(profile, Path(output_dir) / 'profiles', name='research')
     try:
-        vendor_info_list = researcher.research_vendors(all_urls)
+        with profiler:
+            vendor_info_list = researcher.research_vendors(all_urls, retry_failed=retry_failed,
+                                                           keep_results=keep_results)
         
         # Display results
         console.print("\n[bold green]Research completed![/bold green]")
-        researcher.display_results(vendor_info_list)
+        if keep_results:
+            researcher.display_results(vendor_info_list)
         
     except Exception as e:
         console.print(f"[red]Error during research: {e}[/red]")
+    
+    finally:
+        _report_metrics(output_dir)
+        for path in profiler.paths:
+            console.print(f"[dim]Profile saved to {path}[/dim]")
+
+def _report_metrics(output_dir):
+    """Print a timing summary and save metrics in Prometheus text format."""
+    lines = REGISTRY.summary()
+    if not lines:
+        return
+    
+    metrics_file = Path(output_dir) / 'metrics.prom'
+    dump_metrics(metrics_file)
+    
+    console.print("\n[bold]Pipeline metrics[/bold]")
+    for line in lines:
+        console.print(f"  {line}", markup=False, highlight=False)
+    console.print(f"[dim]Metrics saved to {metrics_file}[/dim]")
 
 @cli.command()
 @click.option('--output-dir', '-o', default='research_output', help='Output directory to search')
@@ -150,5 +183,90 @@ def show_vendor(vendor_name, output_dir):
     else:
         console.print(f"[red]Vendor information file not found for {vendor_name}.[/red]")
 
+@cli.command()
+@click.option('--exports-dir', '-d', default=DEFAULT_EXPORT_DIR, help='Directory with the exported vendor tables')
+@click.option('--technology', '-t', multiple=True, help='Technology the vendor must use (repeatable)')
+@click.option('--industry', '-i', multiple=True, help='Industry the vendor must serve (repeatable)')
+@click.option('--certification', '-c', multiple=True, help='Certification the vendor must hold (repeatable)')
+@click.option('--feature', '-f', multiple=True, help='Feature the vendor must list (repeatable)')
+@click.option('--service', '-s', multiple=True, help='Service the vendor must offer (repeatable, needs --index)')
+@click.option('--index', 'index_path', type=click.Path(exists=True, dir_okay=False),
+              help='Query a tag index (e.g. research_output/tag_index.db) instead of the exports')
+@click.option('--any', 'match_any', is_flag=True, help='Match any (not all) of the values given for a facet')
+@click.option('--limit', '-n', default=20, help='Maximum vendors to list')
+@click.option('--top', default=10, help='Values to show per facet')
+def facets(exports_dir, technology, industry, certification, feature, service, index_path, match_any, limit, top):
+    """Filter the vendor catalogue by tags and count tag values across the matches."""
+    filters = {'technology': technology, 'industry': industry, 'certification': certification,
+               'feature': feature, 'service': service}
+    filters = {name: terms for name, terms in filters.items() if terms}
+    
+    if index_path:
+        source = TagIndex(index_path)
+    elif service:
+        console.print("[red]Error: --service needs a tag index (--index)[/red]")
+        return
+    else:
+        try:
+            source = load_catalog(exports_dir)
+        except FileNotFoundError as e:
+            console.print(f"[red]Error: {e}[/red]")
+            return
+    
+    result = source.query(filters, match_any=match_any, limit=limit, top=top)
+    
+    description = ', '.join(f"{name}: {' | '.join(terms) if match_any else ' & '.join(terms)}"
+                            for name, terms in result['filters'].items()) or 'no filters'
+    console.print(Panel.fit(
+        f"[bold blue]{result['matched']} of {result['total_vendors']} vendors match ({description})[/bold blue]\n"
+        f"[dim]answered in {result['elapsed_ms']} ms[/dim]",
+        title="Vendor Facets"
+    ))
+    
+    from rich.table import Table
+    if result['vendors']:
+        table = Table()
+        table.add_column("Vendor", style="cyan")
+        table.add_column("Website", style="green")
+        for vendor in result['vendors']:
+            table.add_row(vendor.get('company_name') or vendor['vendor_id'], vendor.get('website') or '')
+        console.print(table)
+    
+    for name, counts in result['facets'].items():
+        if not counts:
+            continue
+        table = Table(title=name.title())
+        table.add_column("Value", style="cyan", overflow="fold")
+        table.add_column("Vendors", style="yellow", justify="right")
+        for item in counts:
+            table.add_row(item['value'], str(item['count']))
+        console.print(table)
+
+@cli.command('train-relevance')
+@click.option('--exports-dir', '-d', default=DEFAULT_EXPORT_DIR, help='Directory with services.csv and products.csv')
+@click.option('--research-dir', '-r', default='research_output', help='Research output with raw_data.json link lists')
+@click.option('--output', '-o', default=RELEVANCE_MODEL_FILE, help='Model file to write')
+@click.option('--epochs', default=20, help='Training passes over the examples')
+def train_relevance(exports_dir, research_dir, output, epochs):
+    """Train the link relevance model the crawlers use to order and prune their frontier."""
+    labels = load_labels(exports_dir)
+    if not labels:
+        console.print(f"[red]Error: no service or product URLs in {exports_dir}[/red]")
+        return
+    
+    examples = training_examples(labels, sorted(Path(research_dir).glob('*/raw_data.json')))
+    positives = sum(label for _, label in examples)
+    console.print(f"Training on {len(examples)} links ({positives} service/product pages)")
+    try:
+        model = train(examples, epochs=epochs)
+    except ValueError as e:
+        console.print(f"[red]Error: {e}. Research some vendors first so their page links can be used.[/red]")
+        return
+    
+    correct = sum((score >= 0.5) == bool(label)
+                  for score, (_, label) in zip(model.score_links([link for link, _ in examples]), examples))
+    model.save(output)
+    console.print(f"[green]Model saved to {output}[/green] (training accuracy {correct / len(examples):.1%})")
+
 if __name__ == '__main__':
     cli()
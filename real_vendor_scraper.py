@@ -7,12 +7,22 @@ import re
 import time
 from urllib.parse import urljoin, urlparse
 from datetime import datetime
+from functools import partial
 import os
 import ssl
 import urllib.request
 import urllib.error
 from bs4 import BeautifulSoup
 
+from src.crawl.canonical import collapse_links
+from src.crawl.fetch_policy import BLOCKED, TOO_LARGE, detect_blocked, shared_fetch_policy
+from src.crawl.fetcher import CHUNK_SIZE, check_headers, decompress_chunks, read_capped
+from src.crawl.rate_limiter import shared_rate_limiter
+from src.crawl.relevance import rank_discovered
+from src.crawl.url_rules import rules_for
+from src.pipeline.pages import parse_html_page
+from src.pipeline.stages import Pipeline
+
 class RealVendorScraper:
     """Real web scraper that works around SSL issues."""
     
@@ -35,30 +45,61 @@ class RealVendorScraper:
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1'
         }
+        
+        # Per-host politeness (replaces a fixed sleep after every page)
+        self.rate_limiter = shared_rate_limiter()
+        self.fetch_policy = shared_fetch_policy()
+        # Relevant pages are fetched and parsed as separate stages; sized by the PIPELINE_* settings
+        self.pipeline = Pipeline(self.fetch_url, partial(parse_html_page, separator=''))
     
     def fetch_url(self, url):
-        """Fetch URL content with SSL workaround."""
+        """Fetch URL content with SSL workaround, retrying transient failures."""
+        print(f"Fetching: {url}")
+        result, failure = self.fetch_policy.execute(url, lambda: self._fetch_once(url), lambda result: result[1])
+        if failure:
+            print(f"Error fetching {url}: {failure}")
+            return None
+        content = result[0]
+        if detect_blocked(content):
+            print(f"Error fetching {url}: {BLOCKED}")
+            return None
+        return content
+
+    def _fetch_once(self, url):
+        """
+        Single request, returning (content, failure).
+
+        HTTP errors are raised so the fetch policy can classify them.
+        """
+        self.rate_limiter.acquire(url)
+        start = time.perf_counter()
         try:
-            print(f"Fetching: {url}")
-            
             # Create request with headers
             req = urllib.request.Request(url, headers=self.headers)
             
             # Open URL with SSL context
             with urllib.request.urlopen(req, context=self.ssl_context, timeout=30) as response:
-                content = response.read()
+                headers = {name.lower(): value for name, value in response.headers.items()}
+                self.rate_limiter.record(url, response.status, time.perf_counter() - start)
                 
-                # Handle gzip encoding
-                if response.info().get('Content-Encoding') == 'gzip':
-                    import gzip
-                    content = gzip.decompress(content)
+                # Skip non-HTML and oversized responses before downloading them
+                rejected = check_headers(response.status, headers)
+                if rejected:
+                    return None, rejected
                 
-                return content.decode('utf-8', errors='ignore')
+                # Stream the body, decompressing gzip as it arrives
+                chunks = iter(lambda: response.read(CHUNK_SIZE), b'')
+                content, too_large = read_capped(decompress_chunks(chunks, headers.get('content-encoding')))
+                if too_large:
+                    return None, TOO_LARGE
                 
-        except Exception as e:
-            print(f"Error fetching {url}: {e}")
-            return None
-    
+                return content.decode('utf-8', errors='ignore'), None
+                
+        except urllib.error.HTTPError as e:
+            # 429/503 with Retry-After puts the host into backoff
+            self.rate_limiter.record(url, e.code, time.perf_counter() - start, e.headers.get('Retry-After'))
+            raise
+
     def scrape_vendor_site(self, base_url):
         """Scrape entire vendor website, focusing on products/services."""
         print(f"Starting comprehensive scrape of: {base_url}")
@@ -80,16 +121,13 @@ class RealVendorScraper:
         
         print(f"Found {len(relevant_pages)} relevant pages to scrape")
         
-        # Scrape each relevant page
+        # Scrape each relevant page (fetched concurrently, parsed in worker processes)
         all_content = []
-        for page_url in relevant_pages:
-            print(f"Scraping page: {page_url}")
-            page_content = self.fetch_url(page_url)
-            if page_content:
-                page_soup = BeautifulSoup(page_content, 'html.parser')
-                page_data = self._extract_page_content(page_soup, page_url)
-                all_content.append(page_data)
-            time.sleep(1)  # Be respectful
+        for batch in self.pipeline.iter_batches(relevant_pages):
+            for item in batch:
+                if item.ok:
+                    print(f"Scraped page: {item.url}")
+                    all_content.append(self._extract_page_content(item.value))
         
         # Combine all content
         vendor_info['pages'] = all_content
@@ -164,45 +202,19 @@ class RealVendorScraper:
                     if full_url not in relevant_pages:
                         relevant_pages.append(full_url)
         
-        return relevant_pages
+        # Queue each page once, as its canonical English variant, most relevant first
+        return rank_discovered(soup, base_url, collapse_links(soup, base_url, relevant_pages))
     
     def _is_valid_internal_link(self, link_url, base_url):
         """Check if link is a valid internal link."""
-        try:
-            parsed_link = urlparse(link_url)
-            parsed_base = urlparse(base_url)
-            
-            # Must be same domain
-            if parsed_link.netloc != parsed_base.netloc:
-                return False
-            
-            # Skip common non-content URLs
-            skip_patterns = [
-                '/login', '/signup', '/register', '/logout',
-                '/search', '/cart', '/checkout', '/account',
-                '.pdf', '.doc', '.docx', '.xls', '.xlsx',
-                '.zip', '.rar', '.tar', '.gz',
-                'javascript:', 'mailto:', 'tel:',
-                '#', '?'  # Skip anchors and query params for now
-            ]
-            
-            for pattern in skip_patterns:
-                if pattern in link_url.lower():
-                    return False
-            
-            return True
-            
-        except Exception:
-            return False
+        # Same-site pages, minus account pages, documents, anchors and query-string variants
+        return rules_for(base_url).allows(link_url, base_url)
     
-    def _extract_page_content(self, soup, url):
-        """Extract content from a specific page."""
-        # Get page title
-        title = soup.find('title')
-        title_text = title.get_text().strip() if title else ""
-        
-        # Extract main content
-        main_content = self._extract_main_content(soup)
+    def _extract_page_content(self, page):
+        """Extract contact info, services and technologies from a parsed page."""
+        url = page['url']
+        title_text = page['title']
+        main_content = page['content']
         
         # Extract contact info from this page
         contact_info = self._extract_contact_info(main_content)
@@ -222,27 +234,6 @@ class RealVendorScraper:
             'technology_stack': tech_stack
         }
     
-    def _extract_main_content(self, soup):
-        """Extract main content from page."""
-        # Try to find main content areas
-        content_selectors = [
-            'main', 'article', '.content', '#content', '.main-content',
-            '.page-content', '.post-content', '.entry-content',
-            '.services', '.products', '.solutions'
-        ]
-        
-        for selector in content_selectors:
-            element = soup.select_one(selector)
-            if element:
-                return element.get_text(strip=True)
-        
-        # Fallback to body
-        body = soup.find('body')
-        if body:
-            return body.get_text(strip=True)
-        
-        return ""
-    
     def _extract_contact_info(self, content):
         """Extract contact information from content."""
         contact_info = {}
@@ -0,0 +1,3 @@
+"""
+In-memory analytics over the exported vendor catalogue.
+"""
@@ -0,0 +1,239 @@
+"""
+Compressed bitmaps of vendor ids.
+
+RoaringBitmap follows the Roaring layout: ids are split into a high 16-bit key
+and a low 16-bit value, and each key holds a container that is either a sorted
+array of low values (sparse chunks, 2 bytes per id) or a 65536-bit bitset
+stored as a Python int (dense chunks, 8 KB). Rare tags therefore cost a few
+bytes however large the vendor ids get, while common tags intersect as
+big-integer ANDs.
+"""
+
+import re
+import struct
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Union
+
+# Containers with more values than this are stored as bitsets
+ARRAY_LIMIT = 4096
+
+_CHUNK_BITS = 1 << 16
+
+_NONZERO_BYTE = re.compile(rb'[^\x00]')
+_BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+Container = Union[array, int]
+
+
+def popcount(bitmap: int) -> int:
+    """Number of set bits of an int bitset (int.bit_count() is Python 3.10+)."""
+    return bin(bitmap).count('1')
+
+
+def bit_positions(bitmap: int) -> List[int]:
+    """Positions of the set bits of an int bitset, lowest first."""
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    positions = []
+    # The regex skips runs of zero bytes at C speed, which is most of a sparse bitmap
+    for match in _NONZERO_BYTE.finditer(data):
+        base = match.start() * 8
+        positions.extend(base + bit for bit in _BYTE_BITS[data[base // 8]])
+    return positions
+
+
+def _cardinality(container: Container) -> int:
+    return len(container) if isinstance(container, array) else popcount(container)
+
+
+def _to_bitset(container: Container) -> int:
+    if not isinstance(container, array):
+        return container
+    bitset = 0
+    for value in container:
+        bitset |= 1 << value
+    return bitset
+
+
+def _optimize(container: Container) -> Container:
+    """Store a container in whichever form is smaller."""
+    if isinstance(container, array):
+        return container if len(container) <= ARRAY_LIMIT else _to_bitset(container)
+    if popcount(container) <= ARRAY_LIMIT:
+        return array('H', bit_positions(container))
+    return container
+
+
+def _array_contains(container: array, value: int) -> bool:
+    index = bisect_left(container, value)
+    return index < len(container) and container[index] == value
+
+
+def _and(a: Container, b: Container) -> Container:
+    if isinstance(a, array) and isinstance(b, array):
+        if len(a) > len(b):
+            a, b = b, a
+        if len(a) * 16 < len(b):
+            # Galloping is cheaper than hashing the larger array
+            return array('H', [value for value in a if _array_contains(b, value)])
+        return array('H', sorted(set(a).intersection(b)))
+    if isinstance(b, array):
+        a, b = b, a
+    if isinstance(a, array):
+        # Shifting a 65536-bit int per value is slow; test bits in its bytes instead
+        data = b.to_bytes(_CHUNK_BITS // 8, 'little')
+        return array('H', [value for value in a if data[value >> 3] >> (value & 7) & 1])
+    return _optimize(a & b)
+
+
+def _or(a: Container, b: Container) -> Container:
+    if isinstance(a, array) and isinstance(b, array) and len(a) + len(b) <= ARRAY_LIMIT:
+        return array('H', sorted(set(a).union(b)))
+    return _optimize(_to_bitset(a) | _to_bitset(b))
+
+
+class RoaringBitmap:
+    """Set of non-negative integer ids (below 2**32) in Roaring-style containers."""
+
+    __slots__ = ('containers',)
+
+    def __init__(self, values: Iterable[int] = ()):
+        self.containers: Dict[int, Container] = {}
+        for value in values:
+            self.add(value)
+
+    def add(self, value: int):
+        high, low = value >> 16, value & 0xFFFF
+        container = self.containers.get(high)
+        if container is None:
+            self.containers[high] = array('H', [low])
+        elif isinstance(container, array):
+            index = bisect_left(container, low)
+            if index == len(container) or container[index] != low:
+                container.insert(index, low)
+                if len(container) > ARRAY_LIMIT:
+                    self.containers[high] = _to_bitset(container)
+        else:
+            self.containers[high] = container | (1 << low)
+
+    def discard(self, value: int):
+        high, low = value >> 16, value & 0xFFFF
+        container = self.containers.get(high)
+        if container is None:
+            return
+        if isinstance(container, array):
+            try:
+                container.remove(low)
+            except ValueError:
+                return
+        else:
+            container = _optimize(container & ~(1 << low))
+            self.containers[high] = container
+        if not _cardinality(container):
+            del self.containers[high]
+
+    def __contains__(self, value: int) -> bool:
+        container = self.containers.get(value >> 16)
+        if container is None:
+            return False
+        low = value & 0xFFFF
+        if isinstance(container, array):
+            return _array_contains(container, low)
+        return bool(container >> low & 1)
+
+    def __len__(self) -> int:
+        return sum(_cardinality(container) for container in self.containers.values())
+
+    def __bool__(self) -> bool:
+        return bool(self.containers)
+
+    def __iter__(self) -> Iterator[int]:
+        for high in sorted(self.containers):
+            base = high << 16
+            container = self.containers[high]
+            values = container if isinstance(container, array) else bit_positions(container)
+            for low in values:
+                yield base + low
+
+    def __and__(self, other: 'RoaringBitmap') -> 'RoaringBitmap':
+        result = RoaringBitmap()
+        for high in self.containers.keys() & other.containers.keys():
+            container = _and(self.containers[high], other.containers[high])
+            if _cardinality(container):
+                result.containers[high] = container
+        return result
+
+    def __or__(self, other: 'RoaringBitmap') -> 'RoaringBitmap':
+        result = RoaringBitmap()
+        for high in self.containers.keys() | other.containers.keys():
+            a, b = self.containers.get(high), other.containers.get(high)
+            if a is None or b is None:
+                container = a if b is None else b
+                result.containers[high] = array('H', container) if isinstance(container, array) else container
+            else:
+                result.containers[high] = _or(a, b)
+        return result
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, RoaringBitmap) and list(self) == list(other)
+
+    def intersection_size(self, other: 'RoaringBitmap') -> int:
+        """len(self & other) without keeping the intersection."""
+        return self.intersection_sizes([other])[0]
+
+    def intersection_sizes(self, others: Iterable['RoaringBitmap']) -> List[int]:
+        """
+        len(self & other) for many bitmaps, e.g. every tag of a facet.
+
+        Each of self's containers is converted once to a set (to intersect
+        array containers) and a bitset (to AND with bitset containers), so each
+        other bitmap costs one C-level operation per shared container.
+        """
+        sets = {high: set(container) if isinstance(container, array) else set(bit_positions(container))
+                for high, container in self.containers.items()}
+        bitsets = {high: _to_bitset(container) for high, container in self.containers.items()}
+        sizes = []
+        for other in others:
+            size = 0
+            for high, container in other.containers.items():
+                members = sets.get(high)
+                if members is None:
+                    continue
+                if isinstance(container, array):
+                    size += len(members.intersection(container))
+                else:
+                    size += popcount(bitsets[high] & container)
+            sizes.append(size)
+        return sizes
+
+    def to_bytes(self) -> bytes:
+        """Serialise as: container count, then per container key, kind, length and payload."""
+        parts = [struct.pack('<I', len(self.containers))]
+        for high in sorted(self.containers):
+            container = self.containers[high]
+            if isinstance(container, array):
+                payload = container.tobytes() if container.itemsize == 2 else array('H', container).tobytes()
+                parts.append(struct.pack('<HBI', high, 0, len(payload)))
+            else:
+                payload = container.to_bytes(_CHUNK_BITS // 8, 'little')
+                parts.append(struct.pack('<HBI', high, 1, len(payload)))
+            parts.append(payload)
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'RoaringBitmap':
+        bitmap = cls()
+        (count,) = struct.unpack_from('<I', data, 0)
+        offset = 4
+        for _ in range(count):
+            high, kind, length = struct.unpack_from('<HBI', data, offset)
+            offset += struct.calcsize('<HBI')
+            payload = data[offset:offset + length]
+            offset += length
+            if kind == 0:
+                container = array('H')
+                container.frombytes(payload)
+            else:
+                container = int.from_bytes(payload, 'little')
+            bitmap.containers[high] = container
+        return bitmap
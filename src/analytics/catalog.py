@@ -0,0 +1,352 @@
+"""
+Columnar, bitmap-indexed view of the exported vendor catalogue.
+
+The normalised CSV exports (vendors.csv plus one table per tag type) are loaded
+once into columns: vendor attributes are stored column by column, and every tag
+facet (technology, industry, certification, feature) is dictionary-encoded so
+each distinct value becomes a category code with a bitmap of the vendor rows
+carrying it. Bitmaps are Python integers (bit i = vendor row i), so combining
+facets is a handful of big-integer ANDs and counting is a popcount; questions
+like "Kubernetes vendors with an ISO certification in healthcare" answer in
+microseconds instead of a scan over every vendor and tag row.
+"""
+
+import csv
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from .bitmap import bit_positions, popcount
+
+DEFAULT_EXPORT_DIR = 'database_exports'
+
+# Facet name -> (export file, value column)
+FACET_TABLES = {
+    'technology': ('technology_stack.csv', 'technology'),
+    'industry': ('industries.csv', 'industry'),
+    'certification': ('certifications.csv', 'certification'),
+    'feature': ('general_features.csv', 'feature'),
+}
+
+# Facet name -> key in enhanced_vendors_database.json
+FACET_JSON_KEYS = {
+    'technology': 'technology_stack',
+    'industry': 'industry_focus',
+    'certification': 'certifications',
+    'feature': 'features',
+}
+
+# Vendor attributes kept as columns and returned with matches
+VENDOR_COLUMNS = ('company_name', 'website', 'domain', 'description', 'total_pages_scraped')
+
+
+# Facet counts for result sets up to this size walk the matching rows' tags
+SPARSE_COUNT_LIMIT = 2000
+
+
+def _key(value: str) -> str:
+    return ' '.join(value.split()).casefold()
+
+
+class Facet:
+    """Dictionary-encoded tag column: category code -> bitmap of vendor rows."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+        self.bitmaps: List[int] = []
+        self.row_codes: List[List[int]] = []
+        self._term_cache: Dict[str, int] = {}
+
+    def add(self, row: int, value: str):
+        value = ' '.join((value or '').split())
+        if not value:
+            return
+        key = _key(value)
+        code = self.codes.get(key)
+        if code is None:
+            code = self.codes[key] = len(self.values)
+            self.values.append(value)
+            self.bitmaps.append(0)
+        bit = 1 << row
+        if not self.bitmaps[code] & bit:
+            self.bitmaps[code] |= bit
+            # Cached term bitmaps may include this value (exactly or as a substring match)
+            self._term_cache.clear()
+        while len(self.row_codes) <= row:
+            self.row_codes.append([])
+        if code not in self.row_codes[row]:
+            self.row_codes[row].append(code)
+
+    def match(self, term: str) -> int:
+        """
+        Bitmap of vendors with a value matching a term.
+
+        An exact (case-insensitive) value match wins; otherwise every value
+        containing the term matches, so "ISO" covers "ISO 27001" and "ISO 9001".
+        """
+        key = _key(term)
+        cached = self._term_cache.get(key)
+        if cached is not None:
+            return cached
+        code = self.codes.get(key)
+        if code is not None:
+            bitmap = self.bitmaps[code]
+        else:
+            bitmap = 0
+            for value_key, value_code in self.codes.items():
+                if key in value_key:
+                    bitmap |= self.bitmaps[value_code]
+        self._term_cache[key] = bitmap
+        return bitmap
+
+    def counts(self, within: int, top: Optional[int] = None,
+               rows: Optional[List[int]] = None) -> List[Tuple[str, int]]:
+        """
+        Vendor count per value among the vendors in `within`, largest first.
+
+        Args:
+            within: Bitmap of the vendors to count
+            top: Keep only the most frequent values
+            rows: bit_positions(within), if the caller already has it
+        """
+        matched = len(rows) if rows is not None else popcount(within)
+        if matched <= SPARSE_COUNT_LIMIT:
+            # Few matches: tally their tags instead of intersecting every value's bitmap
+            tally: Dict[int, int] = {}
+            for row in rows if rows is not None else bit_positions(within):
+                if row < len(self.row_codes):
+                    for code in self.row_codes[row]:
+                        tally[code] = tally.get(code, 0) + 1
+            counts = [(self.values[code], count) for code, count in tally.items()]
+        else:
+            counts = []
+            for code, bitmap in enumerate(self.bitmaps):
+                count = popcount(bitmap & within)
+                if count:
+                    counts.append((self.values[code], count))
+        counts.sort(key=lambda item: (-item[1], item[0]))
+        return counts[:top] if top else counts
+
+
+class VendorCatalog:
+    """Vendor attributes as columns plus one bitmap-indexed facet per tag type."""
+
+    def __init__(self, facets: Iterable[str] = FACET_TABLES):
+        self.vendor_ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.columns: Dict[str, list] = {column: [] for column in VENDOR_COLUMNS}
+        self.facets: Dict[str, Facet] = {name: Facet(name) for name in facets}
+
+    @property
+    def all_rows(self) -> int:
+        return (1 << len(self.vendor_ids)) - 1
+
+    def __len__(self) -> int:
+        return len(self.vendor_ids)
+
+    def add_vendor(self, vendor_id: str, attributes: Optional[Mapping] = None,
+                   tags: Optional[Mapping[str, Iterable[str]]] = None) -> int:
+        """
+        Add a vendor (or more tags for a known vendor).
+
+        Args:
+            vendor_id: Stable vendor identifier
+            attributes: Values for VENDOR_COLUMNS
+            tags: Facet name -> tag values
+
+        Returns:
+            Row number of the vendor
+        """
+        row = self.rows.get(vendor_id)
+        if row is None:
+            row = self.rows[vendor_id] = len(self.vendor_ids)
+            self.vendor_ids.append(vendor_id)
+            for column, values in self.columns.items():
+                values.append(None)
+        for column, value in (attributes or {}).items():
+            if column in self.columns:
+                self.columns[column][row] = value
+        for facet_name, values in (tags or {}).items():
+            facet = self.facets.get(facet_name)
+            if facet is not None:
+                for value in values:
+                    facet.add(row, value)
+        return row
+
+    @classmethod
+    def from_exports(cls, export_dir=DEFAULT_EXPORT_DIR) -> 'VendorCatalog':
+        """Load vendors.csv and the tag tables written by the database converters."""
+        export_dir = Path(export_dir)
+        catalog = cls()
+        with open(export_dir / 'vendors.csv', newline='', encoding='utf-8') as f:
+            for record in csv.DictReader(f):
+                catalog.add_vendor(record['vendor_id'], {column: record.get(column) for column in VENDOR_COLUMNS})
+
+        for facet_name, (file_name, value_column) in FACET_TABLES.items():
+            path = export_dir / file_name
+            if not path.exists():
+                continue
+            facet = catalog.facets[facet_name]
+            with open(path, newline='', encoding='utf-8') as f:
+                for record in csv.DictReader(f):
+                    row = catalog.rows.get(record['vendor_id'])
+                    if row is None:
+                        row = catalog.add_vendor(record['vendor_id'])
+                    facet.add(row, record[value_column])
+        return catalog
+
+    @classmethod
+    def from_json(cls, path) -> 'VendorCatalog':
+        """Load enhanced_vendors_database.json (used when the CSV tables are missing)."""
+        catalog = cls()
+        with open(path, 'r', encoding='utf-8') as f:
+            vendors = json.load(f)
+        for vendor in vendors:
+            catalog.add_vendor(
+                vendor['vendor_id'],
+                {column: vendor.get(column) for column in VENDOR_COLUMNS},
+                {facet: vendor.get(key) or [] for facet, key in FACET_JSON_KEYS.items()}
+            )
+        return catalog
+
+    def filter(self, filters: Optional[Mapping[str, Sequence[str]]] = None, match_any: bool = False) -> int:
+        """
+        Bitmap of the vendors matching every facet filter.
+
+        Args:
+            filters: Facet name -> terms; all terms must match unless match_any
+            match_any: Within a facet, match vendors with any of the terms
+
+        Raises:
+            KeyError: For an unknown facet name
+        """
+        result = self.all_rows
+        for facet_name, terms in (filters or {}).items():
+            facet = self.facets[facet_name]
+            if not terms:
+                continue
+            if match_any:
+                bitmap = 0
+                for term in terms:
+                    bitmap |= facet.match(term)
+                result &= bitmap
+            else:
+                for term in terms:
+                    result &= facet.match(term)
+            if not result:
+                break
+        return result
+
+    def count(self, filters: Optional[Mapping[str, Sequence[str]]] = None, match_any: bool = False) -> int:
+        return popcount(self.filter(filters, match_any))
+
+    def vendors(self, bitmap: int, limit: Optional[int] = None) -> List[Dict]:
+        """Vendor records for the rows in a bitmap (in load order)."""
+        records = []
+        for row in bit_positions(bitmap)[:limit]:
+            record = {'vendor_id': self.vendor_ids[row]}
+            for column, values in self.columns.items():
+                record[column] = values[row]
+            records.append(record)
+        return records
+
+    def facet_counts(self, bitmap: Optional[int] = None, facets: Optional[Iterable[str]] = None,
+                     top: Optional[int] = 10) -> Dict[str, List[Tuple[str, int]]]:
+        """Value counts per facet among the vendors in a bitmap (all vendors by default)."""
+        within = self.all_rows if bitmap is None else bitmap
+        names = list(facets) if facets else list(self.facets)
+        rows = bit_positions(within) if popcount(within) <= SPARSE_COUNT_LIMIT else None
+        return {name: self.facets[name].counts(within, top, rows) for name in names}
+
+    def query(self, filters: Optional[Mapping[str, Sequence[str]]] = None, match_any: bool = False,
+              limit: int = 50, top: int = 10) -> Dict:
+        """Filter, list matches and count facet values in one call; returns a JSON-serialisable dict."""
+        start = time.perf_counter()
+        bitmap = self.filter(filters, match_any)
+        facets = self.facet_counts(bitmap, top=top)
+        matched = popcount(bitmap)
+        vendors = self.vendors(bitmap, limit)
+        return {
+            'total_vendors': len(self),
+            'matched': matched,
+            'filters': {name: list(terms) for name, terms in (filters or {}).items() if terms},
+            'vendors': vendors,
+            'facets': {name: [{'value': value, 'count': count} for value, count in counts]
+                       for name, counts in facets.items()},
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 3),
+        }
+
+
+def parse_facet_query(query: Mapping[str, Sequence[str]],
+                      facets: Iterable[str] = FACET_TABLES) -> Tuple[Dict[str, List[str]], Dict]:
+    """
+    Parse parse_qs-style query parameters for a facet request.
+
+    Each facet name may repeat or hold comma-separated terms
+    (?technology=Kubernetes&certification=ISO,SOC). Also understands
+    ?match=any, ?limit= and ?top=.
+
+    Args:
+        query: Parsed query string
+        facets: Facet names to read filters for
+
+    Returns:
+        Tuple of (filters, options for VendorCatalog.query or TagIndex.query)
+    """
+    filters = {}
+    for name in facets:
+        terms = [term.strip() for value in query.get(name, []) for term in value.split(',') if term.strip()]
+        if terms:
+            filters[name] = terms
+
+    def int_param(name, default, upper):
+        try:
+            return max(0, min(int(query.get(name, [default])[0]), upper))
+        except (TypeError, ValueError):
+            return default
+
+    options = {
+        'match_any': query.get('match', ['all'])[0] == 'any',
+        'limit': int_param('limit', 50, 1000),
+        'top': int_param('top', 10, 100),
+    }
+    return filters, options
+
+
+_cache: Dict[str, Tuple[float, VendorCatalog]] = {}
+_cache_lock = threading.Lock()
+
+
+def load_catalog(export_dir=DEFAULT_EXPORT_DIR) -> VendorCatalog:
+    """
+    Load the catalogue for an export directory, cached until an export file changes.
+
+    Falls back to enhanced_vendors_database.json if vendors.csv is missing.
+
+    Raises:
+        FileNotFoundError: If the directory holds neither export
+    """
+    export_dir = Path(export_dir)
+    sources = [export_dir / 'vendors.csv'] + [export_dir / file_name for file_name, _ in FACET_TABLES.values()]
+    if not sources[0].exists():
+        sources = [export_dir / 'enhanced_vendors_database.json']
+        if not sources[0].exists():
+            raise FileNotFoundError(f"No vendor exports found in {export_dir}")
+    mtime = max(os.path.getmtime(path) for path in sources if path.exists())
+
+    key = str(export_dir.resolve())
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        if sources[0].suffix == '.json':
+            catalog = VendorCatalog.from_json(sources[0])
+        else:
+            catalog = VendorCatalog.from_exports(export_dir)
+        _cache[key] = (mtime, catalog)
+        return catalog
@@ -0,0 +1,481 @@
+"""
+Incrementally maintained tag index over extracted vendors.
+
+Every extractor that produces tags for a vendor (technology stack, industry
+focus, services, products, certifications) calls TagIndex.update_vendor(), which
+replaces just that vendor's tags. Each tag is interned once and maps to a
+RoaringBitmap of dense vendor ids, so faceted filtering is a few bitmap ANDs and
+co-occurrence ("which technologies do healthcare vendors use?") is one
+intersection count per tag, without rescanning vendor records.
+
+The index persists to a small SQLite file next to the vendor database, one row
+per tag bitmap. save() rewrites only the tags changed since the last save, so
+re-extracting one vendor costs a handful of row writes however large the
+catalogue is.
+
+Several processes may share one index file (the offline extractors all write
+vendor_database/tag_index.db). save() therefore runs in an IMMEDIATE
+transaction: new vendors get their ids from the file, where another process
+may already have taken the ids handed out in memory. Each changed tag is
+written as the stored bitmap plus the vendors added and minus the vendors
+removed here, so tags saved by other processes are kept.
+"""
+
+import logging
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+from .bitmap import RoaringBitmap
+from .catalog import SPARSE_COUNT_LIMIT
+
+logger = logging.getLogger(__name__)
+
+# Facet name -> key in extracted vendor records
+TAG_FACETS = {
+    'technology': 'technology_stack',
+    'industry': 'industry_focus',
+    'service': 'services',
+    'product': 'products',
+    'certification': 'certifications',
+}
+
+
+def _clean(value) -> str:
+    if isinstance(value, Mapping):
+        value = value.get('name')
+    return ' '.join(str(value or '').split())
+
+
+def _key(value: str) -> str:
+    return value.casefold()
+
+
+def tag_index_path(db_path) -> Path:
+    """Index file kept next to a vendor database (vendor_research.db -> vendor_research_tags.db)."""
+    db_path = Path(db_path)
+    return db_path.with_name(f"{db_path.stem}_tags.db")
+
+
+def tags_from_record(record: Mapping) -> Dict[str, List[str]]:
+    """
+    Pull the indexed facets out of an extracted vendor record.
+
+    Understands both plain string lists and lists of {'name': ...} dicts
+    (services and products).
+    """
+    return {facet: record.get(key) or [] for facet, key in TAG_FACETS.items() if key in record}
+
+
+class TagIndex:
+    """Facet -> interned tag -> RoaringBitmap of vendor ids, with SQLite persistence."""
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: SQLite file to load from and save to (None keeps the index in memory)
+        """
+        self.path = Path(path) if path else None
+        self.vendor_keys: List[str] = []
+        self.vendor_ids: Dict[str, int] = {}
+        self.values: Dict[str, Dict[str, str]] = {}
+        self.bitmaps: Dict[str, Dict[str, RoaringBitmap]] = {}
+        self._vendor_tags: Optional[Dict[int, Dict[str, Set[str]]]] = {}
+        self.indexed = RoaringBitmap()
+        # (facet, tag key) -> (vendor ids added, vendor ids removed) since the last save
+        self._dirty: Dict[Tuple[str, str], Tuple[Set[int], Set[int]]] = {}
+        self._saved_vendors = 0
+        self._lock = threading.RLock()
+        if self.path is not None and self.path.exists():
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self.indexed)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        conn.execute('CREATE TABLE IF NOT EXISTS tag_vendors (id INTEGER PRIMARY KEY, vendor_key TEXT NOT NULL UNIQUE)')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS tag_bitmaps (
+                facet TEXT NOT NULL,
+                tag_key TEXT NOT NULL,
+                tag TEXT NOT NULL,
+                bitmap BLOB NOT NULL,
+                PRIMARY KEY (facet, tag_key)
+            )
+        ''')
+        return conn
+
+    def _load(self):
+        start = time.perf_counter()
+        conn = self._connect()
+        try:
+            for vendor_id, vendor_key in conn.execute('SELECT id, vendor_key FROM tag_vendors ORDER BY id'):
+                # Ids are dense, so the position in vendor_keys is the id
+                while len(self.vendor_keys) < vendor_id:
+                    self.vendor_keys.append('')
+                self.vendor_keys.append(vendor_key)
+                self.vendor_ids[vendor_key] = vendor_id
+            for facet, tag_key, tag, blob in conn.execute('SELECT facet, tag_key, tag, bitmap FROM tag_bitmaps'):
+                bitmap = RoaringBitmap.from_bytes(blob)
+                tag_key = sys.intern(tag_key)
+                self.values.setdefault(facet, {})[tag_key] = sys.intern(tag)
+                self.bitmaps.setdefault(facet, {})[tag_key] = bitmap
+                self.indexed = self.indexed | bitmap
+        finally:
+            conn.close()
+        # The vendor -> tags map is rebuilt from the bitmaps on first use
+        self._vendor_tags = None
+        self._saved_vendors = len(self.vendor_keys)
+        logger.info(f"Loaded tag index for {len(self)} vendors from {self.path} "
+                    f"in {time.perf_counter() - start:.2f}s")
+
+    @property
+    def vendor_tags(self) -> Dict[int, Dict[str, Set[str]]]:
+        """Vendor id -> facet -> tag keys, used to diff updates and to count small result sets."""
+        with self._lock:
+            if self._vendor_tags is None:
+                vendor_tags = {}
+                for facet, facet_bitmaps in self.bitmaps.items():
+                    for tag_key, bitmap in facet_bitmaps.items():
+                        for vendor_id in bitmap:
+                            vendor_tags.setdefault(vendor_id, {}).setdefault(facet, set()).add(tag_key)
+                self._vendor_tags = vendor_tags
+            return self._vendor_tags
+
+    def vendor_id(self, vendor_key) -> int:
+        """Dense id of a vendor, assigned on first sight."""
+        vendor_key = str(vendor_key)
+        with self._lock:
+            vendor_id = self.vendor_ids.get(vendor_key)
+            if vendor_id is None:
+                vendor_id = self.vendor_ids[vendor_key] = len(self.vendor_keys)
+                self.vendor_keys.append(vendor_key)
+            return vendor_id
+
+    def update_vendor(self, vendor_key, tags: Mapping[str, Iterable]) -> int:
+        """
+        Replace a vendor's tags for the given facets.
+
+        Facets missing from `tags` keep their current values, so an extractor
+        that only finds services does not clear the vendor's technology tags.
+
+        Args:
+            vendor_key: Stable vendor identifier (database id or generated vendor_id)
+            tags: Facet name -> tag values (strings or {'name': ...} dicts)
+
+        Returns:
+            Dense id of the vendor
+        """
+        with self._lock:
+            vendor_id = self.vendor_id(vendor_key)
+            current = self.vendor_tags.setdefault(vendor_id, {})
+            for facet, values in tags.items():
+                facet_values = self.values.setdefault(facet, {})
+                facet_bitmaps = self.bitmaps.setdefault(facet, {})
+                new_keys = set()
+                for value in values or ():
+                    value = _clean(value)
+                    if not value:
+                        continue
+                    tag_key = sys.intern(_key(value))
+                    if tag_key not in facet_values:
+                        facet_values[tag_key] = sys.intern(value)
+                    new_keys.add(tag_key)
+
+                old_keys = current.get(facet, set())
+                for tag_key in old_keys - new_keys:
+                    bitmap = facet_bitmaps[tag_key]
+                    bitmap.discard(vendor_id)
+                    if not bitmap:
+                        del facet_bitmaps[tag_key]
+                        del facet_values[tag_key]
+                    self._changed(facet, tag_key, vendor_id, added=False)
+                for tag_key in new_keys - old_keys:
+                    facet_bitmaps.setdefault(tag_key, RoaringBitmap()).add(vendor_id)
+                    self._changed(facet, tag_key, vendor_id, added=True)
+                if new_keys:
+                    current[facet] = new_keys
+                else:
+                    current.pop(facet, None)
+
+            if current:
+                self.indexed.add(vendor_id)
+            else:
+                self.vendor_tags.pop(vendor_id, None)
+                self.indexed.discard(vendor_id)
+            return vendor_id
+
+    def _changed(self, facet: str, tag_key: str, vendor_id: int, added: bool):
+        """Remember a tag change for save()."""
+        added_ids, removed_ids = self._dirty.setdefault((facet, tag_key), (set(), set()))
+        if added:
+            added_ids.add(vendor_id)
+            removed_ids.discard(vendor_id)
+        else:
+            removed_ids.add(vendor_id)
+            added_ids.discard(vendor_id)
+
+    def remove_vendor(self, vendor_key):
+        """Drop every tag of a vendor (its id stays reserved)."""
+        with self._lock:
+            vendor_id = self.vendor_ids.get(str(vendor_key))
+            if vendor_id is not None:
+                facets = self.vendor_tags.get(vendor_id, {})
+                self.update_vendor(vendor_key, {facet: () for facet in list(facets)})
+
+    def match(self, facet: str, term: str) -> RoaringBitmap:
+        """
+        Vendors with a tag matching a term: an exact (case-insensitive) tag if
+        there is one, otherwise every tag containing the term.
+        """
+        facet_bitmaps = self.bitmaps.get(facet, {})
+        key = _key(_clean(term))
+        bitmap = facet_bitmaps.get(key)
+        if bitmap is not None:
+            return bitmap
+        result = RoaringBitmap()
+        for tag_key, tag_bitmap in facet_bitmaps.items():
+            if key in tag_key:
+                result = result | tag_bitmap
+        return result
+
+    def filter(self, filters: Optional[Mapping[str, Sequence[str]]] = None,
+               match_any: bool = False) -> RoaringBitmap:
+        """
+        Vendors matching every facet filter.
+
+        Args:
+            filters: Facet name -> terms; all terms must match unless match_any
+            match_any: Within a facet, match vendors with any of the terms
+
+        Returns:
+            Bitmap of matching vendor ids; it may be the index's own bitmap, so do not modify it
+        """
+        with self._lock:
+            result = None
+            for facet, terms in (filters or {}).items():
+                if not terms:
+                    continue
+                if match_any:
+                    bitmap = RoaringBitmap()
+                    for term in terms:
+                        bitmap = bitmap | self.match(facet, term)
+                    bitmaps = [bitmap]
+                else:
+                    bitmaps = [self.match(facet, term) for term in terms]
+                for bitmap in bitmaps:
+                    result = bitmap if result is None else result & bitmap
+                if not result:
+                    break
+            # Unfiltered queries cover every vendor with at least one tag
+            return self.indexed if result is None else result
+
+    def counts(self, facet: str, within: Optional[RoaringBitmap] = None,
+               top: Optional[int] = 10) -> List[Tuple[str, int]]:
+        """
+        Vendor count per tag of a facet, largest first.
+
+        Args:
+            facet: Facet to count
+            within: Only count these vendors (all indexed vendors by default)
+            top: Keep only the most frequent tags
+        """
+        with self._lock:
+            facet_values = self.values.get(facet, {})
+            facet_bitmaps = self.bitmaps.get(facet, {})
+            if within is None:
+                tally = {tag_key: len(bitmap) for tag_key, bitmap in facet_bitmaps.items()}
+            elif len(within) <= max(SPARSE_COUNT_LIMIT, len(facet_bitmaps)):
+                # Fewer vendors than tags: walk their tags instead of intersecting every tag's bitmap
+                tally = {}
+                vendor_tags = self.vendor_tags
+                for vendor_id in within:
+                    for tag_key in vendor_tags.get(vendor_id, {}).get(facet, ()):
+                        tally[tag_key] = tally.get(tag_key, 0) + 1
+            else:
+                tag_keys = list(facet_bitmaps)
+                sizes = within.intersection_sizes(facet_bitmaps[tag_key] for tag_key in tag_keys)
+                tally = dict(zip(tag_keys, sizes))
+            counts = [(facet_values[tag_key], count) for tag_key, count in tally.items() if count]
+        counts.sort(key=lambda item: (-item[1], item[0]))
+        return counts[:top] if top else counts
+
+    def cooccurrence(self, facet: str, term: str, other_facet: Optional[str] = None,
+                     top: Optional[int] = 10) -> List[Tuple[str, int]]:
+        """
+        Tags most often found together with a tag.
+
+        Args:
+            facet: Facet of the anchor tag
+            term: Anchor tag (matched as in match())
+            other_facet: Facet to count (defaults to the anchor's own facet)
+            top: Keep only the most frequent tags
+
+        Returns:
+            (tag, number of vendors carrying both) pairs, largest first
+        """
+        other_facet = other_facet or facet
+        counts = self.counts(other_facet, self.match(facet, term), top=None)
+        if other_facet == facet:
+            anchor = _key(_clean(term))
+            counts = [(tag, count) for tag, count in counts if _key(tag) != anchor]
+        return counts[:top] if top else counts
+
+    def vendors(self, bitmap: RoaringBitmap, limit: Optional[int] = None) -> List[str]:
+        """Vendor keys for the ids in a bitmap, in id order."""
+        keys = []
+        for vendor_id in bitmap:
+            if limit is not None and len(keys) >= limit:
+                break
+            keys.append(self.vendor_keys[vendor_id])
+        return keys
+
+    def query(self, filters: Optional[Mapping[str, Sequence[str]]] = None, match_any: bool = False,
+              limit: int = 50, top: int = 10) -> Dict:
+        """Filter, list matches and count tags per facet; same shape as VendorCatalog.query()."""
+        start = time.perf_counter()
+        bitmap = self.filter(filters, match_any)
+        facets = {facet: self.counts(facet, bitmap, top) for facet in self.bitmaps}
+        return {
+            'total_vendors': len(self),
+            'matched': len(bitmap),
+            'filters': {name: list(terms) for name, terms in (filters or {}).items() if terms},
+            'vendors': [{'vendor_id': key} for key in self.vendors(bitmap, limit)],
+            'facets': {name: [{'value': value, 'count': count} for value, count in counts]
+                       for name, counts in facets.items()},
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 3),
+        }
+
+    def save(self) -> int:
+        """
+        Write new vendors and changed tags to the index file, merging them with
+        what other processes saved to it since this index was loaded.
+
+        Returns:
+            Number of tag rows written or deleted
+        """
+        if self.path is None:
+            return 0
+        with self._lock:
+            if not self._dirty and self._saved_vendors == len(self.vendor_keys):
+                return 0
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = self._connect()
+            try:
+                with conn:
+                    # Holds the file's write lock from the first read to the commit
+                    conn.execute('BEGIN IMMEDIATE')
+                    self._store_vendors(conn)
+                    written = self._store_tags(conn)
+            finally:
+                conn.close()
+            self._saved_vendors = len(self.vendor_keys)
+            self._dirty.clear()
+            return written
+
+    def _store_vendors(self, conn: sqlite3.Connection):
+        """Give unsaved vendors their ids in the file, moving them in memory where another process took the id."""
+        saved = self._saved_vendors
+        stored = dict(conn.execute('SELECT vendor_key, id FROM tag_vendors WHERE id >= ?', (saved,)))
+        keys_by_id = {vendor_id: vendor_key for vendor_key, vendor_id in stored.items()}
+        next_id = max(keys_by_id, default=saved - 1) + 1
+        moved, inserted = {}, []
+        for vendor_id in range(saved, len(self.vendor_keys)):
+            vendor_key = self.vendor_keys[vendor_id]
+            if not vendor_key:
+                continue
+            stored_id = stored.get(vendor_key)
+            if stored_id is None:
+                stored_id, next_id = next_id, next_id + 1
+                keys_by_id[stored_id] = vendor_key
+                inserted.append((stored_id, vendor_key))
+            if stored_id != vendor_id:
+                moved[vendor_id] = stored_id
+        conn.executemany('INSERT INTO tag_vendors (id, vendor_key) VALUES (?, ?)', inserted)
+
+        self.vendor_keys[saved:] = [keys_by_id.get(vendor_id, '') for vendor_id in range(saved, next_id)]
+        for vendor_id, vendor_key in keys_by_id.items():
+            self.vendor_ids[vendor_key] = vendor_id
+        if moved:
+            self._move_vendors(moved)
+
+    def _move_vendors(self, moved: Dict[int, int]):
+        """Renumber vendors (old id -> new id) in the bitmaps and pending changes."""
+        vendor_tags = self.vendor_tags
+        tags = {old_id: vendor_tags.pop(old_id, {}) for old_id in moved}
+        # Every old id leaves its bitmaps before any new id joins, as new ids may be other vendors' old ones
+        for old_id, facets in tags.items():
+            for facet, tag_keys in facets.items():
+                for tag_key in tag_keys:
+                    self.bitmaps[facet][tag_key].discard(old_id)
+            self.indexed.discard(old_id)
+        for old_id, facets in tags.items():
+            new_id = moved[old_id]
+            for facet, tag_keys in facets.items():
+                for tag_key in tag_keys:
+                    self.bitmaps[facet][tag_key].add(new_id)
+            if facets:
+                vendor_tags[new_id] = facets
+                self.indexed.add(new_id)
+        for added_ids, removed_ids in self._dirty.values():
+            for ids in (added_ids, removed_ids):
+                renumbered = {moved.get(vendor_id, vendor_id) for vendor_id in ids}
+                ids.clear()
+                ids.update(renumbered)
+
+    def _store_tags(self, conn: sqlite3.Connection) -> int:
+        """Apply the changed tags to their stored bitmaps and write them; the merged bitmaps replace ours."""
+        rows, deleted = [], []
+        merged_other_changes = False
+        for (facet, tag_key), (added_ids, removed_ids) in self._dirty.items():
+            stored = conn.execute('SELECT tag, bitmap FROM tag_bitmaps WHERE facet = ? AND tag_key = ?',
+                                  (facet, tag_key)).fetchone()
+            bitmap = RoaringBitmap.from_bytes(stored[1]) if stored else RoaringBitmap()
+            for vendor_id in removed_ids:
+                bitmap.discard(vendor_id)
+            for vendor_id in added_ids:
+                bitmap.add(vendor_id)
+
+            facet_values = self.values.setdefault(facet, {})
+            facet_bitmaps = self.bitmaps.setdefault(facet, {})
+            if bitmap != facet_bitmaps.get(tag_key, RoaringBitmap()):
+                merged_other_changes = True
+            if bitmap:
+                tag = facet_values.get(tag_key) or sys.intern(stored[0])
+                facet_values[tag_key] = tag
+                facet_bitmaps[tag_key] = bitmap
+                self.indexed = self.indexed | bitmap
+                rows.append((facet, tag_key, tag, bitmap.to_bytes()))
+            else:
+                facet_values.pop(tag_key, None)
+                facet_bitmaps.pop(tag_key, None)
+                deleted.append((facet, tag_key))
+        conn.executemany('INSERT OR REPLACE INTO tag_bitmaps (facet, tag_key, tag, bitmap) '
+                         'VALUES (?, ?, ?, ?)', rows)
+        conn.executemany('DELETE FROM tag_bitmaps WHERE facet = ? AND tag_key = ?', deleted)
+        if merged_other_changes:
+            # Rebuilt from the merged bitmaps on next use
+            self._vendor_tags = None
+        return len(rows) + len(deleted)
+
+
+_indexes: Dict[str, TagIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def open_tag_index(path) -> TagIndex:
+    """
+    Process-wide TagIndex for an index file, so concurrent extraction threads
+    update one in-memory index instead of loading their own copies.
+    """
+    key = str(Path(path).resolve())
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = TagIndex(path)
+        return index
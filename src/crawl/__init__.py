@@ -0,0 +1,3 @@
+"""
+Crawl control modules shared by the scrapers and web app servers.
+"""
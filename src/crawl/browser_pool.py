@@ -0,0 +1,334 @@
+"""
+Pooled headless-browser rendering for JavaScript-rendered vendor pages.
+
+Launching Chromium costs seconds and hundreds of megabytes, so BrowserPool
+starts one browser on first use and keeps a few contexts with reusable pages.
+Playwright objects must stay on the thread that created them, so the browser
+runs on its own event loop thread and render() may be called from any scrape
+thread; at most `contexts * pages_per_context` pages render at once. Images,
+fonts, media and known trackers are aborted at the network layer.
+
+Rendering is a fallback: callers fetch statically first and use should_render()
+to escalate only the pages whose static HTML yields too little text.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Iterable, Optional
+from urllib.parse import urlparse
+
+from ..utils.metrics import FETCH_BYTES, FETCH_ERRORS, FETCH_SECONDS, host_of
+from .fetch_policy import ERROR, TIMEOUT, classify_exception, classify_response
+from .fetcher import FetchResult
+from .rate_limiter import HostRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Static pages with less extracted text than this are rendered in the browser
+MIN_STATIC_TEXT = int(os.getenv('MIN_STATIC_TEXT', '200'))
+
+BLOCKED_RESOURCE_TYPES = frozenset({'image', 'font', 'media'})
+
+# Analytics, ad and chat-widget hosts; requests to these (or their subdomains) are aborted
+TRACKER_DOMAINS = (
+    'google-analytics.com',
+    'googletagmanager.com',
+    'googleadservices.com',
+    'googlesyndication.com',
+    'doubleclick.net',
+    'facebook.net',
+    'connect.facebook.com',
+    'hotjar.com',
+    'segment.com',
+    'segment.io',
+    'mixpanel.com',
+    'hs-analytics.net',
+    'hs-scripts.com',
+    'hsadspixel.net',
+    'licdn.com',
+    'ads.linkedin.com',
+    'bat.bing.com',
+    'clarity.ms',
+    'fullstory.com',
+    'intercom.io',
+    'intercomcdn.com',
+    'drift.com',
+    'driftt.com',
+    'optimizely.com',
+    'quantserve.com',
+    'scorecardresearch.com',
+    'adroll.com',
+    'taboola.com',
+    'outbrain.com',
+    'newrelic.com',
+    'nr-data.net',
+    'cookielaw.org',
+    'onetrust.com',
+)
+
+LAUNCH_ARGS = ['--disable-blink-features=AutomationControlled', '--disable-dev-shm-usage',
+               '--no-sandbox', '--disable-setuid-sandbox']
+
+CONTEXT_OPTIONS = {
+    'user_agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'viewport': {'width': 1920, 'height': 1080},
+    'locale': 'en-US',
+    'timezone_id': 'America/New_York',
+    'extra_http_headers': {
+        'Accept-Language': 'en-US,en;q=0.9',
+        'DNT': '1',
+        'Upgrade-Insecure-Requests': '1',
+    },
+}
+
+
+def should_render(static_text: Optional[str], min_chars: int = MIN_STATIC_TEXT) -> bool:
+    """Check whether a statically fetched page yielded too little text to be useful."""
+    return len((static_text or '').strip()) < min_chars
+
+
+def is_tracker(url: str, trackers: Iterable[str] = TRACKER_DOMAINS) -> bool:
+    """Check whether a request goes to a known tracking host."""
+    host = (urlparse(url).hostname or '').lower()
+    return any(host == domain or host.endswith('.' + domain) for domain in trackers)
+
+
+class BrowserPool:
+    """A lazily started browser with a fixed set of reusable pages."""
+
+    def __init__(self, contexts: int = 2, pages_per_context: int = 2, timeout: float = 30.0,
+                 settle_timeout: float = 3.0, block_resource_types: Iterable[str] = BLOCKED_RESOURCE_TYPES,
+                 trackers: Iterable[str] = TRACKER_DOMAINS):
+        """
+        Args:
+            contexts: Browser contexts (isolated cookie/cache jars) to keep open
+            pages_per_context: Reusable pages per context
+            timeout: Navigation timeout in seconds
+            settle_timeout: Extra seconds to wait for the network to go idle after load
+            block_resource_types: Playwright resource types to abort
+            trackers: Tracker domains to abort requests to
+        """
+        self.contexts = max(1, contexts)
+        self.pages_per_context = max(1, pages_per_context)
+        self.timeout = timeout
+        self.settle_timeout = settle_timeout
+        self.block_resource_types = frozenset(block_resource_types)
+        self.trackers = tuple(trackers)
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._playwright = None
+        self._browser = None
+        self._idle: Optional[asyncio.Queue] = None
+        self._pages = 0  # Pages in the pool, idle or rendering; None in _idle means none are left
+
+    @property
+    def max_pages(self) -> int:
+        return self.contexts * self.pages_per_context
+
+    @property
+    def started(self) -> bool:
+        return self._browser is not None
+
+    def start(self) -> 'BrowserPool':
+        """Launch the browser and open the pages (no-op if already running)."""
+        with self._lock:
+            if self._browser is not None:
+                return self
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name='browser-pool', daemon=True)
+            self._thread.start()
+            try:
+                self._call(self._launch())
+            except Exception:
+                self._stop_loop()
+                raise
+            logger.info(f"Browser pool started with {self.max_pages} pages")
+            return self
+
+    def render(self, url: str, rate_limiter: Optional[HostRateLimiter] = None,
+               min_interval: Optional[float] = None) -> FetchResult:
+        """
+        Load a URL in a pooled page and return the rendered HTML.
+
+        Blocks while all pages are busy.
+
+        Args:
+            url: URL to render
+            rate_limiter: Limiter to wait on before loading and to report the response to
+            min_interval: Per-call minimum spacing passed to the limiter
+
+        Returns:
+            FetchResult with the rendered DOM as text
+        """
+        if self.started and self._pages == 0:
+            logger.warning("Browser pool lost all its pages; relaunching the browser")
+            self.close()
+        self.start()
+        if rate_limiter is not None:
+            rate_limiter.acquire(url, min_interval)
+
+        host = host_of(url)
+        start = time.perf_counter()
+        try:
+            result = self._call(self._render(url), timeout=self.timeout + self.settle_timeout + 30)
+        except Exception as e:
+            result = FetchResult(url=url, error=f"{type(e).__name__}: {e}", failure=classify_exception(e))
+        result.elapsed = time.perf_counter() - start
+        FETCH_SECONDS.observe(result.elapsed, host=host, fetcher='browser')
+
+        if result.failure:
+            FETCH_ERRORS.inc(host=host, fetcher='browser')
+        elif result.text:
+            FETCH_BYTES.inc(len(result.text), host=host)
+        if rate_limiter is not None:
+            rate_limiter.record(url, result.status, result.elapsed, result.headers.get('retry-after'))
+        return result
+
+    def close(self):
+        """Close the pages, contexts and browser."""
+        with self._lock:
+            if self._loop is None:
+                return
+            try:
+                self._call(self._shutdown(), timeout=30)
+            except Exception as e:
+                logger.warning(f"Error closing browser pool: {e}")
+            self._stop_loop()
+
+    def _call(self, coro, timeout: Optional[float] = None):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def _stop_loop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = self._thread = None
+        self._browser = self._playwright = self._idle = None
+        self._pages = 0
+
+    async def _launch(self):
+        # Imported here so the static scrapers work without playwright installed
+        from playwright.async_api import async_playwright
+
+        self._playwright = await async_playwright().start()
+        try:
+            browser = await self._playwright.chromium.launch(headless=True, args=LAUNCH_ARGS)
+            idle = asyncio.Queue()
+            for _ in range(self.contexts):
+                context = await self._new_context(browser)
+                for _ in range(self.pages_per_context):
+                    idle.put_nowait(await context.new_page())
+        except Exception:
+            await self._playwright.stop()
+            self._playwright = None
+            raise
+        self._browser, self._idle, self._pages = browser, idle, idle.qsize()
+
+    async def _new_context(self, browser):
+        context = await browser.new_context(**CONTEXT_OPTIONS)
+        await context.route('**/*', self._route)
+        return context
+
+    async def _route(self, route):
+        request = route.request
+        if request.resource_type in self.block_resource_types or is_tracker(request.url, self.trackers):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _render(self, url: str) -> FetchResult:
+        from playwright.async_api import TimeoutError as PlaywrightTimeout
+
+        # Waiting for an idle page is what caps concurrent rendering
+        page = await self._idle.get()
+        if page is None:
+            # Every page was lost; wake the next waiter too and fail fast (render() relaunches)
+            self._idle.put_nowait(None)
+            return FetchResult(url=url, error='browser pool has no pages left', failure=ERROR)
+        result = FetchResult(url=url)
+        try:
+            response = await page.goto(url, wait_until='domcontentloaded', timeout=self.timeout * 1000)
+            try:
+                await page.wait_for_load_state('networkidle', timeout=self.settle_timeout * 1000)
+            except PlaywrightTimeout:
+                pass  # Pages with polling or long-lived connections never go idle
+            if response is not None:
+                result.status = response.status
+                result.headers = await response.all_headers()
+            result.text = await page.content()
+            result.failure = classify_response(result.status, result.text)
+        except PlaywrightTimeout as e:
+            result.error, result.failure = str(e), TIMEOUT
+        except Exception as e:
+            result.error, result.failure = f"{type(e).__name__}: {e}", classify_exception(e)
+        finally:
+            page = await self._recycle(page)
+            if page is not None:
+                self._idle.put_nowait(page)
+        if result.failure and result.error is None:
+            result.error = f"{result.failure} (HTTP {result.status})"
+        return result
+
+    async def _recycle(self, page):
+        """Reset a page for the next URL, replacing it if it crashed or was closed."""
+        try:
+            if not page.is_closed():
+                await page.goto('about:blank')
+                return page
+        except Exception as e:
+            logger.debug(f"Replacing browser page after error: {e}")
+        context = page.context
+        try:
+            await page.close()
+        except Exception:
+            pass
+        try:
+            return await context.new_page()
+        except Exception as e:
+            logger.warning(f"Replacing browser context after it failed to open a page: {e}")
+        try:
+            return await (await self._new_context(self._browser)).new_page()
+        except Exception as e:
+            logger.warning(f"Browser pool lost a page: {e}")
+        self._pages -= 1
+        if self._pages == 0:
+            self._idle.put_nowait(None)
+        return None
+
+    async def _shutdown(self):
+        if self._browser is not None:
+            await self._browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+
+
+_shared_pool: Optional[BrowserPool] = None
+_shared_lock = threading.Lock()
+
+
+def shared_browser_pool() -> BrowserPool:
+    """
+    Process-wide browser pool, so scrape threads share one browser. The browser
+    only starts when the first page is rendered. BROWSER_CONTEXTS and
+    BROWSER_PAGES_PER_CONTEXT size the pool.
+    """
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            _shared_pool = BrowserPool(
+                contexts=int(os.getenv('BROWSER_CONTEXTS', '2')),
+                pages_per_context=int(os.getenv('BROWSER_PAGES_PER_CONTEXT', '2')),
+            )
+        return _shared_pool
+
+
+def close_shared_browser_pool():
+    """Shut down the shared pool's browser if it was started."""
+    with _shared_lock:
+        pool = _shared_pool
+    if pool is not None:
+        pool.close()
@@ -0,0 +1,252 @@
+"""
+Canonical and hreflang-aware URL collapsing for vendor crawls.
+
+Multinational vendor sites publish every page once per locale (/de/products,
+de.example.com/products, /products?lang=de, ...). Link discovery used to queue
+every variant it found, so the same page was fetched and extracted once per
+language, and non-English mirrors were only caught when their path contained
+one of a fixed list of '/xx/' segments.
+
+Pages announce their variants in the <head>:
+
+    <link rel="canonical" href="https://example.com/products/">
+    <link rel="alternate" hreflang="de" href="https://example.com/de/products/">
+
+A CanonicalIndex reads these annotations from each page it is shown and maps
+every URL to the canonical English variant of its page. Alternates are never
+queued themselves. The index also learns where the site keeps its locales
+(a leading path segment, a subdomain or a query parameter) from the alternate
+URLs, so links into other locales are dropped before any of them are fetched.
+URLs that carry a language marker without annotations (/fr/, fr.example.com,
+?lang=fr) are recognised too.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urljoin, urlsplit
+
+from .dedup import normalize_url
+from .url_rules import NON_ENGLISH_CODES
+
+# Language crawls are collapsed to
+ENGLISH = 'en'
+
+# hreflang value of the fallback variant; it is neither kept nor dropped for its language
+X_DEFAULT = 'x-default'
+
+# Query parameters sites use to select the page language
+LANGUAGE_PARAMS = ('lang', 'language', 'locale', 'hl', 'lng')
+
+# Language codes recognised in URLs without annotations
+KNOWN_LANGUAGES = frozenset(NON_ENGLISH_CODES) | {ENGLISH}
+
+# 'de', 'de-at', 'de_AT' (lowercased)
+_LANGUAGE_TAG = re.compile(r'^([a-z]{2})(?:[-_][a-z0-9]{2,4})?$')
+
+
+@dataclass
+class PageAnnotations:
+    """Canonical URL and hreflang alternates declared by one page."""
+    url: str
+    canonical: Optional[str] = None
+    alternates: Dict[str, str] = field(default_factory=dict)  # lowercased hreflang -> absolute URL
+
+    def alternate_for(self, language: str = ENGLISH) -> Optional[str]:
+        """URL of the page's variant in a language: the bare code, else any regional variant, else x-default."""
+        if language in self.alternates:
+            return self.alternates[language]
+        for hreflang in sorted(self.alternates):
+            if _primary(hreflang) == language:
+                return self.alternates[hreflang]
+        return self.alternates.get(X_DEFAULT)
+
+
+def read_annotations(soup: Any, page_url: str) -> PageAnnotations:
+    """
+    Read the canonical link and hreflang alternates of a parsed page.
+
+    Args:
+        soup: BeautifulSoup of the page
+        page_url: URL the page was fetched from; relative hrefs are resolved against it
+
+    Returns:
+        PageAnnotations (empty if the page declares neither)
+    """
+    annotations = PageAnnotations(page_url)
+    for link in soup.find_all('link', href=True):
+        rel = link.get('rel') or ()
+        rel = {value.lower() for value in (rel.split() if isinstance(rel, str) else rel)}
+        href = urljoin(page_url, link['href'].strip())
+        if 'canonical' in rel and annotations.canonical is None:
+            annotations.canonical = href
+        elif 'alternate' in rel and link.get('hreflang'):
+            annotations.alternates.setdefault(link['hreflang'].strip().lower().replace('_', '-'), href)
+    return annotations
+
+
+def collapse_links(soup: Any, base_url: str, urls: Iterable[str],
+                   index: Optional['CanonicalIndex'] = None) -> List[str]:
+    """
+    Collapse the links discovered on a site's home page before they are queued.
+
+    Args:
+        soup: BeautifulSoup of the home page, whose hreflang links show where
+            the site keeps its other languages
+        base_url: URL of the home page; it stays first in the result
+        urls: Discovered links
+        index: Index to record the annotations in (a new one if None)
+
+    Returns:
+        The home page followed by the canonical variants of the links
+    """
+    index = index if index is not None else CanonicalIndex()
+    index.observe(read_annotations(soup, base_url))
+    home = normalize_url(base_url)
+    return [base_url] + [url for url in index.collapse(urls) if normalize_url(url) != home]
+
+
+def url_language(url: str) -> Optional[str]:
+    """
+    Language a URL selects, from a language query parameter, a language
+    subdomain or a leading language path segment; None if it names none.
+    """
+    parts = urlsplit(url)
+    for key, value in parse_qsl(parts.query, keep_blank_values=True):
+        if key.lower() in LANGUAGE_PARAMS:
+            match = _LANGUAGE_TAG.match(value.lower())
+            if match:
+                return match.group(1)
+    labels = parts.netloc.lower().split('.')
+    segments = parts.path.lower().strip('/').split('/')
+    for candidate in ((labels[0] if len(labels) > 2 else ''), segments[0]):
+        match = _LANGUAGE_TAG.match(candidate)
+        if match and match.group(1) in KNOWN_LANGUAGES:
+            return match.group(1)
+    return None
+
+
+class CanonicalIndex:
+    """
+    Canonical variant of each page of one site, learned from page annotations.
+
+    Not thread-safe for concurrent observe() calls; resolve() may run alongside
+    a single writer.
+    """
+
+    def __init__(self, language: str = ENGLISH):
+        """
+        Args:
+            language: Language whose variants are crawled; other locales are dropped
+        """
+        self.language = language
+        self._targets: Dict[str, str] = {}          # normalized URL -> URL to crawl instead
+        self._alternates: Set[str] = set()          # normalized URLs of variants never to fetch
+        self._markers: Set[Tuple[str, str]] = set()  # locale markers: ('host', ...), ('path', ...), ('param', ...)
+
+    def observe(self, annotations: PageAnnotations) -> str:
+        """
+        Record a page's annotations.
+
+        Returns:
+            The URL the page should be crawled and stored under (its canonical
+            variant in the index's language, or its own URL)
+        """
+        page_key = normalize_url(annotations.url)
+        target = annotations.url
+        if annotations.canonical and _same_site(annotations.canonical, annotations.url):
+            target = annotations.canonical
+        preferred = annotations.alternate_for(self.language)
+        if preferred and not _same_site(preferred, annotations.url):
+            preferred = None
+
+        # A page that is itself one of the other-language alternates stands for the preferred variant
+        target_key = normalize_url(target)
+        if preferred and any(normalize_url(url) == target_key for hreflang, url in annotations.alternates.items()
+                             if _primary(hreflang) != self.language and hreflang != X_DEFAULT):
+            target = preferred
+            target_key = normalize_url(target)
+
+        target_markers = _url_markers(target)
+        for hreflang, url in annotations.alternates.items():
+            key = normalize_url(url)
+            if key == target_key or hreflang == X_DEFAULT or not _same_site(url, annotations.url):
+                continue
+            self._alternates.add(key)
+            self._markers.update(_locale_markers(url, hreflang) - target_markers)
+
+        if page_key != target_key:
+            self._targets[page_key] = target
+        return target
+
+    def resolve(self, url: str) -> Optional[str]:
+        """URL to crawl in place of url, or None if url is another-language or duplicate variant."""
+        key = normalize_url(url)
+        if key in self._alternates:
+            return None
+        target = self._targets.get(key)
+        if target is None:
+            target = url
+        elif normalize_url(target) in self._alternates:
+            return None
+        if self._markers and not self._markers.isdisjoint(_url_markers(target)):
+            return None
+        language = url_language(target)
+        if language and language != self.language:
+            return None
+        return target
+
+    def collapse(self, urls: Iterable[str]) -> List[str]:
+        """Resolve URLs, dropping other-language variants and collapsing duplicates (first occurrence order)."""
+        kept: Dict[str, str] = {}
+        for url in urls:
+            target = self.resolve(url)
+            if target is not None:
+                kept.setdefault(normalize_url(target), target)
+        return list(kept.values())
+
+
+def _primary(hreflang: str) -> str:
+    return hreflang.split('-', 1)[0]
+
+
+def _site_host(url: str) -> str:
+    host = urlsplit(url).netloc.lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def _same_site(url: str, other: str) -> bool:
+    """Same site or a subdomain of it; annotations pointing elsewhere are not trusted."""
+    host, other_host = _site_host(url), _site_host(other)
+    return host == other_host or host.endswith('.' + other_host) or other_host.endswith('.' + host)
+
+
+def _url_markers(url: str) -> Set[Tuple[str, str]]:
+    """Every place a URL could carry a locale: host, first path segment and query parameters."""
+    parts = urlsplit(url)
+    markers = {('host', parts.netloc.lower()), ('path', parts.path.lower().strip('/').split('/')[0])}
+    markers.update(('param', f"{key.lower()}={value.lower()}")
+                   for key, value in parse_qsl(parts.query, keep_blank_values=True))
+    return markers
+
+
+def _locale_markers(url: str, hreflang: str) -> Set[Tuple[str, str]]:
+    """The parts of an alternate's URL that name its language (hreflang 'de' -> ('path', 'de') for /de/...)."""
+    primary = _primary(hreflang)
+
+    def names_language(value):
+        match = _LANGUAGE_TAG.match(value.replace('_', '-'))
+        return bool(match) and (match.group(1) == primary or value.replace('_', '-') == hreflang)
+
+    markers = set()
+    for kind, value in _url_markers(url):
+        if kind == 'host':
+            label = value.split('.', 1)[0]
+            if value.count('.') >= 2 and names_language(label):
+                markers.add((kind, value))
+        elif kind == 'param':
+            if names_language(value.split('=', 1)[1]):
+                markers.add((kind, value))
+        elif names_language(value):
+            markers.add((kind, value))
+    return markers
@@ -0,0 +1,221 @@
+"""
+Resumable crawl checkpoints in SQLite.
+
+A CrawlState holds one crawl job: its frontier (URLs still queued, in crawl
+order), the seen set, each URL's status and content hash, and the payload of
+every finished page. Every change is committed as the crawl runs (or once per
+batch inside batch()), so a job that dies mid-crawl is resumed from its queued
+URLs instead of the home page.
+A job's rows are deleted once it finishes, so the next crawl of the same site
+starts fresh.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .dedup import normalize_url
+
+QUEUED = 'queued'
+DONE = 'done'
+FAILED = 'failed'
+DUPLICATE = 'duplicate'
+ALTERNATE = 'alternate'  # another-language or non-canonical variant of a page; never fetched again
+
+DEFAULT_STATE_PATH = os.getenv('CRAWL_STATE_DB', 'crawl_state.db')
+
+
+def content_hash(content: Optional[str]) -> Optional[str]:
+    """SHA-1 of a page's content, used to spot changed pages between crawls."""
+    if content is None:
+        return None
+    return hashlib.sha1(content.encode('utf-8', errors='replace')).hexdigest()
+
+
+class CrawlState:
+    """Checkpoint of a single crawl job."""
+
+    def __init__(self, job_id: str, db_path: str = DEFAULT_STATE_PATH):
+        """
+        Args:
+            job_id: Identifies the crawl (e.g. scraper name plus normalised base URL)
+            db_path: SQLite database file (':memory:' keeps the state in memory only)
+        """
+        self.job_id = job_id
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self._batched = False
+        if db_path != ':memory:':
+            # Scrape threads checkpoint concurrently; WAL keeps readers and the writer apart
+            self.conn.execute('PRAGMA journal_mode=WAL')
+        self._init_db()
+
+    def _init_db(self):
+        with self.conn:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS crawl_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    meta TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            ''')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS crawl_urls (
+                    job_id TEXT NOT NULL,
+                    normalized_url TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    content_hash TEXT,
+                    failure TEXT,
+                    duplicate_of TEXT,
+                    payload TEXT,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (job_id, normalized_url)
+                )
+            ''')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_crawl_urls_status ON crawl_urls (job_id, status, position)')
+
+    @property
+    def resumed(self) -> bool:
+        """True if the job was checkpointed by an earlier (interrupted) run."""
+        row = self.conn.execute('SELECT 1 FROM crawl_jobs WHERE job_id = ?', (self.job_id,)).fetchone()
+        return row is not None
+
+    def start(self, meta: Optional[Dict[str, Any]] = None):
+        """Record the job, with optional metadata needed to resume it (e.g. home page info)."""
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO crawl_jobs (job_id, meta, created_at, updated_at) VALUES (?, ?, ?, ?)',
+                (self.job_id, json.dumps(meta) if meta is not None else None, now, now)
+            )
+
+    def meta(self) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute('SELECT meta FROM crawl_jobs WHERE job_id = ?', (self.job_id,)).fetchone()
+        return json.loads(row['meta']) if row and row['meta'] else None
+
+    def enqueue(self, urls: Iterable[str]) -> int:
+        """
+        Add URLs to the frontier, skipping any already seen.
+
+        Returns:
+            Number of URLs added
+        """
+        now = time.time()
+        with self._transaction():
+            row = self.conn.execute('SELECT COALESCE(MAX(position), -1) FROM crawl_urls WHERE job_id = ?',
+                                    (self.job_id,)).fetchone()
+            position = row[0] + 1
+            added = 0
+            for url in urls:
+                cursor = self.conn.execute(
+                    'INSERT OR IGNORE INTO crawl_urls (job_id, normalized_url, url, position, status, updated_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (self.job_id, normalize_url(url), url, position, QUEUED, now)
+                )
+                if cursor.rowcount:
+                    position += 1
+                    added += 1
+        return added
+
+    def is_seen(self, url: str) -> bool:
+        row = self.conn.execute('SELECT 1 FROM crawl_urls WHERE job_id = ? AND normalized_url = ?',
+                                (self.job_id, normalize_url(url))).fetchone()
+        return row is not None
+
+    def pending(self) -> List[str]:
+        """Queued URLs in crawl order."""
+        rows = self.conn.execute('SELECT url FROM crawl_urls WHERE job_id = ? AND status = ? ORDER BY position',
+                                 (self.job_id, QUEUED)).fetchall()
+        return [row['url'] for row in rows]
+
+    def position(self, url: str) -> Optional[int]:
+        """Zero-based crawl order of a URL."""
+        row = self.conn.execute('SELECT position FROM crawl_urls WHERE job_id = ? AND normalized_url = ?',
+                                (self.job_id, normalize_url(url))).fetchone()
+        return row['position'] if row else None
+
+    def mark_done(self, url: str, content: Optional[str] = None, payload: Any = None):
+        """Record a fetched page with its content hash and the data needed to rebuild results on resume."""
+        self._update(url, DONE, content_hash=content_hash(content),
+                     payload=json.dumps(payload) if payload is not None else None)
+
+    def mark_failed(self, url: str, failure: Optional[str] = None):
+        self._update(url, FAILED, failure=failure)
+
+    def mark_duplicate(self, url: str, duplicate_of: str, content: Optional[str] = None):
+        self._update(url, DUPLICATE, content_hash=content_hash(content), duplicate_of=duplicate_of)
+
+    def mark_alternate(self, url: str, canonical: Optional[str] = None):
+        """Record a URL that is a variant of another page (canonical, if known) and is not crawled."""
+        self._update(url, ALTERNATE, duplicate_of=canonical)
+
+    def _update(self, url: str, status: str, content_hash: Optional[str] = None, failure: Optional[str] = None,
+                duplicate_of: Optional[str] = None, payload: Optional[str] = None):
+        if not self.is_seen(url):
+            # URLs fetched without being enqueued first still get checkpointed
+            self.enqueue([url])
+        now = time.time()
+        with self._transaction():
+            self.conn.execute(
+                'UPDATE crawl_urls SET status = ?, content_hash = ?, failure = ?, duplicate_of = ?, payload = ?, '
+                'updated_at = ? WHERE job_id = ? AND normalized_url = ?',
+                (status, content_hash, failure, duplicate_of, payload, now, self.job_id, normalize_url(url))
+            )
+            self.conn.execute('UPDATE crawl_jobs SET updated_at = ? WHERE job_id = ?', (now, self.job_id))
+
+    @contextmanager
+    def batch(self):
+        """Commit every change made inside the block as one transaction."""
+        self._batched = True
+        try:
+            with self.conn:
+                yield self
+        finally:
+            self._batched = False
+
+    def _transaction(self):
+        return nullcontext() if self._batched else self.conn
+
+    def completed_pages(self) -> Iterator[Tuple[str, Any]]:
+        """
+        (url, payload) of every finished page in crawl order.
+
+        Rows are read from the cursor as the caller iterates, so replaying a
+        large crawl holds one page at a time.
+        """
+        cursor = self.conn.execute(
+            'SELECT url, payload FROM crawl_urls WHERE job_id = ? AND status = ? ORDER BY position',
+            (self.job_id, DONE)
+        )
+        for row in cursor:
+            yield row['url'], json.loads(row['payload']) if row['payload'] else None
+
+    def counts(self) -> Dict[str, int]:
+        """Number of URLs per status."""
+        rows = self.conn.execute('SELECT status, COUNT(*) AS n FROM crawl_urls WHERE job_id = ? GROUP BY status',
+                                 (self.job_id,)).fetchall()
+        return {row['status']: row['n'] for row in rows}
+
+    def finish(self):
+        """Drop the finished job's checkpoint."""
+        with self.conn:
+            self.conn.execute('DELETE FROM crawl_urls WHERE job_id = ?', (self.job_id,))
+            self.conn.execute('DELETE FROM crawl_jobs WHERE job_id = ?', (self.job_id,))
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self) -> 'CrawlState':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
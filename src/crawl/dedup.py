@@ -0,0 +1,148 @@
+"""
+Near-duplicate page detection for vendor crawls.
+
+Pages are fingerprinted with a 64-bit SimHash over word shingles. Two pages are
+near-duplicates when their fingerprints differ in at most `max_distance` bits.
+A banded LSH index finds candidates without comparing every pair: with
+max_distance + 1 bands, any two fingerprints within the distance must agree
+exactly on at least one band.
+"""
+
+import hashlib
+import re
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+FINGERPRINT_BITS = 64
+
+# Query parameters that never change page content
+TRACKING_PARAMS = {
+    'gclid', 'fbclid', 'msclkid', 'dclid', 'yclid', 'mc_cid', 'mc_eid',
+    'ref', 'referrer', '_ga', '_gl', '_hsenc', '_hsmi', 'hsctatracking',
+}
+
+_WORD = re.compile(r'\w+')
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalise a URL so trivially different variants compare equal.
+
+    Lowercases the scheme and host, drops the fragment, removes tracking
+    parameters (utm_*, gclid, ...), sorts the remaining query parameters and
+    strips a trailing slash from non-root paths.
+    """
+    parsed = urlparse(url)
+    query = [
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    ]
+    path = parsed.path or '/'
+    if len(path) > 1 and path.endswith('/'):
+        path = path.rstrip('/') or '/'
+    return urlunparse((
+        parsed.scheme.lower(),
+        parsed.netloc.lower(),
+        path,
+        parsed.params,
+        urlencode(sorted(query)),
+        ''
+    ))
+
+
+def _shingle_hashes(text: str, size: int) -> List[int]:
+    """Hash each distinct run of `size` consecutive words to a 64-bit integer."""
+    words = _WORD.findall(text.lower())
+    if len(words) < size:
+        shingles = {' '.join(words)} if words else set()
+    else:
+        shingles = {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    return [
+        int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for shingle in shingles
+    ]
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """Compute the 64-bit SimHash fingerprint of a text."""
+    hashes = _shingle_hashes(text, shingle_size)
+    if not hashes:
+        return 0
+
+    half = len(hashes) / 2
+    fingerprint = 0
+    for bit in range(FINGERPRINT_BITS):
+        mask = 1 << bit
+        if sum(1 for value in hashes if value & mask) > half:
+            fingerprint |= mask
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two fingerprints."""
+    return bin(a ^ b).count('1')
+
+
+class NearDuplicateIndex:
+    """Per-vendor LSH index of page fingerprints."""
+
+    def __init__(self, max_distance: int = 6, shingle_size: int = 3, min_words: int = 20):
+        """
+        Args:
+            max_distance: Largest Hamming distance still counted as a duplicate
+            shingle_size: Words per shingle
+            min_words: Pages with fewer words are never flagged (too little signal)
+        """
+        self.max_distance = max_distance
+        self.shingle_size = shingle_size
+        self.min_words = min_words
+        self.bands = max_distance + 1
+        self.band_bits = FINGERPRINT_BITS // self.bands
+        self.buckets: List[Dict[int, List[Tuple[int, str]]]] = [{} for _ in range(self.bands)]
+        self.seen_urls: Dict[str, str] = {}
+        self.duplicates: Dict[str, str] = {}
+
+    def _band_keys(self, fingerprint: int):
+        mask = (1 << self.band_bits) - 1
+        for band in range(self.bands):
+            yield band, (fingerprint >> (band * self.band_bits)) & mask
+
+    def find(self, fingerprint: int) -> Optional[str]:
+        """Return the URL of an indexed near-duplicate of a fingerprint, if any."""
+        for band, key in self._band_keys(fingerprint):
+            for other, url in self.buckets[band].get(key, ()):
+                if hamming_distance(fingerprint, other) <= self.max_distance:
+                    return url
+        return None
+
+    def is_seen_url(self, url: str) -> bool:
+        """Check whether a URL (after normalisation) has already been indexed."""
+        return normalize_url(url) in self.seen_urls
+
+    def check(self, url: str, text: str) -> Optional[str]:
+        """
+        Check a fetched page and index it if it is new.
+
+        Returns:
+            URL of the page it duplicates, or None if the page is new
+        """
+        normalized = normalize_url(url)
+        if normalized in self.seen_urls:
+            original = self.seen_urls[normalized]
+            self.duplicates[url] = original
+            return original
+
+        if len(_WORD.findall(text or '')) < self.min_words:
+            self.seen_urls[normalized] = url
+            return None
+
+        fingerprint = simhash(text, self.shingle_size)
+        original = self.find(fingerprint)
+        if original is not None:
+            self.duplicates[url] = original
+            return original
+
+        self.seen_urls[normalized] = url
+        for band, key in self._band_keys(fingerprint):
+            self.buckets[band].setdefault(key, []).append((fingerprint, url))
+        return None
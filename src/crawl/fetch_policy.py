@@ -0,0 +1,345 @@
+"""
+Failure classification, retries and per-host circuit breaking for fetches.
+
+Every fetch outcome is classified (DNS, connect timeout, TLS, 4xx, 5xx,
+throttled, blocked/captcha page, ...). Transient failures are retried with
+jittered exponential backoff; hosts that keep failing trip a circuit breaker
+so a dead or blocking vendor does not cost a timeout for every discovered
+link. An optional FetchLog records the last outcome per URL so a re-run can
+retry only what failed.
+"""
+
+import json
+import logging
+import random
+import socket
+import ssl
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Failure kinds
+DNS = 'dns'
+CONNECT = 'connect'
+CONNECT_TIMEOUT = 'connect_timeout'
+TIMEOUT = 'timeout'
+TLS = 'tls'
+NETWORK = 'network'
+HTTP_4XX = 'http_4xx'
+HTTP_5XX = 'http_5xx'
+THROTTLED = 'throttled'
+BLOCKED = 'blocked'
+CIRCUIT_OPEN = 'circuit_open'
+UNSUPPORTED_CONTENT = 'unsupported_content'
+TOO_LARGE = 'too_large'
+ERROR = 'error'
+
+# Worth retrying: the same request may succeed a moment later
+TRANSIENT_FAILURES = {CONNECT, CONNECT_TIMEOUT, TIMEOUT, NETWORK, HTTP_5XX, THROTTLED}
+
+# Count against the host (a 404 says nothing about the host's health)
+HOST_FAILURES = {DNS, CONNECT, CONNECT_TIMEOUT, TIMEOUT, TLS, NETWORK, HTTP_5XX, THROTTLED, BLOCKED}
+
+# curl exit codes, see `man curl`
+_CURL_EXIT_CODES = {
+    6: DNS, 5: DNS,
+    7: CONNECT,
+    28: TIMEOUT,
+    35: TLS, 51: TLS, 53: TLS, 54: TLS, 58: TLS, 59: TLS, 60: TLS, 77: TLS, 80: TLS, 83: TLS, 90: TLS, 91: TLS,
+    52: NETWORK, 55: NETWORK, 56: NETWORK, 16: NETWORK, 18: NETWORK,
+}
+
+# Phrases that indicate a block page rather than real content
+BLOCKING_PHRASES = (
+    "your request was blocked",
+    "access denied by administrator",
+    "403 forbidden",
+    "cloudflare ray id",
+    "you have been blocked",
+    "unauthorized access",
+)
+
+# Markup only found on bot-challenge interstitials
+CHALLENGE_MARKERS = (
+    'cf-browser-verification',
+    'challenge-platform',
+    'cf_chl_opt',
+    'captcha-delivery.com',
+    '_incapsula_resource',
+    'px-captcha',
+)
+
+# Block-page phrases are only trusted on error responses or short pages,
+# since real pages (e.g. security vendors) may mention "unauthorized access"
+_SHORT_PAGE = 5000
+
+
+def detect_blocked(text: Optional[str], status: Optional[int] = None) -> bool:
+    """Check whether a response body is a block or captcha page."""
+    if not text:
+        return False
+    lower = text[:50000].lower()
+    if any(marker in lower for marker in CHALLENGE_MARKERS):
+        return True
+    if (status is not None and status >= 400) or len(text) < _SHORT_PAGE:
+        return any(phrase in lower for phrase in BLOCKING_PHRASES)
+    return False
+
+
+def classify_status(status: Optional[int]) -> Optional[str]:
+    """Classify an HTTP status code; None means success."""
+    if status is None or status < 400:
+        return None
+    if status == 429:
+        return THROTTLED
+    if status >= 500:
+        return HTTP_5XX
+    return HTTP_4XX
+
+
+def classify_response(status: Optional[int], text: Optional[str]) -> Optional[str]:
+    """Classify a received response, including block-page detection."""
+    if status in (401, 403, 429, 503) and detect_blocked(text, status):
+        return BLOCKED
+    failure = classify_status(status)
+    if failure is None and detect_blocked(text, status):
+        return BLOCKED
+    return failure
+
+
+def classify_curl_exit(returncode: int) -> str:
+    """Classify a non-zero curl exit code."""
+    return _CURL_EXIT_CODES.get(returncode, ERROR)
+
+
+def _exception_chain(error: BaseException):
+    """Yield an exception and the errors it wraps (requests and urllib nest the socket error)."""
+    seen = set()
+    current = error
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        yield current
+        reason = getattr(current, 'reason', None)
+        current = reason if isinstance(reason, BaseException) else (current.__cause__ or current.__context__)
+
+
+def classify_exception(error: BaseException) -> str:
+    """Classify an exception raised by requests, urllib or subprocess."""
+    for current in _exception_chain(error):
+        name = type(current).__name__
+        if isinstance(current, socket.gaierror) or name == 'NameResolutionError':
+            return DNS
+        if isinstance(current, ssl.SSLError) or name == 'SSLError':
+            return TLS
+        if name in ('ConnectTimeout', 'ConnectTimeoutError'):
+            return CONNECT_TIMEOUT
+        if isinstance(current, (socket.timeout, TimeoutError)) or name in ('ReadTimeout', 'Timeout', 'TimeoutExpired'):
+            return TIMEOUT
+        if isinstance(current, ConnectionRefusedError):
+            return CONNECT
+        status = getattr(current, 'code', None) or getattr(getattr(current, 'response', None), 'status_code', None)
+        if isinstance(status, int):
+            return classify_status(status) or ERROR
+    if isinstance(error, OSError) or type(error).__name__ == 'ConnectionError':
+        return NETWORK
+    return ERROR
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter."""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 1.0, max_delay: float = 30.0, rng=None):
+        """
+        Args:
+            max_attempts: Total attempts per URL, including the first
+            base_delay: Backoff before the first retry (doubles per retry)
+            max_delay: Upper bound for a single backoff
+            rng: Random source for jitter
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rng = rng or random.Random()
+
+    def delay(self, attempt: int) -> float:
+        """Backoff before retrying after the given (1-based) attempt."""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return self.rng.uniform(ceiling / 2, ceiling)
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker.
+
+    After `failure_threshold` consecutive host failures (or one DNS failure)
+    the host is open for `cooldown` seconds and fetches fail fast. Once the
+    cooldown passes one trial request is let through (half-open); any answer
+    from the host closes the circuit, a host failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 300.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self._failures: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._trial: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, host: str) -> bool:
+        """Check whether a request to the host may be sent."""
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+            if opened_at is None:
+                return True
+            if self.clock() - opened_at < self.cooldown or self._trial.get(host):
+                return False
+            self._trial[host] = True
+            return True
+
+    def record_success(self, host: str):
+        with self._lock:
+            self._failures.pop(host, None)
+            self._opened_at.pop(host, None)
+            self._trial.pop(host, None)
+
+    def record_failure(self, host: str, failure: str):
+        if failure not in HOST_FAILURES:
+            # The host answered (404, oversized or non-HTML page, ...); that settles a trial like a success
+            self.record_success(host)
+            return
+        with self._lock:
+            self._failures[host] = self._failures.get(host, 0) + 1
+            if failure == DNS or self._trial.get(host) or self._failures[host] >= self.failure_threshold:
+                if host not in self._opened_at or self._trial.get(host):
+                    logger.warning(f"Circuit opened for {host} after {failure}")
+                self._opened_at[host] = self.clock()
+                self._trial.pop(host, None)
+
+    def is_open(self, host: str) -> bool:
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+            return opened_at is not None and self.clock() - opened_at < self.cooldown
+
+
+class FetchLog:
+    """Last fetch outcome per URL, optionally persisted as JSON."""
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else None
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if self.path and self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+
+    def record(self, url: str, failure: Optional[str], attempts: int, status: Optional[int] = None):
+        with self._lock:
+            self.entries[url] = {
+                'ok': failure is None,
+                'failure': failure,
+                'status': status,
+                'attempts': attempts,
+                'updated_at': datetime.now().isoformat(),
+            }
+
+    def succeeded(self, url: str) -> bool:
+        entry = self.entries.get(url)
+        return bool(entry and entry['ok'])
+
+    def failed_urls(self) -> List[str]:
+        return [url for url, entry in self.entries.items() if not entry['ok']]
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, indent=2)
+
+
+class FetchPolicy:
+    """Runs fetch attempts under a retry policy, a circuit breaker and an optional log."""
+
+    def __init__(self, retry: Optional[RetryPolicy] = None, breaker: Optional[CircuitBreaker] = None,
+                 log: Optional[FetchLog] = None, sleep=None):
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or shared_circuit_breaker()
+        self.log = log
+        self._sleep = sleep
+
+    def execute(self, url: str, attempt: Callable[[], Any],
+                classify: Callable[[Any], Optional[str]]) -> Tuple[Any, Optional[str]]:
+        """
+        Fetch a URL with retries.
+
+        Args:
+            url: URL being fetched (its host keys the circuit breaker)
+            attempt: Performs one fetch and returns a result
+            classify: Maps a result to a failure kind, or None on success
+
+        Returns:
+            Tuple of (last result or None, failure kind or None)
+        """
+        host = urlparse(url).netloc.lower()
+        if not self.breaker.allow(host):
+            logger.info(f"Skipping {url}: circuit open for {host}")
+            self._record(url, CIRCUIT_OPEN, 0, None)
+            return None, CIRCUIT_OPEN
+
+        result, failure, attempts = None, None, 0
+        while attempts < self.retry.max_attempts:
+            attempts += 1
+            try:
+                result = attempt()
+                failure = classify(result)
+            except Exception as e:
+                result, failure = None, classify_exception(e)
+                logger.debug(f"Fetch of {url} raised {type(e).__name__}: {e}")
+
+            if failure is None:
+                self.breaker.record_success(host)
+                break
+            self.breaker.record_failure(host, failure)
+            if failure not in TRANSIENT_FAILURES or attempts >= self.retry.max_attempts or not self.breaker.allow(host):
+                break
+            delay = self.retry.delay(attempts)
+            logger.info(f"Retrying {url} in {delay:.1f}s after {failure} (attempt {attempts})")
+            (self._sleep or time.sleep)(delay)
+
+        self._record(url, failure, attempts, getattr(result, 'status', None))
+        return result, failure
+
+    def _record(self, url, failure, attempts, status):
+        if self.log is not None:
+            self.log.record(url, failure, attempts, status)
+
+
+_shared_breaker: Optional[CircuitBreaker] = None
+_shared_policy: Optional[FetchPolicy] = None
+_shared_lock = threading.Lock()
+
+
+def shared_circuit_breaker() -> CircuitBreaker:
+    """Process-wide circuit breaker, so every scraper sees a host's failures."""
+    global _shared_breaker
+    with _shared_lock:
+        if _shared_breaker is None:
+            _shared_breaker = CircuitBreaker()
+        return _shared_breaker
+
+
+def shared_fetch_policy() -> FetchPolicy:
+    """Process-wide fetch policy without a URL log."""
+    global _shared_policy
+    breaker = shared_circuit_breaker()
+    with _shared_lock:
+        if _shared_policy is None:
+            _shared_policy = FetchPolicy(breaker=breaker)
+        return _shared_policy
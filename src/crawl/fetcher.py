@@ -0,0 +1,417 @@
+"""
+Shared curl-based page fetching.
+
+The curl scrapers all shell out the same way; fetch_with_curl centralises it so
+every fetch goes through the per-host rate limiter, records metrics, reports
+the HTTP status and headers (needed for Retry-After handling), and classifies
+failures so a FetchPolicy can retry transient ones and trip the per-host
+circuit breaker.
+
+Bodies are streamed: a response whose headers announce a non-HTML content
+type or an oversized body is dropped before it is downloaded, and bodies are
+cut off at max_bytes, so a link to a video or a large bundle cannot balloon a
+worker's memory.
+"""
+
+import os
+import re
+import subprocess
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from ..utils.metrics import FETCH_BYTES, FETCH_ERRORS, FETCH_SECONDS, host_of
+from .fetch_policy import (
+    ERROR,
+    TOO_LARGE,
+    UNSUPPORTED_CONTENT,
+    FetchPolicy,
+    classify_curl_exit,
+    classify_exception,
+    classify_response,
+)
+from .rate_limiter import HostRateLimiter
+
+_STATUS_LINE = re.compile(rb'^HTTP/[\d.]+\s+(\d{3})([^\r\n]*)')
+_CHARSET = re.compile(r'charset=["\']?([\w-]+)', re.IGNORECASE)
+
+# Largest body kept per page (decompressed); MAX_PAGE_BYTES overrides
+DEFAULT_MAX_BYTES = int(os.getenv('MAX_PAGE_BYTES', str(5 * 1024 * 1024)))
+
+# Content types worth downloading; responses without a Content-Type are kept
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+
+CHUNK_SIZE = 64 * 1024
+_MAX_HEADER_BYTES = 256 * 1024
+
+
+@dataclass
+class FetchResult:
+    """Outcome of a single fetch."""
+    url: str
+    status: Optional[int] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+    text: Optional[str] = None
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    failure: Optional[str] = None
+    attempts: int = 1
+
+    @property
+    def ok(self) -> bool:
+        """True if a usable page was received (no transport error, HTTP error or block page)."""
+        return self.failure is None and self.text is not None
+
+    @property
+    def content_type(self) -> str:
+        return self.headers.get('content-type', '')
+
+
+def _split_headers(raw: bytes):
+    """
+    Split `curl -D -` output into the final response's status, headers and body.
+
+    With -L every redirect hop (and proxy CONNECT) writes its own header block,
+    so blocks are consumed until the body starts.
+    """
+    status, headers = None, {}
+    while True:
+        match = _STATUS_LINE.match(raw)
+        if not match:
+            break
+        end = raw.find(b'\r\n\r\n')
+        separator = 4
+        if end == -1:
+            end = raw.find(b'\n\n')
+            separator = 2
+        if end == -1:
+            block, raw = raw, b''
+        else:
+            block, raw = raw[:end], raw[end + separator:]
+        status, headers = int(match.group(1)), {}
+        for line in block.decode('latin-1').splitlines()[1:]:
+            name, _, value = line.partition(':')
+            if value:
+                headers[name.strip().lower()] = value.strip()
+    return status, headers, raw
+
+
+def is_accepted_content_type(content_type: Optional[str], accept: Iterable[str] = HTML_CONTENT_TYPES) -> bool:
+    """Check a Content-Type header against the accepted media types (a missing header is accepted)."""
+    media_type = (content_type or '').split(';', 1)[0].strip().lower()
+    return not media_type or media_type in accept
+
+
+def check_headers(status: Optional[int], headers: Dict[str, str], max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+                  accept: Optional[Iterable[str]] = HTML_CONTENT_TYPES) -> Optional[str]:
+    """
+    Decide from the response headers alone whether the body is worth downloading.
+
+    Error responses are always read (their bodies are small and classify the
+    failure), so only successful responses are rejected.
+
+    Args:
+        status: HTTP status code
+        headers: Response headers with lower-case names
+        max_bytes: Body size limit, or None for no limit
+        accept: Accepted media types, or None to accept any
+
+    Returns:
+        UNSUPPORTED_CONTENT or TOO_LARGE, or None if the body should be read
+    """
+    if status is not None and status >= 400:
+        return None
+    if accept is not None and not is_accepted_content_type(headers.get('content-type'), accept):
+        return UNSUPPORTED_CONTENT
+    length = headers.get('content-length', '')
+    if max_bytes is not None and length.isdigit() and int(length) > max_bytes:
+        # With compression this is the compressed size, so it can only underestimate
+        return TOO_LARGE
+    return None
+
+
+def read_capped(chunks: Iterable[bytes], max_bytes: Optional[int] = DEFAULT_MAX_BYTES) -> Tuple[bytes, bool]:
+    """
+    Read chunks until they run out or exceed max_bytes.
+
+    Returns:
+        Tuple of (body read so far, True if the limit was exceeded)
+    """
+    parts, total = [], 0
+    for chunk in chunks:
+        parts.append(chunk)
+        total += len(chunk)
+        if max_bytes is not None and total > max_bytes:
+            return b''.join(parts)[:max_bytes], True
+    return b''.join(parts), False
+
+
+def decompress_chunks(chunks: Iterable[bytes], content_encoding: Optional[str]) -> Iterator[bytes]:
+    """
+    Incrementally decode a gzip or deflate body.
+
+    Output is produced in bounded pieces, so a small compressed payload that
+    expands enormously is still stopped by read_capped.
+    """
+    encoding = (content_encoding or '').strip().lower()
+    if encoding in ('gzip', 'x-gzip'):
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    elif encoding == 'deflate':
+        decompressor = zlib.decompressobj()
+    else:
+        yield from chunks
+        return
+
+    for chunk in chunks:
+        data = chunk
+        while data:
+            output = decompressor.decompress(data, CHUNK_SIZE)
+            if output:
+                yield output
+            data = decompressor.unconsumed_tail
+    tail = decompressor.flush()
+    if tail:
+        yield tail
+
+
+def decode_body(body: bytes, content_type: str = '') -> str:
+    """Decode a response body using its declared charset, falling back to UTF-8."""
+    match = _CHARSET.search(content_type or '')
+    encoding = match.group(1) if match else 'utf-8'
+    try:
+        return body.decode(encoding, errors='replace')
+    except LookupError:
+        return body.decode('utf-8', errors='replace')
+
+
+def fetch_with_curl(url: str, headers: Iterable[str] = (), timeout: int = 30, compressed: bool = False,
+                    rate_limiter: Optional[HostRateLimiter] = None, min_interval: Optional[float] = None,
+                    policy: Optional[FetchPolicy] = None, max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+                    accept: Optional[Iterable[str]] = HTML_CONTENT_TYPES) -> FetchResult:
+    """
+    Fetch a URL with curl, following redirects.
+
+    Args:
+        url: URL to fetch
+        headers: Raw header lines ("Name: value") to send
+        timeout: Overall timeout in seconds
+        compressed: Ask for and transparently decode compressed responses
+        rate_limiter: Limiter to wait on before each attempt and to report responses to
+        min_interval: Per-call minimum spacing passed to the limiter
+        policy: Retry/circuit-breaker policy; without one a single attempt is made
+        max_bytes: Body size limit (decompressed), or None for no limit
+        accept: Accepted media types, or None to download any content type
+
+    Returns:
+        FetchResult; `failure` holds the failure kind if the fetch did not succeed
+    """
+    def attempt():
+        return _curl_once(url, headers, timeout, compressed, rate_limiter, min_interval, max_bytes, accept)
+
+    return _run_policy(url, attempt, policy)
+
+
+def fetch_with_requests(session, url: str, timeout: int = 30, rate_limiter: Optional[HostRateLimiter] = None,
+                        min_interval: Optional[float] = None, policy: Optional[FetchPolicy] = None,
+                        max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+                        accept: Optional[Iterable[str]] = HTML_CONTENT_TYPES) -> FetchResult:
+    """
+    Fetch a URL with a requests session, streaming the body.
+
+    Args:
+        session: requests.Session to send the request with
+        url: URL to fetch
+        timeout: Connect/read timeout in seconds
+        rate_limiter: Limiter to wait on before each attempt and to report responses to
+        min_interval: Per-call minimum spacing passed to the limiter
+        policy: Retry/circuit-breaker policy; without one a single attempt is made
+        max_bytes: Body size limit (decompressed), or None for no limit
+        accept: Accepted media types, or None to download any content type
+
+    Returns:
+        FetchResult; `failure` holds the failure kind if the fetch did not succeed
+    """
+    def attempt():
+        return _requests_once(session, url, timeout, rate_limiter, min_interval, max_bytes, accept)
+
+    return _run_policy(url, attempt, policy)
+
+
+def _run_policy(url: str, attempt, policy: Optional[FetchPolicy]) -> FetchResult:
+    if policy is None:
+        return attempt()
+
+    attempts = 0
+
+    def counted_attempt():
+        nonlocal attempts
+        attempts += 1
+        return attempt()
+
+    result, failure = policy.execute(url, counted_attempt, lambda r: r.failure)
+    if result is None:
+        result = FetchResult(url=url, error=failure)
+    result.failure = failure
+    result.attempts = attempts
+    return result
+
+
+def _finish(result: FetchResult, fetcher: str, start: float, rate_limiter: Optional[HostRateLimiter]) -> FetchResult:
+    """Record timing, errors and the limiter feedback for one attempt."""
+    host = host_of(result.url)
+    result.elapsed = time.perf_counter() - start
+    FETCH_SECONDS.observe(result.elapsed, host=host, fetcher=fetcher)
+
+    if result.failure:
+        FETCH_ERRORS.inc(host=host, fetcher=fetcher)
+        if result.error is None:
+            result.error = f"{result.failure} (HTTP {result.status})"
+    if rate_limiter is not None:
+        rate_limiter.record(result.url, result.status, result.elapsed, result.headers.get('retry-after'))
+    return result
+
+
+def _accept_body(result: FetchResult, chunks: Iterable[bytes], max_bytes: Optional[int]):
+    """Read a streamed body into the result, or mark it TOO_LARGE."""
+    body, too_large = read_capped(chunks, max_bytes)
+    FETCH_BYTES.inc(len(body), host=host_of(result.url))
+    if too_large:
+        result.failure = TOO_LARGE
+        result.error = f"body exceeds {max_bytes} bytes"
+        return
+    result.text = decode_body(body, result.content_type)
+    result.failure = classify_response(result.status, result.text)
+
+
+def _requests_once(session, url, timeout, rate_limiter, min_interval, max_bytes, accept) -> FetchResult:
+    if rate_limiter is not None:
+        rate_limiter.acquire(url, min_interval)
+
+    result = FetchResult(url=url)
+    start = time.perf_counter()
+    try:
+        with session.get(url, timeout=timeout, stream=True) as response:
+            result.status = response.status_code
+            result.headers = {name.lower(): value for name, value in response.headers.items()}
+            result.failure = check_headers(result.status, result.headers, max_bytes, accept)
+            if result.failure is None:
+                # iter_content decompresses gzip/deflate as it goes
+                _accept_body(result, response.iter_content(CHUNK_SIZE), max_bytes)
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+        result.failure = classify_exception(e)
+    return _finish(result, 'requests', start, rate_limiter)
+
+
+def _curl_once(url, headers, timeout, compressed, rate_limiter, min_interval, max_bytes, accept) -> FetchResult:
+    if rate_limiter is not None:
+        rate_limiter.acquire(url, min_interval)
+
+    cmd = ['curl', '-s', '-L', '-D', '-', '--max-time', str(timeout)]
+    if compressed:
+        cmd.append('--compressed')
+    for header in headers:
+        cmd.extend(['-H', header])
+    cmd.append(url)
+
+    result = FetchResult(url=url)
+    start = time.perf_counter()
+    try:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as e:
+        result.error = f"{type(e).__name__}: {e}"
+        result.failure = classify_exception(e)
+        return _finish(result, 'curl', start, rate_limiter)
+
+    aborted = False
+    try:
+        chunks = iter(lambda: process.stdout.read1(CHUNK_SIZE), b'')
+        result.status, result.headers, body_start = _read_curl_headers(chunks)
+        if result.status is not None:
+            result.failure = check_headers(result.status, result.headers, max_bytes, accept)
+            if result.failure is None:
+                _accept_body(result, _prepend(body_start, chunks), max_bytes)
+            aborted = result.failure in (UNSUPPORTED_CONTENT, TOO_LARGE)
+    finally:
+        if aborted:
+            # Stop the transfer instead of downloading the rest
+            process.kill()
+        process.stdout.close()
+        stderr = process.stderr.read()
+        process.stderr.close()
+        try:
+            returncode = process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired as e:
+            process.kill()
+            process.wait()
+            returncode = None
+            result.error = f"{type(e).__name__}: {e}"
+            result.failure = classify_exception(e)
+
+    if not aborted and returncode not in (0, None):
+        result.text = None
+        result.error = stderr.decode('utf-8', errors='replace').strip() or f"curl exit code {returncode}"
+        result.failure = classify_curl_exit(returncode)
+    elif returncode == 0 and result.status is None:
+        result.text = None
+        result.error = "no HTTP response received"
+        result.failure = ERROR
+    return _finish(result, 'curl', start, rate_limiter)
+
+
+def _prepend(first: bytes, chunks: Iterable[bytes]) -> Iterator[bytes]:
+    if first:
+        yield first
+    yield from chunks
+
+
+def _read_curl_headers(chunks: Iterator[bytes]):
+    """
+    Consume the `curl -D -` header blocks from a stream.
+
+    With -L every redirect hop (and interim 1xx or proxy CONNECT response)
+    writes its own header block; reading stops after the final one.
+
+    Returns:
+        Tuple of (status, headers, body bytes already read); status is None
+        if the stream ended before a complete header block
+    """
+    buffer = b''
+    for chunk in chunks:
+        buffer += chunk
+        while True:
+            match = _STATUS_LINE.match(buffer)
+            if not match:
+                if len(buffer) >= 16 or not b'HTTP/'.startswith(buffer[:5]):
+                    # Not a header block (e.g. an HTTP/0.9 body)
+                    return None, {}, buffer
+                break
+            end, separator = buffer.find(b'\r\n\r\n'), 4
+            if end == -1:
+                end, separator = buffer.find(b'\n\n'), 2
+            if end == -1:
+                if len(buffer) > _MAX_HEADER_BYTES:
+                    return None, {}, b''
+                break
+            block, buffer = buffer[:end], buffer[end + separator:]
+            status, headers = _parse_header_block(block)
+            reason = match.group(2).strip().lower()
+            interim = status < 200 or reason == b'connection established'
+            redirect = 300 <= status < 400 and 'location' in headers
+            if not interim and not redirect:
+                return status, headers, buffer
+    if buffer:
+        status, headers, body = _split_headers(buffer)
+        return status, headers, body
+    return None, {}, b''
+
+
+def _parse_header_block(block: bytes):
+    status = int(_STATUS_LINE.match(block).group(1))
+    headers = {}
+    for line in block.decode('latin-1').splitlines()[1:]:
+        name, _, value = line.partition(':')
+        if value:
+            headers[name.strip().lower()] = value.strip()
+    return status, headers
@@ -0,0 +1,186 @@
+"""
+Per-host politeness for all scrapers.
+
+HostRateLimiter keeps a token bucket per host, so requests to one vendor are
+spaced out while requests to other vendors proceed concurrently. The interval
+for a host widens when its responses get slow, and throttling responses
+(429/503) block the host for the Retry-After period or an exponential backoff.
+"""
+
+import email.utils
+import os
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+THROTTLE_STATUSES = {429, 503}
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Parse a Retry-After header (delay in seconds or an HTTP date).
+
+    Returns:
+        Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    now = time.time() if now is None else now
+    return max(retry_at.timestamp() - now, 0.0)
+
+
+def _host(url_or_host: str) -> str:
+    if '://' in url_or_host:
+        return urlparse(url_or_host).netloc.lower()
+    return url_or_host.lower()
+
+
+class _HostState:
+    __slots__ = ('lock', 'tokens', 'updated', 'latency', 'blocked_until', 'strikes')
+
+    def __init__(self, burst: int, now: float):
+        self.lock = threading.Lock()
+        self.tokens = float(burst)
+        self.updated = now
+        self.latency: Optional[float] = None
+        self.blocked_until = 0.0
+        self.strikes = 0
+
+
+class HostRateLimiter:
+    """Token-bucket rate limiter keyed by host, adapting to latency and throttling."""
+
+    def __init__(self, interval: float = 1.0, burst: int = 1, latency_factor: float = 1.0,
+                 max_interval: float = 30.0, backoff_base: float = 2.0, max_backoff: float = 300.0,
+                 clock=time.monotonic, sleep=None):
+        """
+        Args:
+            interval: Minimum seconds between requests to the same host
+            burst: Requests a host may receive back-to-back before spacing applies
+            latency_factor: Interval is at least this multiple of the host's average latency
+            max_interval: Upper bound for the latency-adapted interval
+            backoff_base: First backoff in seconds after a throttling response (doubles each time)
+            max_backoff: Upper bound for backoff and Retry-After waits
+            clock: Monotonic time source
+            sleep: Sleep function (defaults to time.sleep)
+        """
+        self.interval = interval
+        self.burst = max(1, burst)
+        self.latency_factor = latency_factor
+        self.max_interval = max_interval
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.clock = clock
+        self._sleep = sleep
+        self._hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, host: str) -> _HostState:
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                state = self._hosts[host] = _HostState(self.burst, self.clock())
+            return state
+
+    def host_interval(self, url_or_host: str, min_interval: Optional[float] = None) -> float:
+        """Current spacing between requests to a host."""
+        return self._interval(self._state(_host(url_or_host)), min_interval)
+
+    def _interval(self, state: _HostState, min_interval: Optional[float]) -> float:
+        interval = max(self.interval, min_interval or 0.0)
+        if state.latency is not None and self.latency_factor > 0:
+            interval = max(interval, min(state.latency * self.latency_factor, self.max_interval))
+        return interval
+
+    def reserve(self, url_or_host: str, min_interval: Optional[float] = None) -> float:
+        """
+        Take a slot for the next request to a host without sleeping.
+
+        Returns:
+            Seconds the caller must wait before sending the request
+        """
+        state = self._state(_host(url_or_host))
+        with state.lock:
+            now = self.clock()
+            interval = self._interval(state, min_interval)
+            if interval > 0:
+                state.tokens = min(float(self.burst), state.tokens + (now - state.updated) / interval)
+            else:
+                state.tokens = float(self.burst)
+            state.updated = now
+
+            wait = max(state.blocked_until - now, 0.0)
+            if state.tokens < 1:
+                wait = max(wait, (1 - state.tokens) * interval)
+            # Tokens may go negative: later callers then queue behind this reservation
+            state.tokens -= 1
+            return wait
+
+    def acquire(self, url_or_host: str, min_interval: Optional[float] = None) -> float:
+        """
+        Block until a request to the host is allowed.
+
+        Returns:
+            Seconds spent waiting
+        """
+        wait = self.reserve(url_or_host, min_interval)
+        if wait > 0:
+            (self._sleep or time.sleep)(wait)
+        return wait
+
+    def record(self, url_or_host: str, status: Optional[int] = None, latency: Optional[float] = None,
+               retry_after: Optional[str] = None):
+        """
+        Feed a response back into the limiter.
+
+        Args:
+            url_or_host: URL (or host) that was requested
+            status: HTTP status code, if a response was received
+            latency: Seconds the request took
+            retry_after: Raw Retry-After header value, if any
+        """
+        state = self._state(_host(url_or_host))
+        with state.lock:
+            if latency is not None:
+                # Exponentially weighted average so one slow page does not dominate
+                state.latency = latency if state.latency is None else 0.7 * state.latency + 0.3 * latency
+
+            if status in THROTTLE_STATUSES:
+                state.strikes += 1
+                delay = min(self.backoff_base * (2 ** (state.strikes - 1)), self.max_backoff)
+                requested = parse_retry_after(retry_after)
+                if requested is not None:
+                    delay = max(delay, min(requested, self.max_backoff))
+                state.blocked_until = max(state.blocked_until, self.clock() + delay)
+            elif status is not None and status < 400:
+                state.strikes = 0
+
+    def is_throttled(self, url_or_host: str) -> bool:
+        """Check whether a host is currently in a backoff period."""
+        return self._state(_host(url_or_host)).blocked_until > self.clock()
+
+
+_shared_limiter: Optional[HostRateLimiter] = None
+_shared_lock = threading.Lock()
+
+
+def shared_rate_limiter() -> HostRateLimiter:
+    """
+    Process-wide limiter used by every scraper, so concurrent crawls of the same
+    host share one budget. The base interval comes from REQUEST_DELAY (default 1s).
+    """
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = HostRateLimiter(interval=float(os.getenv('REQUEST_DELAY', '1.0')))
+        return _shared_limiter
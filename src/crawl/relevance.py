@@ -0,0 +1,373 @@
+"""
+URL-level relevance scoring for the crawl frontier.
+
+Whether a page describes a service or product was only known once it had been
+fetched and parsed (ExtractorService._is_service_page/_is_product_page), so
+discovery queued links in page order and page budgets were spent on whatever
+came first. A RelevanceModel scores a link before it is fetched, from what the
+parent page says about it:
+
+- the tokens of its URL path and its depth,
+- the tokens of its anchor text,
+- where it sits on the parent page (nav/header/footer/aside/main, and how far
+  down the page).
+
+Features are hashed into a fixed-size weight table (no vocabulary to keep) and
+combined by a logistic model, so scoring a link is a few table lookups. Token
+hashes are cached, since the same path and anchor tokens recur on every page of
+a site. Without a trained model a prior built from the keyword lists the
+scrapers already use is applied; `python main.py train-relevance` fits one
+offline from our own exports (services.csv/products.csv) and the links stored
+with researched pages.
+"""
+
+import csv
+import json
+import logging
+import math
+import os
+import random
+import re
+import threading
+import zlib
+from array import array
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from .dedup import normalize_url
+
+logger = logging.getLogger(__name__)
+
+# Trained model used by the scrapers when present (see train())
+RELEVANCE_MODEL_FILE = os.getenv('RELEVANCE_MODEL_FILE', 'relevance_model.json')
+
+# Links scoring below this are dropped from the frontier (unset: only reorder)
+MIN_SCORE = float(os.getenv('RELEVANCE_MIN_SCORE')) if os.getenv('RELEVANCE_MIN_SCORE') else None
+
+# Size of the hashed feature space
+N_FEATURES = 1 << 18
+
+# Page regions a link can sit in, innermost first
+SECTIONS = ('nav', 'header', 'footer', 'aside', 'main')
+
+# Link positions are bucketed into tenths of the parent page
+POSITION_BUCKETS = 10
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+# Prior weights applied when no trained model exists
+_PRIOR_POSITIVE = (
+    'services', 'service', 'solutions', 'solution', 'products', 'product', 'platform', 'software',
+    'consulting', 'support', 'training', 'implementation', 'migration', 'managed', 'features',
+    'pricing', 'plans', 'capabilities', 'offerings', 'portfolio', 'industries', 'expertise',
+)
+_PRIOR_NEGATIVE = (
+    'blog', 'news', 'article', 'articles', 'post', 'posts', 'press', 'media', 'events', 'event',
+    'webinar', 'careers', 'jobs', 'privacy', 'terms', 'cookie', 'cookies', 'legal', 'login',
+    'signup', 'account', 'author', 'tag', 'category', 'sitemap',
+)
+
+
+class LinkContext(NamedTuple):
+    """A discovered link and what its parent page says about it."""
+    url: str
+    text: str = ''
+    position: float = 0.0   # 0 = top of the parent page, 1 = bottom
+    section: str = ''       # innermost of SECTIONS the link is in, '' if none
+
+
+def link_contexts(soup: Any, page_url: str) -> List[LinkContext]:
+    """
+    Every <a href> of a parsed page, in document order.
+
+    Args:
+        soup: BeautifulSoup of the parent page
+        page_url: URL of the parent page; relative hrefs are resolved against it
+    """
+    anchors = soup.find_all('a', href=True)
+    last = max(len(anchors) - 1, 1)
+    links = []
+    for i, anchor in enumerate(anchors):
+        parent = anchor.find_parent(SECTIONS)
+        links.append(LinkContext(
+            urljoin(page_url, anchor['href']),
+            anchor.get_text(' ', strip=True),
+            i / last,
+            parent.name if parent is not None else ''
+        ))
+    return links
+
+
+@lru_cache(maxsize=65536)
+def _index(feature: str) -> int:
+    # crc32 rather than hash() so indexes are the same in every process and run
+    return zlib.crc32(feature.encode('utf-8')) % N_FEATURES
+
+
+@lru_cache(maxsize=65536)
+def _path_features(path: str) -> Tuple[int, ...]:
+    segments = [segment for segment in path.lower().split('/') if segment]
+    features = [f"depth:{min(len(segments), 5)}"]
+    features.extend(f"path:{token}" for token in _TOKEN.findall(path.lower()) if not token.isdigit())
+    if segments:
+        features.append(f"first:{segments[0]}")
+        features.append(f"last:{segments[-1]}")
+    return tuple(_index(feature) for feature in features)
+
+
+@lru_cache(maxsize=65536)
+def _text_features(text: str) -> Tuple[int, ...]:
+    tokens = _TOKEN.findall(text.lower())
+    return tuple(_index(f"text:{token}") for token in tokens[:12]) + (_index(f"words:{min(len(tokens), 6)}"),)
+
+
+def link_features(link: LinkContext) -> Tuple[int, ...]:
+    """Hashed feature indexes of a link."""
+    bucket = min(int(link.position * POSITION_BUCKETS), POSITION_BUCKETS - 1)
+    return _link_features(link.url, link.text, link.section, bucket)
+
+
+@lru_cache(maxsize=65536)
+def _link_features(url: str, text: str, section: str, bucket: int) -> Tuple[int, ...]:
+    # Navigation links repeat on every page of a site, so whole links are cached too
+    return (_path_features(urlsplit(url).path)
+            + _text_features(text)
+            + (_index(f"section:{section}"), _index(f"position:{bucket}")))
+
+
+class RelevanceModel:
+    """Logistic model over hashed link features."""
+
+    def __init__(self, weights: Optional[array] = None, bias: float = 0.0):
+        """
+        Args:
+            weights: One weight per hashed feature (all zero if None)
+            bias: Intercept
+        """
+        self.weights = weights if weights is not None else array('d', bytes(8 * N_FEATURES))
+        self.bias = bias
+
+    @classmethod
+    def prior(cls) -> 'RelevanceModel':
+        """Untrained model from the scrapers' service/product and blog/legal keyword lists."""
+        model = cls(bias=-0.5)
+        for weight, tokens in ((1.5, _PRIOR_POSITIVE), (-2.0, _PRIOR_NEGATIVE)):
+            for token in tokens:
+                for prefix in ('path', 'text'):
+                    model.weights[_index(f"{prefix}:{token}")] = weight
+        for section, weight in (('nav', 0.5), ('header', 0.3), ('footer', -0.7), ('aside', -0.3)):
+            model.weights[_index(f"section:{section}")] = weight
+        return model
+
+    @classmethod
+    def load(cls, path: str) -> 'RelevanceModel':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('n_features') != N_FEATURES:
+            raise ValueError(f"{path} was trained with {data.get('n_features')} features, expected {N_FEATURES}")
+        model = cls(bias=data['bias'])
+        for index, weight in data['weights'].items():
+            model.weights[int(index)] = weight
+        return model
+
+    def save(self, path: str):
+        """Write the model as JSON, keeping only non-zero weights."""
+        weights = {str(i): round(w, 6) for i, w in enumerate(self.weights) if w}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'n_features': N_FEATURES, 'bias': self.bias, 'weights': weights}, f)
+
+    def score(self, link: LinkContext) -> float:
+        """Probability that the link leads to a service or product page."""
+        return self.score_links([link])[0]
+
+    def score_links(self, links: Sequence[LinkContext]) -> List[float]:
+        """Scores of a batch of links (hashing is cached across the batch)."""
+        weights = self.weights
+        bias = self.bias
+        scores = []
+        for link in links:
+            z = bias
+            for i in link_features(link):
+                z += weights[i]
+            scores.append(_sigmoid(z))
+        return scores
+
+    def rank(self, links: Sequence[LinkContext], budget: Optional[int] = None,
+             min_score: Optional[float] = MIN_SCORE) -> List[Tuple[float, LinkContext]]:
+        """
+        Score links and order them best first.
+
+        Args:
+            links: Links to rank; a URL linked several times keeps its best score
+                (URLs are compared as given; collapse variants first)
+            budget: Keep at most this many
+            min_score: Drop links scoring below this (None keeps all)
+
+        Returns:
+            (score, link) pairs, highest score first (ties keep their order)
+        """
+        best: Dict[str, Tuple[float, int, LinkContext]] = {}
+        for order, (score, link) in enumerate(zip(self.score_links(links), links)):
+            if link.url not in best:
+                best[link.url] = (score, order, link)
+            elif score > best[link.url][0]:
+                best[link.url] = (score, best[link.url][1], link)
+        ranked = sorted(best.values(), key=lambda item: (-item[0], item[1]))
+        if min_score is not None:
+            ranked = [item for item in ranked if item[0] >= min_score]
+        if budget is not None:
+            ranked = ranked[:budget]
+        return [(score, link) for score, _, link in ranked]
+
+    def rank_urls(self, urls: Sequence[str], links: Iterable[LinkContext], budget: Optional[int] = None,
+                  min_score: Optional[float] = MIN_SCORE) -> List[str]:
+        """
+        Order URLs already chosen for crawling by the score of the links to them.
+
+        Args:
+            urls: Frontier URLs
+            links: Contexts of the links found to them; URLs without one are
+                scored on their path alone
+            budget, min_score: As for rank()
+        """
+        contexts: Dict[str, LinkContext] = {}
+        for link in links:
+            contexts.setdefault(normalize_url(link.url), link)
+        candidates = [contexts.get(normalize_url(url), LinkContext(url))._replace(url=url) for url in urls]
+        return [link.url for _, link in self.rank(candidates, budget, min_score)]
+
+
+def _sigmoid(z: float) -> float:
+    if z < -35:
+        return 0.0
+    return 1.0 / (1.0 + math.exp(-z))
+
+
+def rank_discovered(soup: Any, base_url: str, urls: Sequence[str], budget: Optional[int] = None,
+                    model: Optional[RelevanceModel] = None) -> List[str]:
+    """
+    Order the pages discovered on a site's home page for fetching.
+
+    Args:
+        soup: BeautifulSoup of the home page the URLs were found on
+        base_url: URL of the home page; it stays first in the result
+        urls: Frontier URLs (for example from collapse_links())
+        budget: Keep at most this many links besides the home page
+        model: Model to score with (the shared model if None)
+
+    Returns:
+        The home page followed by the other URLs, most relevant first
+    """
+    model = model or shared_relevance_model()
+    home = normalize_url(base_url)
+    rest = [url for url in urls if normalize_url(url) != home]
+    return [base_url] + model.rank_urls(rest, link_contexts(soup, base_url), budget)
+
+
+_shared_model: Optional[RelevanceModel] = None
+_shared_lock = threading.Lock()
+
+
+def shared_relevance_model() -> RelevanceModel:
+    """
+    Process-wide model: the one trained into RELEVANCE_MODEL_FILE if it
+    exists, otherwise the keyword prior.
+    """
+    global _shared_model
+    with _shared_lock:
+        if _shared_model is None:
+            _shared_model = RelevanceModel.prior()
+            if os.path.exists(RELEVANCE_MODEL_FILE):
+                try:
+                    _shared_model = RelevanceModel.load(RELEVANCE_MODEL_FILE)
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning(f"Using the keyword prior; cannot load {RELEVANCE_MODEL_FILE}: {e}")
+        return _shared_model
+
+
+def load_labels(exports_dir: str) -> Dict[str, str]:
+    """
+    Normalised URL -> extracted name of every service and product page in the exports.
+
+    Args:
+        exports_dir: Directory holding services.csv and products.csv
+    """
+    labels = {}
+    for filename, name_column in (('services.csv', 'service_name'), ('products.csv', 'product_name')):
+        path = Path(exports_dir) / filename
+        if not path.exists():
+            continue
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                if row.get('url'):
+                    labels.setdefault(normalize_url(row['url']), row.get(name_column) or '')
+    return labels
+
+
+def training_examples(labels: Dict[str, str], raw_data_files: Iterable[Path]) -> List[Tuple[LinkContext, int]]:
+    """
+    Labelled links for train().
+
+    Links stored with researched pages (raw_data.json) are positive when they
+    point at an exported service or product page and negative otherwise.
+    Exported pages no stored link points at are added as positives, with their
+    extracted name standing in for the anchor text.
+    """
+    examples = []
+    seen: Set[str] = set()
+    for path in raw_data_files:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                links = json.load(f).get('links') or []
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping {path}: {e}")
+            continue
+        last = max(len(links) - 1, 1)
+        for i, link in enumerate(links):
+            key = normalize_url(link['url'])
+            seen.add(key)
+            examples.append((LinkContext(link['url'], link.get('text') or '', i / last), int(key in labels)))
+    for url, name in labels.items():
+        if url not in seen:
+            examples.append((LinkContext(url, name), 1))
+    return examples
+
+
+def train(examples: Sequence[Tuple[LinkContext, int]], epochs: int = 20, learning_rate: float = 0.1,
+          l2: float = 1e-4, seed: int = 0) -> RelevanceModel:
+    """
+    Fit a RelevanceModel with stochastic gradient descent on the log loss.
+
+    Positive and negative examples are weighted so each class contributes
+    equally, since service/product pages are a minority of a site's links.
+
+    Args:
+        examples: (link, label) pairs, label 1 for a service/product page
+        epochs: Passes over the examples
+        learning_rate: SGD step size
+        l2: L2 penalty on the touched weights
+        seed: Shuffle seed, for reproducible models
+    """
+    positives = sum(label for _, label in examples)
+    negatives = len(examples) - positives
+    if not positives or not negatives:
+        raise ValueError(f"Need both positive and negative examples (got {positives} and {negatives})")
+    class_weight = {1: len(examples) / (2 * positives), 0: len(examples) / (2 * negatives)}
+
+    model = RelevanceModel()
+    weights = model.weights
+    rows = [(link_features(link), label) for link, label in examples]
+    rng = random.Random(seed)
+    for _ in range(epochs):
+        rng.shuffle(rows)
+        for features, label in rows:
+            z = model.bias
+            for i in features:
+                z += weights[i]
+            gradient = (_sigmoid(z) - label) * class_weight[label]
+            model.bias -= learning_rate * gradient
+            for i in features:
+                weights[i] -= learning_rate * (gradient + l2 * weights[i])
+    return model
@@ -0,0 +1,151 @@
+"""
+Adaptive crawl stopping once a vendor site stops yielding new information.
+
+A site crawl used to walk every filtered URL, although on large vendor sites
+the services, products and technologies are usually all mentioned within the
+first few dozen pages and the rest of the crawl only finds them again. A
+SaturationTracker is shown what the extractor found on each page, counts the
+items it had not seen before on this site (the page's marginal yield) and
+reports the site as saturated once the mean yield over the last `window`
+pages falls below `min_yield`.
+
+Each stop decision is logged together with the site's yield curve (cumulative
+distinct items after every page) so the thresholds can be tuned; with
+CRAWL_YIELD_LOG set, one JSON line per crawl is also appended to that file.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from ..utils.metrics import CRAWL_STOPS
+
+logger = logging.getLogger(__name__)
+
+# Pages the marginal yield is averaged over
+WINDOW = int(os.getenv('CRAWL_SATURATION_WINDOW', '10'))
+
+# Stop when fewer new items than this per page were found over the window
+MIN_YIELD = float(os.getenv('CRAWL_SATURATION_MIN_YIELD', '0.5'))
+
+# Never stop a crawl before this many pages
+MIN_PAGES = int(os.getenv('CRAWL_SATURATION_MIN_PAGES', '20'))
+
+# Set CRAWL_SATURATION=0 to always crawl every filtered URL
+ENABLED = os.getenv('CRAWL_SATURATION', '1') != '0'
+
+# JSON-lines file receiving each crawl's stop decision and yield curve ('' disables)
+YIELD_LOG = os.getenv('CRAWL_YIELD_LOG', '')
+
+_log_lock = threading.Lock()
+
+
+def _key(value: str) -> str:
+    return ' '.join(value.split()).casefold()
+
+
+class SaturationTracker:
+    """Marginal extraction yield of one site crawl."""
+
+    def __init__(self, site: str, window: int = WINDOW, min_yield: float = MIN_YIELD,
+                 min_pages: int = MIN_PAGES, enabled: bool = ENABLED):
+        """
+        Args:
+            site: Site being crawled (for logs)
+            window: Pages the marginal yield is averaged over
+            min_yield: Saturated once the mean new items per page over the window is below this
+            min_pages: Pages to crawl before the site can be reported saturated
+            enabled: False tracks yield but never reports saturation
+        """
+        self.site = site
+        self.window = max(window, 1)
+        self.min_yield = min_yield
+        self.min_pages = max(min_pages, self.window)
+        self.enabled = enabled
+        self.pages = 0
+        self.seen: Dict[str, set] = {}
+        self.curve: List[int] = []          # distinct items after each page
+        self.recent: deque = deque(maxlen=self.window)
+        self.stopped_at: Optional[int] = None
+
+    @property
+    def total(self) -> int:
+        """Distinct items found so far."""
+        return sum(len(values) for values in self.seen.values())
+
+    @property
+    def marginal_yield(self) -> float:
+        """Mean new items per page over the last window pages."""
+        return sum(self.recent) / len(self.recent) if self.recent else 0.0
+
+    def observe(self, items: Mapping[str, Iterable[str]]) -> int:
+        """
+        Record what was extracted from the next page.
+
+        Args:
+            items: Item kind ('service', 'technology', ...) -> values found on the page
+
+        Returns:
+            Number of items not seen on earlier pages
+        """
+        new = 0
+        for kind, values in items.items():
+            seen = self.seen.setdefault(kind, set())
+            for value in values or ():
+                key = _key(value)
+                if key and key not in seen:
+                    seen.add(key)
+                    new += 1
+        self.pages += 1
+        self.recent.append(new)
+        self.curve.append(self.total)
+        return new
+
+    def saturated(self) -> bool:
+        """True once the crawl should stop; logs the decision the first time."""
+        if self.stopped_at is not None:
+            return True
+        if not self.enabled or self.pages < self.min_pages or self.marginal_yield >= self.min_yield:
+            return False
+        self.stopped_at = self.pages
+        CRAWL_STOPS.inc(reason='saturated')
+        logger.info(f"Stopping crawl of {self.site} after {self.pages} pages: "
+                    f"{self.marginal_yield:.2f} new items/page over the last {len(self.recent)} "
+                    f"(threshold {self.min_yield}), {self.total} items found")
+        return True
+
+    def summary(self, remaining: int = 0) -> Dict[str, Any]:
+        """Stop decision and yield curve of the crawl."""
+        return {
+            'site': self.site,
+            'pages': self.pages,
+            'stopped_early': self.stopped_at is not None,
+            'pages_skipped': remaining if self.stopped_at is not None else 0,
+            'items': {kind: len(values) for kind, values in self.seen.items()},
+            'marginal_yield': round(self.marginal_yield, 3),
+            'window': self.window,
+            'min_yield': self.min_yield,
+            'curve': self.curve,
+        }
+
+    def finish(self, remaining: int = 0, path: str = YIELD_LOG) -> Dict[str, Any]:
+        """
+        Log the crawl's yield curve (and append it to the yield log, if configured).
+
+        Args:
+            remaining: URLs left unfetched when the crawl ended
+            path: JSON-lines file to append to ('' to skip)
+        """
+        summary = self.summary(remaining)
+        if self.stopped_at is None:
+            CRAWL_STOPS.inc(reason='exhausted')
+        logger.info(f"Yield curve for {self.site}: {self.curve}")
+        if path:
+            record = dict(summary, finished_at=time.time())
+            with _log_lock, open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + '\n')
+        return summary
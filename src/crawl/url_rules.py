@@ -0,0 +1,342 @@
+"""
+Compiled URL classification for crawl filtering.
+
+The scrapers decided which links to follow with a handful of separate checks
+per URL (blog? legal page? non-English? login page? document?), each lowering
+the URL again and looping over its own keyword list. On sites with tens of
+thousands of anchors that loop dominated link discovery.
+
+A UrlRuleSet compiles all of its rules into one matcher:
+
+- keywords and segment prefixes go into a single regular expression whose
+  lookahead finds every (possibly overlapping) occurrence in one scan;
+- whole path segments, file extensions, schemes, query parameter names and
+  subdomain labels are dictionary lookups;
+
+each mapping to a bitmask of the rules it triggers. classify() parses the URL
+once, ORs the masks together and returns the decision (crawl or skip), the
+deciding category and a priority in one call. Results are cached, since the
+same navigation links appear on every page of a site.
+
+Rules match the URL's path and query, never its host, so a keyword such as
+'news' does not reject every page of technews.com. Rule sets can be adjusted
+per vendor through a JSON file (URL_RULES_FILE); see rules_for().
+"""
+
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass, fields, replace
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Per-vendor rule overrides, keyed by host (see rules_for)
+URL_RULES_FILE = os.getenv('URL_RULES_FILE', 'url_rules.json')
+
+# Classifications cached per rule set
+CACHE_SIZE = 65536
+
+# scheme, host, path, query, fragment (RFC 3986, appendix B)
+_URL_PARTS = re.compile(r'^(?:([^:/?#]+):)?(?://([^/?#]*))?([^?#]*)(?:\?([^#]*))?(?:#(.*))?', re.DOTALL)
+
+# Port at the end of a netloc (an IPv6 literal ends in ']', not a port)
+_PORT = re.compile(r':\d*$')
+
+# Language path segments of non-English site sections
+NON_ENGLISH_CODES = (
+    'de', 'fr', 'es', 'it', 'pt', 'ru', 'ja', 'ko', 'zh', 'ar', 'sv', 'no', 'fi', 'nl', 'da', 'pl', 'cs',
+    'hu', 'ro', 'bg', 'hr', 'sk', 'sl', 'et', 'lv', 'lt', 'el', 'tr', 'he', 'th', 'vi', 'id', 'ms', 'tl',
+)
+
+
+@dataclass(frozen=True)
+class UrlRule:
+    """
+    One URL category and the parts of a URL that identify it.
+
+    A URL matches the rule if any one of the listed parts matches.
+    """
+    name: str
+    keywords: Tuple[str, ...] = ()    # substrings of the lowercased path and query
+    prefixes: Tuple[str, ...] = ()    # start of a path segment ('login' matches /login and /login.php)
+    segments: Tuple[str, ...] = ()    # whole path segments ('de' matches /de/ and /de)
+    extensions: Tuple[str, ...] = ()  # file extensions of the last path segment, without the dot
+    schemes: Tuple[str, ...] = ()     # URL schemes ('mailto')
+    params: Tuple[str, ...] = ()      # query parameter names
+    subdomains: Tuple[str, ...] = ()  # leftmost host label ('de' matches de.example.com)
+    has_query: bool = False           # any query string
+    has_fragment: bool = False        # any #fragment
+    skip: bool = False                # matching URLs are not crawled
+    priority: int = 0                 # added to the priority of matching URLs
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'UrlRule':
+        names = {field.name for field in fields(cls)}
+        values = {key: tuple(value) if isinstance(value, list) else value
+                  for key, value in data.items() if key in names}
+        return cls(**values)
+
+
+class UrlClass(NamedTuple):
+    """Classification of one URL."""
+    crawl: bool
+    category: str              # skip rule that rejected the URL, else its highest-priority rule, else 'page'
+    priority: int
+    matched: Tuple[str, ...]   # names of every rule the URL matched
+
+
+# Built-in rules; rule sets refer to them by name
+RULES: Dict[str, UrlRule] = {rule.name: rule for rule in (
+    UrlRule('non_http', schemes=('javascript', 'mailto', 'tel', 'data', 'ftp'), skip=True),
+    UrlRule('account', prefixes=('login', 'signup', 'register', 'logout', 'search', 'cart', 'checkout',
+                                 'account', 'wp-admin', 'admin', 'dashboard'), skip=True),
+    UrlRule('document', extensions=('pdf', 'doc', 'docx', 'xls', 'xlsx', 'zip', 'rar', 'tar', 'gz'), skip=True),
+    UrlRule('fragment', has_fragment=True, skip=True),
+    UrlRule('query', has_query=True, skip=True),
+    UrlRule('blog', prefixes=('blog', 'news', 'article', 'post', 'press-release'), skip=True),
+    UrlRule('legal', prefixes=('privacy', 'terms', 'accessibility', 'cookie', 'legal', 'disclaimer',
+                               'sitemap', 'contact'), skip=True),
+    UrlRule('locale', segments=NON_ENGLISH_CODES, subdomains=NON_ENGLISH_CODES, skip=True),
+    UrlRule('offering', segments=('products', 'services', 'solutions'), priority=10),
+)}
+
+
+class UrlRuleSet:
+    """A compiled set of URL rules."""
+
+    def __init__(self, rules: Iterable[UrlRule], require: Iterable[str] = (), same_host: bool = True):
+        """
+        Args:
+            rules: Rules to apply; skip rules are checked in the order given
+            require: Rule names of which a URL must match at least one to be crawled
+            same_host: With a base URL, reject URLs on other sites (hosts other than the
+                base host, its www. alias and its subdomains; ports are ignored)
+        """
+        self.rules: Tuple[UrlRule, ...] = tuple(rules)
+        self.require: Tuple[str, ...] = tuple(require)
+        self.same_host = same_host
+        self._compile()
+        self._cached = lru_cache(maxsize=CACHE_SIZE)(self._classify)
+
+    @classmethod
+    def named(cls, names: Sequence[str], require: Iterable[str] = (), same_host: bool = True) -> 'UrlRuleSet':
+        """Rule set made of built-in RULES."""
+        return cls((RULES[name] for name in names), require, same_host)
+
+    def _compile(self):
+        self._bit = {rule.name: 1 << i for i, rule in enumerate(self.rules)}
+        missing = [name for name in self.require if name not in self._bit]
+        if missing:
+            raise ValueError(f"Required URL rules not in the rule set: {', '.join(missing)}")
+        self._require_mask = sum(self._bit[name] for name in self.require)
+        self._skip_mask = sum(self._bit[rule.name] for rule in self.rules if rule.skip)
+        self._decisions: Dict[int, UrlClass] = {}
+
+        keywords: Dict[str, int] = {}
+        self._segments: Dict[str, int] = {}
+        self._extensions: Dict[str, int] = {}
+        self._schemes: Dict[str, int] = {}
+        self._params: Dict[str, int] = {}
+        self._subdomains: Dict[str, int] = {}
+        self._query_mask = self._fragment_mask = 0
+        for rule in self.rules:
+            bit = self._bit[rule.name]
+            for keyword in rule.keywords:
+                keywords[keyword.lower()] = keywords.get(keyword.lower(), 0) | bit
+            for prefix in rule.prefixes:
+                keyword = '/' + prefix.lower()
+                keywords[keyword] = keywords.get(keyword, 0) | bit
+            for table, values in ((self._segments, rule.segments), (self._extensions, rule.extensions),
+                                  (self._schemes, rule.schemes), (self._params, rule.params),
+                                  (self._subdomains, rule.subdomains)):
+                for value in values:
+                    table[value.lower()] = table.get(value.lower(), 0) | bit
+            if rule.has_query:
+                self._query_mask |= bit
+            if rule.has_fragment:
+                self._fragment_mask |= bit
+
+        # The lookahead matches at every position; at each one the longest
+        # keyword wins, so each keyword also carries the rules of the shorter
+        # keywords it starts with
+        self._keyword_masks = {}
+        for keyword in keywords:
+            mask = 0
+            for other, other_mask in keywords.items():
+                if keyword.startswith(other):
+                    mask |= other_mask
+            self._keyword_masks[keyword] = mask
+        self._keyword_pattern = None
+        if keywords:
+            alternatives = '|'.join(re.escape(keyword) for keyword in sorted(keywords, key=len, reverse=True))
+            self._keyword_pattern = re.compile(f'(?=({alternatives}))')
+
+    def classify(self, url: str, base_url: Optional[str] = None) -> UrlClass:
+        """
+        Classify a URL.
+
+        Args:
+            url: Absolute URL to classify
+            base_url: Site being crawled; URLs on other sites are rejected as 'external'
+        """
+        return self._cached(url, _host(base_url) if base_url and self.same_host else None)
+
+    def allows(self, url: str, base_url: Optional[str] = None) -> bool:
+        """True if the URL should be crawled."""
+        return self.classify(url, base_url).crawl
+
+    def filter(self, urls: Iterable[str], base_url: Optional[str] = None) -> List[str]:
+        """Crawlable URLs, highest priority first (ties keep their order)."""
+        kept = []
+        for url in urls:
+            result = self.classify(url, base_url)
+            if result.crawl:
+                kept.append((-result.priority, len(kept), url))
+        kept.sort()
+        return [url for _, _, url in kept]
+
+    def _classify(self, url: str, base_host: Optional[str]) -> UrlClass:
+        # One regex match instead of urlsplit(), which dominated the cost of a classification
+        scheme, host, path, query, fragment = _URL_PARTS.match(url).groups()
+        mask = self._schemes.get(scheme.lower(), 0) if scheme and self._schemes else 0
+        if mask & self._skip_mask:
+            return self._decide(mask)
+        host = (host or '').lower()
+        if base_host is not None:
+            site_host = _site_host(host)
+            if site_host != base_host and not site_host.endswith('.' + base_host):
+                return _EXTERNAL
+
+        path = path.lower() or '/'
+        if query:
+            mask |= self._query_mask
+        if fragment is not None:
+            mask |= self._fragment_mask
+        if self._keyword_pattern is not None:
+            target = f"{path}?{query.lower()}" if query else path
+            for keyword in self._keyword_pattern.findall(target):
+                mask |= self._keyword_masks[keyword]
+        if self._segments or self._extensions:
+            segments = path.split('/')
+            if self._segments:
+                for segment in segments:
+                    if segment in self._segments:
+                        mask |= self._segments[segment]
+            if self._extensions and '.' in segments[-1]:
+                mask |= self._extensions.get(segments[-1].rsplit('.', 1)[1], 0)
+        if self._params and query:
+            for name, _ in parse_qsl(query, keep_blank_values=True):
+                mask |= self._params.get(name.lower(), 0)
+        if self._subdomains and host.count('.') >= 2:
+            mask |= self._subdomains.get(host.split('.', 1)[0], 0)
+
+        return self._decide(mask)
+
+    def _decide(self, mask: int) -> UrlClass:
+        # Few distinct rule combinations occur, so decisions are memoised per mask
+        result = self._decisions.get(mask)
+        if result is None:
+            result = self._decisions[mask] = self._decide_mask(mask)
+        return result
+
+    def _decide_mask(self, mask: int) -> UrlClass:
+        matched = tuple(rule.name for rule in self.rules if mask & self._bit[rule.name])
+        priority = sum(rule.priority for rule in self.rules if mask & self._bit[rule.name])
+        if mask & self._skip_mask:
+            category = next(rule.name for rule in self.rules if rule.skip and mask & self._bit[rule.name])
+            return UrlClass(False, category, priority, matched)
+        if self._require_mask and not mask & self._require_mask:
+            return UrlClass(False, 'unmatched', priority, matched)
+        best = max((rule for rule in self.rules if mask & self._bit[rule.name]),
+                   key=lambda rule: rule.priority, default=None)
+        return UrlClass(True, best.name if best else 'page', priority, matched)
+
+    def with_overrides(self, config: Dict[str, Any]) -> 'UrlRuleSet':
+        """
+        Copy of the rule set adjusted by a vendor's configuration.
+
+        Keys: "disable" (rule names to drop), "rules" (rule definitions; one
+        named like an existing rule replaces it), "require" (replaces the
+        required rule names) and "priorities" ({rule name: priority}).
+        """
+        disabled = set(config.get('disable', ()))
+        added = [UrlRule.from_dict(data) for data in config.get('rules', ())]
+        replaced = {rule.name: rule for rule in added}
+        priorities = config.get('priorities', {})
+        rules = [replaced.pop(rule.name, rule) for rule in self.rules if rule.name not in disabled]
+        rules.extend(rule for rule in added if rule.name in replaced)
+        rules = [replace(rule, priority=priorities[rule.name]) if rule.name in priorities else rule
+                 for rule in rules]
+        names = {rule.name for rule in rules}
+        require = [name for name in config.get('require', self.require) if name in names]
+        return UrlRuleSet(rules, require, self.same_host)
+
+
+_EXTERNAL = UrlClass(False, 'external', 0, ())
+
+
+@lru_cache(maxsize=1024)
+def _host(url: str) -> str:
+    return _site_host(urlsplit(url).netloc.lower())
+
+
+def _site_host(netloc: str) -> str:
+    """Host of a lowercased netloc without user info, port or a leading 'www.'."""
+    host = _PORT.sub('', netloc.rpartition('@')[2])
+    return _without_www(host)
+
+
+def _without_www(host: str) -> str:
+    return host[4:] if host.startswith('www.') else host
+
+
+# Links worth following at all: web pages on the same site
+LINK_RULES = UrlRuleSet.named(('non_http', 'account', 'document'))
+
+# Pages of a vendor site worth scraping: also no anchors or query-string variants
+PAGE_RULES = UrlRuleSet.named(('non_http', 'account', 'document', 'fragment', 'query'))
+
+# English product/service pages, skipping blogs and legal pages
+OFFERING_RULES = UrlRuleSet.named(('non_http', 'document', 'blog', 'legal', 'locale', 'offering'),
+                                  require=('offering',))
+
+_vendor_config: Optional[Dict[str, Dict[str, Any]]] = None
+_vendor_rules: Dict[Tuple[str, int], UrlRuleSet] = {}
+
+
+def load_vendor_config(path: str = URL_RULES_FILE) -> Dict[str, Dict[str, Any]]:
+    """Per-vendor overrides from the rules file, keyed by host without 'www.' ({} if there is none)."""
+    global _vendor_config
+    if _vendor_config is None:
+        _vendor_config = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    _vendor_config = {_without_www(host.lower()): overrides
+                                      for host, overrides in json.load(f).items()}
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring URL rules file {path}: {e}")
+    return _vendor_config
+
+
+def rules_for(base_url: str, rule_set: UrlRuleSet = PAGE_RULES) -> UrlRuleSet:
+    """
+    The rule set to crawl a vendor site with.
+
+    Applies the site's entry in URL_RULES_FILE, for example
+    {"example.com": {"disable": ["legal"], "rules": [{"name": "careers",
+    "prefixes": ["careers", "jobs"], "skip": true}]}}; sites without an entry
+    get rule_set unchanged.
+    """
+    host = _host(base_url)
+    overrides = load_vendor_config().get(host)
+    if not overrides:
+        return rule_set
+    key = (host, id(rule_set))
+    if key not in _vendor_rules:
+        _vendor_rules[key] = rule_set.with_overrides(overrides)
+    return _vendor_rules[key]
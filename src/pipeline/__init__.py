@@ -0,0 +1,3 @@
+"""
+Staged fetch/process/persist pipeline shared by the CLI, the web app and the scrapers.
+"""
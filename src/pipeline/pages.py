@@ -0,0 +1,87 @@
+"""
+Process-stage functions shared by the scrapers.
+
+The scrapers each carried their own copy of "parse the page, find the title and
+the main content". These are the common versions, written as module-level
+functions so Pipeline can run them in worker processes; scrapers that need a
+variant pass a functools.partial (e.g. a different text separator).
+"""
+
+from typing import Any, Dict, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from ..crawl.canonical import read_annotations
+from ..processors.content_processor import ContentProcessor, VendorInfo
+from ..processors.records import PageRecord
+from ..scrapers.web_scraper import extract_page
+from ..utils.metrics import PARSE_SECONDS
+
+# Elements tried in order for a page's main content before falling back to <body>
+MAIN_CONTENT_SELECTORS = (
+    'main', 'article', '.content', '#content', '.main-content',
+    '.page-content', '.post-content', '.entry-content',
+    '.services', '.products', '.solutions'
+)
+
+# One ContentProcessor per worker process, built on first use
+_processor: Optional[ContentProcessor] = None
+
+
+def page_text(fetched: Any) -> str:
+    """HTML of a fetch result, whether a FetchResult or plain text."""
+    return fetched if isinstance(fetched, str) else fetched.text
+
+
+def main_content(soup: BeautifulSoup, separator: str = '\n') -> str:
+    """Text of the page's main content area, or of the whole body if none is marked up."""
+    for selector in MAIN_CONTENT_SELECTORS:
+        element = soup.select_one(selector)
+        if element:
+            return element.get_text(separator=separator, strip=True)
+
+    body = soup.find('body')
+    if body:
+        return body.get_text(separator=separator, strip=True)
+
+    return ""
+
+
+def parse_html_page(url: str, fetched: Any, separator: str = '\n', main_only: bool = True,
+                    component: str = 'pipeline', annotations: bool = False) -> Dict[str, Any]:
+    """
+    Parse a fetched page into its title and main-content text.
+
+    Args:
+        url: URL the page was fetched from
+        fetched: FetchResult or HTML text
+        separator: Joins the text of adjacent elements ('\n' keeps one block per line)
+        main_only: Keep only the main content area; False keeps the text of the whole page
+        component: Label for the parse-time metric
+        annotations: Also return the page's canonical and hreflang links as a
+            PageAnnotations under 'annotations' (see src/crawl/canonical.py)
+
+    Returns:
+        Dict with url, title and content
+    """
+    with PARSE_SECONDS.time(component=component):
+        soup = BeautifulSoup(page_text(fetched), 'html.parser')
+    title = soup.find('title')
+
+    page = {
+        'url': url,
+        'title': title.get_text().strip() if title else "",
+        'content': main_content(soup, separator) if main_only else soup.get_text(separator=separator, strip=True)
+    }
+    if annotations:
+        page['annotations'] = read_annotations(soup, url)
+    return page
+
+
+def research_page(url: str, fetched: Any) -> Tuple[PageRecord, VendorInfo]:
+    """Extract a vendor home page into its PageRecord and VendorInfo (the CLI's process stage)."""
+    global _processor
+    if _processor is None:
+        _processor = ContentProcessor()
+    record = extract_page(url, fetched)
+    return record, _processor.extract_vendor_info(record)
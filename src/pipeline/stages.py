@@ -0,0 +1,456 @@
+"""
+Fetch -> process -> persist pipeline with separately sized stages.
+
+Every scraper used to run one loop per site: fetch a page, parse it, extract
+from it, save it, then move on to the next URL, so the CPU sat idle while a
+page downloaded and the network sat idle while a page was parsed. Pipeline runs
+the three kinds of work as stages connected by bounded queues:
+
+- fetch: an asyncio event loop on its own thread keeps up to `fetch_workers`
+  fetches in flight. Blocking fetchers (curl, requests) run on a thread pool of
+  the same size; coroutine functions are awaited directly. The per-host rate
+  limiter inside the fetcher still spaces requests to the same site.
+- process: parsing and extraction run in a pool of `process_workers` processes,
+  so BeautifulSoup and trafilatura do not contend for the GIL. With 0 workers
+  they run on a thread of this process instead, for small runs and callables
+  that cannot be pickled.
+- persist: results come back to the caller's own thread in batches of
+  `batch_size`, so SQLite connections and other thread-bound state can be used
+  there directly and writes can be committed once per batch.
+
+The bounded queues give backpressure: a slow persist stage stalls processing,
+which stalls fetching, instead of the whole crawl piling up in memory. Each
+stage records its time per item, its outcomes and the time it spent blocked on
+a full downstream queue; a stage that is mostly blocked is waiting on the stage
+after it, which is the one to resize. Sizes default to the PIPELINE_*
+environment variables, so moving a bottleneck is a configuration change.
+"""
+
+import asyncio
+import inspect
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Set, Tuple
+
+from ..utils.metrics import PIPELINE_BLOCKED_SECONDS, PIPELINE_ITEMS, PIPELINE_STAGE_SECONDS, QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+FETCH = 'fetch'
+PROCESS = 'process'
+PERSIST = 'persist'
+
+# Stage sizes; see PipelineConfig
+FETCH_WORKERS = int(os.getenv('PIPELINE_FETCH_WORKERS', '8'))
+PROCESS_WORKERS = int(os.getenv('PIPELINE_PROCESS_WORKERS', str(min(4, os.cpu_count() or 1))))
+BATCH_SIZE = int(os.getenv('PIPELINE_BATCH_SIZE', '20'))
+QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', '64'))
+FLUSH_INTERVAL = float(os.getenv('PIPELINE_FLUSH_INTERVAL', '1.0'))
+
+# Seconds between stop checks while a stage waits on a queue
+_POLL = 0.1
+
+# End of the item stream, passed down the queues
+_END = object()
+
+
+@dataclass
+class PipelineConfig:
+    """Per-stage sizing."""
+    fetch_workers: int = FETCH_WORKERS
+    process_workers: int = PROCESS_WORKERS
+    batch_size: int = BATCH_SIZE
+    queue_size: int = QUEUE_SIZE
+    flush_interval: float = FLUSH_INTERVAL
+
+
+@dataclass
+class PipelineResult:
+    """
+    One URL's trip through the pipeline.
+
+    `value` is what the process stage returned (the fetch stage's result when
+    the pipeline has no process stage). On failure `stage` names the stage that
+    failed and `fetched` keeps the fetch result so callers can record why;
+    successful results drop it, releasing the page body.
+    """
+    url: str
+    value: Any = None
+    fetched: Any = None
+    error: Optional[str] = None
+    stage: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.value is not None
+
+
+@dataclass
+class PipelineStats:
+    """Item counts for one run."""
+    fetched: int = 0
+    fetch_failed: int = 0
+    processed: int = 0
+    process_failed: int = 0
+    persisted: int = 0
+    batches: int = 0
+    elapsed: float = 0.0
+
+
+def _fetch_error(fetched: Any) -> Optional[str]:
+    """Error text for a failed fetch; fetchers return None or a result whose `ok` is false."""
+    if fetched is None:
+        return 'fetch failed'
+    if getattr(fetched, 'ok', True) is False:
+        return getattr(fetched, 'error', None) or getattr(fetched, 'failure', None) or 'fetch failed'
+    return None
+
+
+def _call_stage(process: Callable[[str, Any], Any], url: str, fetched: Any) -> Tuple[Any, Optional[str], float]:
+    """Run a process callable, returning (value, error, seconds); runs inside the worker process."""
+    start = time.perf_counter()
+    try:
+        value, error = process(url, fetched), None
+    except Exception as e:
+        value, error = None, f"{type(e).__name__}: {e}"
+    return value, error, time.perf_counter() - start
+
+
+class _Run:
+    """Queues, threads and counters of a single Pipeline run."""
+
+    def __init__(self, pipeline: 'Pipeline', stats: PipelineStats):
+        self.pipeline = pipeline
+        self.name = pipeline.name
+        self.stats = stats
+        self.process_queue: queue.Queue = queue.Queue(pipeline.config.queue_size)
+        self.persist_queue: queue.Queue = queue.Queue(pipeline.config.queue_size)
+        self.stopped = threading.Event()
+        self.failure: Optional[BaseException] = None
+        self.threads: List[threading.Thread] = []
+
+    def start(self, source: Iterable[str]):
+        for stage, target, args in ((FETCH, self.pipeline._fetch_stage, (self, source)),
+                                    (PROCESS, self.pipeline._process_stage, (self,))):
+            thread = threading.Thread(target=self._guard, args=(target, args),
+                                      name=f"{self.name}-{stage}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def _guard(self, target, args):
+        try:
+            target(*args)
+        except BaseException as e:
+            logger.exception(f"Pipeline {self.name} stage failed")
+            self.failure = self.failure or e
+            self.stopped.set()
+
+    def stop(self):
+        self.stopped.set()
+        for thread in self.threads:
+            thread.join()
+
+    def _queue_label(self, q: queue.Queue) -> str:
+        return f"{self.name}:{PROCESS if q is self.process_queue else PERSIST}"
+
+    def put(self, q: queue.Queue, item: Any, stage: str) -> bool:
+        """Put with backpressure; False if the run was stopped first."""
+        start = time.perf_counter()
+        while not self.stopped.is_set():
+            try:
+                q.put(item, timeout=_POLL)
+                break
+            except queue.Full:
+                continue
+        else:
+            return False
+        PIPELINE_BLOCKED_SECONDS.inc(time.perf_counter() - start, pipeline=self.name, stage=stage)
+        QUEUE_DEPTH.set(q.qsize(), queue=self._queue_label(q))
+        return True
+
+    async def put_async(self, q: queue.Queue, item: Any, stage: str) -> bool:
+        """put() for the fetch stage's event loop, which must not block."""
+        start = time.perf_counter()
+        while not self.stopped.is_set():
+            try:
+                q.put_nowait(item)
+                break
+            except queue.Full:
+                await asyncio.sleep(_POLL / 10)
+        else:
+            return False
+        PIPELINE_BLOCKED_SECONDS.inc(time.perf_counter() - start, pipeline=self.name, stage=stage)
+        QUEUE_DEPTH.set(q.qsize(), queue=self._queue_label(q))
+        return True
+
+    def get(self, q: queue.Queue, timeout: float = _POLL) -> Any:
+        """Next item, None on timeout, or _END once the stream ends or the run stops."""
+        try:
+            item = q.get(timeout=timeout)
+        except queue.Empty:
+            return _END if self.stopped.is_set() else None
+        QUEUE_DEPTH.set(q.qsize(), queue=self._queue_label(q))
+        return item
+
+
+class Pipeline:
+    """
+    Fetches URLs, processes each page and hands the results back in batches.
+
+    `fetch(url)` returns a fetch result (a FetchResult, the page text, ...) or
+    None; results whose `ok` is false count as failed and skip processing.
+    `process(url, fetched)` turns a fetched page into whatever the caller
+    persists. With process workers it must be picklable: a module-level
+    function or a functools.partial of one. Metrics it records inside a worker
+    process stay in that process; the pipeline's own stage metrics do not.
+
+    A Pipeline can be reused for many runs, including concurrent ones; the
+    process pool is started on first use and shared by them.
+    """
+
+    def __init__(self, fetch: Callable[[str], Any], process: Optional[Callable[[str, Any], Any]] = None,
+                 config: Optional[PipelineConfig] = None, name: str = 'pipeline'):
+        """
+        Args:
+            fetch: Blocking function or coroutine function fetching one URL
+            process: Parses/extracts a fetched page; None passes fetch results straight to persist
+            config: Stage sizes; defaults come from the PIPELINE_* environment variables
+            name: Label for the pipeline's metrics and threads
+        """
+        self.fetch = fetch
+        self.process = process
+        self.config = config or PipelineConfig()
+        self.name = name
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_futures: Set[Future] = set()  # Unfinished work of the current pool
+        self._pool_lock = threading.Lock()
+
+    def run(self, source: Iterable[str], sink: Callable[[List[PipelineResult]], None]) -> PipelineStats:
+        """
+        Push every URL through the pipeline, calling sink with each batch of results.
+
+        Returns:
+            PipelineStats for the run
+        """
+        stats = PipelineStats()
+        for batch in self.iter_batches(source, stats):
+            sink(batch)
+        return stats
+
+    def iter_batches(self, source: Iterable[str],
+                     stats: Optional[PipelineStats] = None) -> Iterator[List[PipelineResult]]:
+        """
+        Push every URL through the pipeline, yielding batches of results as they complete.
+
+        The caller's loop body is the persist stage. Results arrive in fetch
+        completion order, not source order. Closing the generator early stops
+        the run once in-flight fetches return.
+
+        Args:
+            source: URLs to fetch; consumed lazily, so it may be a generator
+            stats: Filled in with the run's counts if given
+        """
+        run = _Run(self, stats if stats is not None else PipelineStats())
+        start = time.perf_counter()
+        run.start(source)
+        try:
+            yield from self._persist_stage(run)
+        finally:
+            run.stop()
+            run.stats.elapsed = time.perf_counter() - start
+            QUEUE_DEPTH.set(0, queue=f"{self.name}:{PROCESS}")
+            QUEUE_DEPTH.set(0, queue=f"{self.name}:{PERSIST}")
+        if run.failure is not None:
+            raise run.failure
+
+    def close(self):
+        """Shut down the process pool."""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+    def __enter__(self) -> 'Pipeline':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    # Fetch stage
+
+    def _fetch_stage(self, run: _Run, source: Iterable[str]):
+        asyncio.run(self._fetch_all(run, source))
+        run.put(run.process_queue, _END, FETCH)
+
+    async def _fetch_all(self, run: _Run, source: Iterable[str]):
+        workers = max(1, self.config.fetch_workers)
+        urls: asyncio.Queue = asyncio.Queue(workers)
+        executor = None
+        if not inspect.iscoroutinefunction(self.fetch):
+            executor = ThreadPoolExecutor(workers, thread_name_prefix=f"{self.name}-{FETCH}")
+        tasks = [asyncio.create_task(self._fetch_worker(run, urls, executor)) for _ in range(workers)]
+        try:
+            for url in source:
+                if run.stopped.is_set():
+                    break
+                await urls.put(url)
+            for _ in tasks:
+                await urls.put(_END)
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            if executor is not None:
+                executor.shutdown(wait=True)
+
+    async def _fetch_worker(self, run: _Run, urls: asyncio.Queue, executor: Optional[ThreadPoolExecutor]):
+        loop = asyncio.get_running_loop()
+        while True:
+            url = await urls.get()
+            if url is _END:
+                return
+            if run.stopped.is_set():
+                continue
+            start = time.perf_counter()
+            try:
+                if executor is None:
+                    fetched = await self.fetch(url)
+                else:
+                    fetched = await loop.run_in_executor(executor, self.fetch, url)
+                error = _fetch_error(fetched)
+            except Exception as e:
+                fetched, error = None, f"{type(e).__name__}: {e}"
+            PIPELINE_STAGE_SECONDS.observe(time.perf_counter() - start, pipeline=self.name, stage=FETCH)
+            PIPELINE_ITEMS.inc(pipeline=self.name, stage=FETCH, outcome='error' if error else 'ok')
+            if error:
+                run.stats.fetch_failed += 1
+                item = PipelineResult(url, fetched=fetched, error=error, stage=FETCH)
+            else:
+                run.stats.fetched += 1
+                item = PipelineResult(url, fetched=fetched)
+            await run.put_async(run.process_queue, item, FETCH)
+
+    # Process stage
+
+    def _process_stage(self, run: _Run):
+        # Submitted work is handed downstream in submission order; the window
+        # bounds how far the workers run ahead of a slow persist stage
+        window = max(1, 2 * self.config.process_workers)
+        in_flight: deque = deque()
+        ended = False
+        while True:
+            while in_flight and (ended or len(in_flight) >= window or in_flight[0][1] is None
+                                 or in_flight[0][1].done()):
+                item, future = in_flight.popleft()
+                if future is not None:
+                    self._complete(run, item, future)
+                if not run.put(run.persist_queue, item, PROCESS):
+                    return
+            if ended:
+                break
+            item = run.get(run.process_queue)
+            if item is None:
+                continue
+            if item is _END:
+                ended = True
+                continue
+            in_flight.append((item, self._submit(run, item)))
+        run.put(run.persist_queue, _END, PROCESS)
+
+    def _submit(self, run: _Run, item: PipelineResult) -> Optional[Future]:
+        """Start processing an item; returns None if it was handled on this thread."""
+        if item.error:
+            return None
+        if self.process is None:
+            item.value, item.fetched = item.fetched, None
+            return None
+        if self.config.process_workers <= 0:
+            self._finish(run, item, *_call_stage(self.process, item.url, item.fetched))
+            return None
+        try:
+            future = self._get_pool().submit(_call_stage, self.process, item.url, item.fetched)
+        except BrokenProcessPool as e:
+            self._reset_pool()
+            self._finish(run, item, None, f"BrokenProcessPool: {e}", 0.0)
+            return None
+        with self._pool_lock:
+            futures = self._pool_futures
+            futures.add(future)
+        future.add_done_callback(futures.discard)
+        return future
+
+    def _complete(self, run: _Run, item: PipelineResult, future: Future):
+        try:
+            value, error, seconds = future.result()
+        except BrokenProcessPool as e:
+            # A worker died (e.g. out of memory); later items get a fresh pool
+            self._reset_pool()
+            value, error, seconds = None, f"BrokenProcessPool: {e}", 0.0
+        except Exception as e:
+            value, error, seconds = None, f"{type(e).__name__}: {e}", 0.0
+        self._finish(run, item, value, error, seconds)
+
+    def _finish(self, run: _Run, item: PipelineResult, value: Any, error: Optional[str], seconds: float):
+        PIPELINE_STAGE_SECONDS.observe(seconds, pipeline=self.name, stage=PROCESS)
+        if error:
+            outcome = 'error'
+            run.stats.process_failed += 1
+            item.error, item.stage = error, PROCESS
+            logger.warning(f"Processing {item.url} failed: {error}")
+        else:
+            outcome = 'ok' if value is not None else 'empty'
+            run.stats.processed += 1
+            item.value, item.fetched = value, None
+        PIPELINE_ITEMS.inc(pipeline=self.name, stage=PROCESS, outcome=outcome)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.config.process_workers)
+            return self._pool
+
+    def _reset_pool(self):
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+            futures, self._pool_futures = self._pool_futures, set()
+        if pool is not None:
+            # Not shutdown(cancel_futures=True), which needs Python 3.9
+            for future in list(futures):
+                future.cancel()
+            pool.shutdown(wait=False)
+
+    # Persist stage
+
+    def _persist_stage(self, run: _Run) -> Iterator[List[PipelineResult]]:
+        batch: List[PipelineResult] = []
+        deadline = 0.0
+        while True:
+            timeout = min(_POLL, max(0.001, deadline - time.monotonic())) if batch else _POLL
+            item = run.get(run.persist_queue, timeout=timeout)
+            if item is _END:
+                break
+            if item is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.config.flush_interval
+                batch.append(item)
+            if batch and (len(batch) >= self.config.batch_size or time.monotonic() >= deadline):
+                yield from self._hand_off(run, batch)
+                batch = []
+        if batch and run.failure is None:
+            yield from self._hand_off(run, batch)
+
+    def _hand_off(self, run: _Run, batch: List[PipelineResult]) -> Iterator[List[PipelineResult]]:
+        start = time.perf_counter()
+        yield batch
+        PIPELINE_STAGE_SECONDS.observe(time.perf_counter() - start, pipeline=self.name, stage=PERSIST)
+        PIPELINE_ITEMS.inc(len(batch), pipeline=self.name, stage=PERSIST, outcome='ok')
+        run.stats.persisted += len(batch)
+        run.stats.batches += 1
@@ -0,0 +1,103 @@
+"""
+Cross-page boilerplate detection for vendor sites.
+
+Headers, navigation menus, cookie banners and footers repeat on every page of
+a site. BoilerplateModel fingerprints the text blocks of each page and treats
+blocks that appear on most pages as boilerplate, so they can be dropped before
+extraction and storage.
+"""
+
+import hashlib
+import re
+from collections import Counter
+from typing import Dict, Iterable, List
+
+_WHITESPACE = re.compile(r'\s+')
+_DIGITS = re.compile(r'\d+')
+
+
+def split_blocks(text: str) -> List[str]:
+    """Split page text into non-empty blocks (one per line or paragraph)."""
+    if not text:
+        return []
+    return [block.strip() for block in text.split('\n') if block.strip()]
+
+
+def fingerprint(block: str) -> int:
+    """
+    Hash a text block after normalising case, whitespace and digits.
+
+    Digits are dropped so that copyright years, counters and dates do not make
+    otherwise identical footer blocks look different.
+    """
+    normalized = _DIGITS.sub('', _WHITESPACE.sub(' ', block.lower())).strip()
+    digest = hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+class BoilerplateModel:
+    """Per-vendor model of text blocks repeated across a site's pages."""
+
+    def __init__(self, threshold: float = 0.5, min_pages: int = 3):
+        """
+        Args:
+            threshold: Fraction of pages a block must appear on to be boilerplate
+            min_pages: Pages that must be seen before anything is classified
+        """
+        self.threshold = threshold
+        self.min_pages = min_pages
+        self.pages_seen = 0
+        self.block_counts: Counter = Counter()
+
+    def add_page(self, blocks: Iterable[str]):
+        """Record the blocks of one page (each distinct block counts once)."""
+        self.block_counts.update({fingerprint(block) for block in blocks})
+        self.pages_seen += 1
+
+    def is_boilerplate(self, block: str) -> bool:
+        """Check whether a block repeats on enough pages to be boilerplate."""
+        if self.pages_seen < self.min_pages:
+            return False
+        return self.block_counts[fingerprint(block)] >= self.threshold * self.pages_seen
+
+    def strip(self, blocks: List[str]) -> List[str]:
+        """
+        Remove boilerplate blocks from a page.
+
+        A page is returned unchanged if every block on it is boilerplate, so
+        single-block pages and exact duplicates are never emptied.
+        """
+        kept = [block for block in blocks if not self.is_boilerplate(block)]
+        return kept if kept else blocks
+
+    def clean_text(self, text: str) -> str:
+        """Remove boilerplate blocks from newline-separated page text."""
+        return '\n'.join(self.strip(split_blocks(text)))
+
+
+def remove_boilerplate(pages: List[Dict], key: str = 'content', **model_kwargs) -> Dict[str, int]:
+    """
+    Fit a boilerplate model on a site's pages and strip it from each page in place.
+
+    Args:
+        pages: Page dictionaries from one vendor site
+        key: Name of the text field to clean
+        **model_kwargs: Passed through to BoilerplateModel
+
+    Returns:
+        Dictionary with the number of pages seen and bytes removed
+    """
+    model = BoilerplateModel(**model_kwargs)
+    page_blocks = [split_blocks(page.get(key) or '') for page in pages]
+    for blocks in page_blocks:
+        model.add_page(blocks)
+
+    removed_bytes = 0
+    for page, blocks in zip(pages, page_blocks):
+        kept = model.strip(blocks)
+        if len(kept) < len(blocks):
+            cleaned = '\n'.join(kept)
+            removed_bytes += len(page[key]) - len(cleaned)
+            page[key] = cleaned
+
+    return {'pages': model.pages_seen, 'removed_bytes': removed_bytes}
@@ -3,38 +3,44 @@ Content processor for analyzing and organizing scraped vendor information.
 """
 
 import re
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple, Union
 from dataclasses import dataclass
 from datetime import datetime
 import json
 
+from ..utils.metrics import EXTRACTION_SECONDS
+from .records import PageRecord, intern_str, intern_tags, slotted
+
+@slotted
 @dataclass
 class VendorInfo:
-    """Structured vendor information."""
+    """
+    Structured vendor information.
+    
+    Slotted, with tag lists stored as tuples of interned strings: a batch of
+    thousands of vendors shares one copy of 'Python', 'Aws' or 'Consulting'.
+    """
     name: str
     website: str
     description: Optional[str] = None
     contact_info: Dict[str, str] = None
-    services: List[str] = None
+    services: Tuple[str, ...] = ()
     pricing_info: Optional[str] = None
-    technology_stack: List[str] = None
-    case_studies: List[str] = None
-    certifications: List[str] = None
+    technology_stack: Tuple[str, ...] = ()
+    case_studies: Tuple[str, ...] = ()
+    certifications: Tuple[str, ...] = ()
     social_links: Dict[str, str] = None
     
     def __post_init__(self):
         if self.contact_info is None:
             self.contact_info = {}
-        if self.services is None:
-            self.services = []
-        if self.technology_stack is None:
-            self.technology_stack = []
-        if self.case_studies is None:
-            self.case_studies = []
-        if self.certifications is None:
-            self.certifications = []
+        self.services = intern_tags(self.services)
+        self.technology_stack = intern_tags(self.technology_stack)
+        self.case_studies = intern_tags(self.case_studies)
+        self.certifications = intern_tags(self.certifications)
         if self.social_links is None:
             self.social_links = {}
+        self.social_links = {intern_str(platform): url for platform, url in self.social_links.items()}
 
 class ContentProcessor:
     """Processes scraped content to extract vendor information."""
@@ -44,12 +50,13 @@ class ContentProcessor:
         self.phone_pattern = re.compile(r'(\+?1[-.\s]?)?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})')
         self.price_pattern = re.compile(r'\$[\d,]+(?:\.\d{2})?(?:\s*(?:per|/)\s*(?:month|year|hour|day))?', re.IGNORECASE)
         
-    def extract_vendor_info(self, scraped_data: Dict) -> VendorInfo:
+    @EXTRACTION_SECONDS.time(extractor='content_processor')
+    def extract_vendor_info(self, scraped_data: Union[PageRecord, Dict]) -> VendorInfo:
         """
         Extract structured vendor information from scraped content.
         
         Args:
-            scraped_data: Dictionary containing scraped content
+            scraped_data: Scraped page (PageRecord or dict with the same keys)
             
         Returns:
             VendorInfo object with extracted information
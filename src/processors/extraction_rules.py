@@ -0,0 +1,249 @@
+"""
+Time-bounded execution of the extractors' regex patterns.
+
+The service/product extractors run a few dozen backtracking patterns over every
+page. Some of them are superlinear on the wrong input: 'Why choose[^?]*\\?...'
+rescans the rest of the page from every "Why choose" when no '?' follows, and
+'([^.]{50,200}\\.)' retries 200 characters from every position of a page
+without full stops. Concatenated get_text(strip=True) output is exactly that
+kind of input, and a single such page could hold an extraction worker for
+minutes.
+
+A RuleRunner runs the patterns instead of calling re directly:
+
+- with google-re2 installed (EXTRACTION_REGEX_ENGINE=auto or re2), patterns
+  RE2 accepts run on its linear-time engine; patterns it rejects (lookaheads,
+  backreferences) fall back to re.
+- patterns on re are run over chunks of at most EXTRACTION_CHUNK_CHARS
+  characters, cut after a newline or full stop where possible, so the
+  backtracking of one call is bounded by the chunk rather than the page.
+- every page has a time budget (EXTRACTION_PAGE_BUDGET seconds, summed over
+  all patterns run on it within a run); once it is used up the page's remaining
+  pattern runs return no matches and are counted as skipped.
+
+Within `with runner.run() as stats:` the time and matches of every pattern
+are recorded; stats.slowest() lists the patterns that cost the most, and the
+run logs them when it ends.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..utils.metrics import EXTRACTION_BUDGET_SKIPS
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+logger = logging.getLogger(__name__)
+
+# 'auto' uses RE2 when google-re2 is installed, 're2' requires it, 're' never uses it
+ENGINE = os.getenv('EXTRACTION_REGEX_ENGINE', 'auto')
+
+# Longest piece of a page a backtracking pattern is run over at once
+CHUNK_CHARS = int(os.getenv('EXTRACTION_CHUNK_CHARS', '20000'))
+
+# Pattern time allowed per page within a run (0 disables the budget)
+PAGE_BUDGET = float(os.getenv('EXTRACTION_PAGE_BUDGET', '2.0'))
+
+# Patterns listed by RunStats.format() and the end-of-run log
+SLOWEST_REPORTED = 5
+
+# re flags RE2 understands, as inline flags
+_RE2_FLAGS = {re.IGNORECASE: 'i', re.DOTALL: 's', re.MULTILINE: 'm'}
+
+
+@dataclass
+class RuleStats:
+    """Cost of one pattern within a run."""
+    calls: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    matches: int = 0
+    skipped: int = 0
+    engine: str = 're'
+
+
+@dataclass
+class RunStats:
+    """Pattern timings and budget overruns of one extraction run."""
+    name: str
+    rules: Dict[str, RuleStats] = field(default_factory=dict)
+    page_seconds: Dict[int, float] = field(default_factory=dict)  # hash of page text -> pattern time
+    pages_over_budget: int = 0
+
+    @property
+    def seconds(self) -> float:
+        return sum(stats.seconds for stats in self.rules.values())
+
+    @property
+    def skipped(self) -> int:
+        return sum(stats.skipped for stats in self.rules.values())
+
+    def merge(self, other: 'RunStats') -> None:
+        """Add the pattern timings of another run (e.g. one from a worker process) to this one."""
+        for pattern, theirs in other.rules.items():
+            stats = self.rules.setdefault(pattern, RuleStats(engine=theirs.engine))
+            stats.calls += theirs.calls
+            stats.seconds += theirs.seconds
+            stats.max_seconds = max(stats.max_seconds, theirs.max_seconds)
+            stats.matches += theirs.matches
+            stats.skipped += theirs.skipped
+        self.pages_over_budget += other.pages_over_budget
+
+    def slowest(self, n: int = SLOWEST_REPORTED) -> List[Tuple[str, RuleStats]]:
+        """The n patterns with the most total time, slowest first."""
+        return sorted(self.rules.items(), key=lambda item: item[1].seconds, reverse=True)[:n]
+
+    def format(self, n: int = SLOWEST_REPORTED) -> str:
+        """Human-readable report of the slowest patterns."""
+        lines = [f"{self.name}: {len(self.rules)} patterns, {self.seconds:.3f}s total, "
+                 f"{self.pages_over_budget} pages over budget, {self.skipped} pattern runs skipped"]
+        for pattern, stats in self.slowest(n):
+            lines.append(f"  {stats.seconds:8.3f}s  max {stats.max_seconds:.3f}s  {stats.calls:6d} calls  "
+                         f"{stats.skipped:4d} skipped  [{stats.engine}] {_shorten(pattern)}")
+        return '\n'.join(lines)
+
+
+def _shorten(pattern: str, width: int = 80) -> str:
+    return pattern if len(pattern) <= width else pattern[:width - 3] + '...'
+
+
+@lru_cache(maxsize=1024)
+def compile_rule(pattern: str, flags: int = 0, engine: str = ENGINE) -> Tuple[Any, str]:
+    """
+    Compile a pattern on the requested engine.
+
+    Returns:
+        (compiled pattern, 're2' or 're')
+    """
+    if engine != 're' and re2 is not None and not flags & ~sum(_RE2_FLAGS):
+        inline = ''.join(letter for flag, letter in _RE2_FLAGS.items() if flags & flag)
+        try:
+            return re2.compile(f'(?{inline}){pattern}' if inline else pattern), 're2'
+        except Exception:
+            logger.debug(f"RE2 rejected {pattern!r}; using re")
+    elif engine == 're2' and re2 is None:
+        raise RuntimeError('EXTRACTION_REGEX_ENGINE=re2 but google-re2 is not installed')
+    return re.compile(pattern, flags), 're'
+
+
+def chunks(text: str, size: int = CHUNK_CHARS) -> Iterator[str]:
+    """Split text into pieces of at most size characters, after a newline or full stop where possible."""
+    start = 0
+    while len(text) - start > size:
+        end = start + size
+        cut = text.rfind('\n', start + size // 2, end)
+        if cut < 0:
+            cut = text.rfind('.', start + size // 2, end)
+        cut = cut + 1 if cut >= 0 else end
+        yield text[start:cut]
+        start = cut
+    yield text[start:]
+
+
+class RuleRunner:
+    """Runs extraction patterns within per-page time budgets and records their cost."""
+
+    def __init__(self, name: str, budget: float = PAGE_BUDGET, chunk_chars: int = CHUNK_CHARS,
+                 engine: str = ENGINE):
+        """
+        Args:
+            name: Name for logs and metrics (the extractor using the runner)
+            budget: Pattern seconds allowed per page within a run (0 disables)
+            chunk_chars: Longest piece of a page a backtracking pattern is run over
+            engine: 'auto', 're2' or 're'
+        """
+        self.name = name
+        self.budget = budget
+        self.chunk_chars = max(chunk_chars, 1)
+        self.engine = engine
+        self._local = threading.local()
+
+    @contextmanager
+    def run(self, name: Optional[str] = None) -> Iterator[RunStats]:
+        """Record pattern timings and per-page budgets for the calls made in this thread until exit."""
+        stats = RunStats(name or self.name)
+        previous = getattr(self._local, 'run', None)
+        self._local.run = stats
+        try:
+            yield stats
+        finally:
+            self._local.run = previous
+            if stats.rules:
+                logger.info(f"Slowest extraction patterns\n{stats.format()}")
+
+    def findall(self, pattern: str, text: str, flags: int = 0, chunked: bool = True) -> List[Any]:
+        """re.findall() within the page's budget; [] once the budget is used up."""
+        results = []
+        for compiled, piece in self._pieces(pattern, text, flags, chunked):
+            results.extend(self._timed(pattern, text, compiled, 'findall', piece))
+        return results
+
+    def search(self, pattern: str, text: str, flags: int = 0, chunked: bool = True) -> Optional[Any]:
+        """re.search() within the page's budget; None once the budget is used up."""
+        for compiled, piece in self._pieces(pattern, text, flags, chunked):
+            match = self._timed(pattern, text, compiled, 'search', piece)
+            if match is not None:
+                return match
+        return None
+
+    def _pieces(self, pattern, text, flags, chunked):
+        compiled, engine = compile_rule(pattern, flags, self.engine)
+        stats = self._rule_stats(pattern, engine)
+        if not text:
+            return
+        if engine == 're2' or not chunked or len(text) <= self.chunk_chars:
+            pieces = (text,)
+        else:
+            pieces = chunks(text, self.chunk_chars)
+        for piece in pieces:
+            if self._over_budget(text):
+                if stats is not None:
+                    stats.skipped += 1
+                EXTRACTION_BUDGET_SKIPS.inc(runner=self.name)
+                return
+            yield compiled, piece
+
+    def _timed(self, pattern, text, compiled, method, piece):
+        start = time.perf_counter()
+        result = getattr(compiled, method)(piece)
+        elapsed = time.perf_counter() - start
+        run = getattr(self._local, 'run', None)
+        if run is not None:
+            stats = run.rules[pattern]
+            stats.calls += 1
+            stats.seconds += elapsed
+            stats.max_seconds = max(stats.max_seconds, elapsed)
+            stats.matches += len(result) if method == 'findall' else result is not None
+            key = hash(text)
+            spent = run.page_seconds.get(key, 0.0)
+            run.page_seconds[key] = spent + elapsed
+            if self.budget and spent < self.budget <= spent + elapsed:
+                run.pages_over_budget += 1
+                logger.warning(f"{self.name}: page of {len(text)} chars used up its {self.budget}s pattern "
+                               f"budget (last pattern {_shorten(pattern)!r}); skipping its remaining patterns")
+        return result
+
+    def _rule_stats(self, pattern: str, engine: str) -> Optional[RuleStats]:
+        run = getattr(self._local, 'run', None)
+        if run is None:
+            return None
+        stats = run.rules.get(pattern)
+        if stats is None:
+            stats = run.rules[pattern] = RuleStats(engine=engine)
+        return stats
+
+    def _over_budget(self, text: str) -> bool:
+        run = getattr(self._local, 'run', None)
+        if not self.budget or run is None:
+            return False
+        return run.page_seconds.get(hash(text), 0.0) >= self.budget
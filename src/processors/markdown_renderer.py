@@ -0,0 +1,193 @@
+"""
+Markdown rendering of trafilatura extraction trees.
+
+Scrape results used to get their Markdown by running markdownify over the text
+trafilatura had already extracted: a second HTML parse (BeautifulSoup) of a
+string that no longer had any structure, so headings, lists and tables came out
+as plain paragraphs. trafilatura keeps the structure of the main content in the
+tree it extracts (`Document.body`, requested with include_formatting=True):
+
+    <head rend="h2">, <p>, <hi rend="#b">, <ref target="...">, <list rend="ul">,
+    <item>, <table>, <row>, <cell role="head">, <quote>, <code>, <lb/>, <graphic>
+
+render_markdown() walks that tree once and writes ATX-heading Markdown, with no
+further parsing. Only the element API shared by lxml and xml.etree is used.
+"""
+
+import re
+from typing import Any, List
+
+# <head rend="h3"> -> '###'; headings without a level are rendered as h2, like trafilatura does
+DEFAULT_HEADING_LEVEL = 2
+
+# <hi rend="..."> -> Markdown emphasis
+EMPHASIS = {'#b': '**', '#i': '*', '#u': '__', '#t': '`'}
+
+# Elements rendered as blocks of their own; everything else is inline
+BLOCK_TAGS = frozenset({'head', 'p', 'list', 'table', 'quote', 'code', 'graphic'})
+
+_ESCAPE = re.compile(r'([*_])')
+_SPACES = re.compile(r'[ \t\r\f\v]+')
+
+
+def render_markdown(tree: Any) -> str:
+    """
+    Render an extraction tree as Markdown.
+
+    Args:
+        tree: trafilatura extraction tree (Document.body) or any subtree of it
+
+    Returns:
+        Markdown with ATX headings; blocks are separated by blank lines
+    """
+    blocks: List[str] = []
+    _render_blocks(tree, blocks)
+    return '\n\n'.join(blocks)
+
+
+def _render_blocks(element: Any, blocks: List[str]) -> None:
+    """Append the Markdown blocks of element's children (and loose text) to blocks."""
+    _add_paragraph(blocks, element.text)
+    for child in element:
+        tag = child.tag
+        if tag == 'head':
+            _add_heading(blocks, child)
+        elif tag == 'p':
+            _add_paragraph(blocks, _inline(child))
+        elif tag == 'list':
+            _add_block(blocks, '\n'.join(_list_lines(child, 0)))
+        elif tag == 'table':
+            _add_block(blocks, _table(child))
+        elif tag == 'quote':
+            quoted = render_markdown(child)
+            _add_block(blocks, '\n'.join(f'> {line}' if line else '>' for line in quoted.split('\n')))
+        elif tag == 'code':
+            _add_block(blocks, _code_block(child))
+        elif tag == 'graphic':
+            _add_block(blocks, _image(child))
+        elif len(child):
+            _render_blocks(child, blocks)
+        else:
+            _add_paragraph(blocks, _inline(child))
+        _add_paragraph(blocks, child.tail)
+
+
+def _add_block(blocks: List[str], block: str) -> None:
+    if block.strip():
+        blocks.append(block)
+
+
+def _add_paragraph(blocks: List[str], text: str) -> None:
+    if text and text.strip():
+        blocks.append(_normalize(text))
+
+
+def _add_heading(blocks: List[str], element: Any) -> None:
+    text = _normalize(_inline(element)).replace('\n', ' ').strip()
+    if not text:
+        return
+    rend = element.get('rend') or ''
+    level = int(rend[1]) if len(rend) == 2 and rend[0] == 'h' and rend[1] in '123456' else DEFAULT_HEADING_LEVEL
+    blocks.append(f"{'#' * level} {text}")
+
+
+def _normalize(text: str) -> str:
+    """Collapse runs of spaces; line breaks (from <lb/>) become Markdown hard breaks."""
+    lines = [_SPACES.sub(' ', line).strip() for line in text.split('\n')]
+    return '  \n'.join(line for line in lines if line)
+
+
+def _escape(text: str) -> str:
+    return _ESCAPE.sub(r'\\\1', text) if text else ''
+
+
+def _inline(element: Any, skip: frozenset = frozenset()) -> str:
+    """Inline Markdown of element's text and children (children tagged in skip are left out)."""
+    parts = [_escape(element.text)]
+    for child in element:
+        if child.tag not in skip:
+            parts.append(_inline_child(child))
+        parts.append(_escape(child.tail))
+    return ''.join(parts)
+
+
+def _inline_child(element: Any) -> str:
+    tag = element.tag
+    if tag == 'lb':
+        return '\n'
+    if tag == 'graphic':
+        return _image(element)
+    if tag == 'code' or (tag == 'hi' and element.get('rend') == '#t'):
+        code = ''.join(element.itertext()).strip()
+        return f'`{code}`' if code else ''
+    text = _inline(element)
+    if tag == 'ref':
+        target = element.get('target')
+        return f'[{text.strip()}]({target})' if target and text.strip() else text
+    mark = EMPHASIS.get(element.get('rend')) if tag == 'hi' else '~~' if tag == 'del' else None
+    if mark and text.strip():
+        # Emphasis markers must touch the text they wrap
+        stripped = text.strip()
+        leading = text[:len(text) - len(text.lstrip())]
+        trailing = text[len(text.rstrip()):]
+        return f'{leading}{mark}{stripped}{mark}{trailing}'
+    if tag in BLOCK_TAGS:
+        return f' {text} '
+    return text
+
+
+def _list_lines(element: Any, depth: int) -> List[str]:
+    """Lines of a (possibly nested) list; nested lists are indented under their item."""
+    ordered = element.get('rend') == 'ol'
+    indent = '  ' * depth
+    lines = []
+    number = 0
+    for item in element:
+        if item.tag != 'item':
+            continue
+        number += 1
+        marker = f'{number}.' if ordered else '-'
+        text = _normalize(_inline(item, skip=frozenset({'list'}))).replace('  \n', ' ')
+        if text:
+            lines.append(f'{indent}{marker} {text}')
+        for child in item:
+            if child.tag == 'list':
+                lines.extend(_list_lines(child, depth + 1))
+    return lines
+
+
+def _table(element: Any) -> str:
+    """Pipe table; the first row is the header row (Markdown tables need one)."""
+    rows = []
+    for row in element.iter('row'):
+        cells = [_normalize(_inline(cell)).replace('  \n', ' ').replace('|', '\\|')
+                 for cell in row if cell.tag == 'cell']
+        if any(cells):
+            rows.append(cells)
+    if not rows:
+        return ''
+    width = max(len(cells) for cells in rows)
+    lines = []
+    for index, cells in enumerate(rows):
+        cells = cells + [''] * (width - len(cells))
+        lines.append('| ' + ' | '.join(cells) + ' |')
+        if index == 0:
+            lines.append('|' + ' --- |' * width)
+    return '\n'.join(lines)
+
+
+def _code_block(element: Any) -> str:
+    code = ''.join(element.itertext()).strip('\n')
+    if not code.strip():
+        return ''
+    if '\n' not in code:
+        return f'`{code.strip()}`'
+    return f'```\n{code}\n```'
+
+
+def _image(element: Any) -> str:
+    src = element.get('src')
+    if not src:
+        return ''
+    alt = ' '.join(filter(None, (element.get('alt'), element.get('title'))))
+    return f'![{alt}]({src})'
@@ -0,0 +1,118 @@
+"""
+Compact record types for scraped pages and their links.
+
+A large research run holds many thousands of pages and tens of thousands of
+links at once, and the same short strings ('Contact', 'Python', the site's nav
+URLs) recur in nearly all of them. Records use __slots__ instead of per-object
+dicts and intern their repeated strings so each distinct value is stored once.
+
+PageRecord and Link also answer dict-style reads (record['url'],
+record.get('links', [])), so code written against the old scrape dicts keeps
+working; to_dict() gives the JSON form.
+"""
+
+import sys
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+def intern_str(value: Optional[str]) -> Optional[str]:
+    """Intern a string so equal values share one object."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def intern_tags(values: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    """De-duplicated tuple of interned tags, in first-seen order."""
+    if not values:
+        return ()
+    return tuple(dict.fromkeys(sys.intern(value) for value in values if value))
+
+
+def slotted(cls: type) -> type:
+    """
+    Give a dataclass __slots__ for its fields, like @dataclass(slots=True) on Python 3.10+.
+
+    Slots can't be declared in the class body next to field defaults, so the
+    class is rebuilt with them after @dataclass has generated its methods (the
+    defaults live on in the generated __init__). Apply it above @dataclass.
+    """
+    names = tuple(field.name for field in fields(cls))
+    namespace = {key: value for key, value in cls.__dict__.items()
+                 if key not in names and key not in ('__dict__', '__weakref__')}
+    namespace['__slots__'] = names
+    slotted_cls = type(cls)(cls.__name__, cls.__bases__, namespace)
+    slotted_cls.__qualname__ = cls.__qualname__
+    return slotted_cls
+
+
+class _FieldAccess:
+    """Read-only mapping access to a slotted record's fields."""
+
+    __slots__ = ()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field.name: getattr(self, field.name) for field in fields(self)}
+
+
+@slotted
+@dataclass
+class Link(_FieldAccess):
+    """An outgoing link found on a page."""
+    url: str
+    text: str = ''
+    title: str = ''
+
+    def __post_init__(self):
+        # Navigation links repeat on every page of a site
+        self.url = sys.intern(self.url)
+        self.text = sys.intern(self.text or '')
+        self.title = sys.intern(self.title or '')
+
+
+@slotted
+@dataclass
+class PageRecord(_FieldAccess):
+    """One scraped page: metadata, extracted content and links."""
+    url: str
+    title: Optional[str] = None
+    author: Optional[str] = None
+    date: Optional[str] = None
+    description: Optional[str] = None
+    content: Optional[str] = None
+    markdown: Optional[str] = None
+    links: Tuple[Link, ...] = ()
+    status_code: Optional[int] = None
+    content_type: Optional[str] = None
+    scraped_at: Optional[float] = None
+
+    def __post_init__(self):
+        self.url = sys.intern(self.url)
+        self.author = intern_str(self.author)
+        self.content_type = intern_str(self.content_type)
+        self.links = tuple(link if isinstance(link, Link) else Link(**link) for link in self.links or ())
+
+    def drop_body(self) -> 'PageRecord':
+        """Release the page text once it has been processed and saved; metadata and links stay."""
+        self.content = self.markdown = None
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = _FieldAccess.to_dict(self)
+        data['links'] = [link.to_dict() for link in self.links]
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'PageRecord':
+        names = {field.name for field in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in names})
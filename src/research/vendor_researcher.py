@@ -5,7 +5,9 @@ Main vendor research application that orchestrates web scraping and content proc
 import os
 import json
 import logging
-from typing import List, Dict, Optional
+import shutil
+import tempfile
+from typing import List, Dict, Optional, Union
 from datetime import datetime
 from pathlib import Path
 
@@ -15,8 +17,13 @@ from rich.table import Table
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.panel import Panel
 
+from ..analytics.tag_index import TagIndex
+from ..crawl.fetch_policy import FetchLog, FetchPolicy
+from ..pipeline.pages import research_page
+from ..pipeline.stages import FETCH, Pipeline
 from ..scrapers.web_scraper import WebScraper
 from ..processors.content_processor import ContentProcessor, VendorInfo
+from ..processors.records import PageRecord
 
 # Load environment variables
 load_dotenv()
@@ -28,6 +35,53 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Vendors shown in the console summary table; the report file lists every vendor
+SUMMARY_TABLE_ROWS = 50
+
+class SummaryReport:
+    """
+    Vendor summary written as vendors are researched.
+    
+    Each vendor's section is appended to a spool file straight away and only the
+    first few rows are kept for the console table, so a batch of thousands of
+    vendors does not hold their records until the end of the run.
+    """
+    
+    def __init__(self, output_dir: Path, table_rows: int = SUMMARY_TABLE_ROWS):
+        self.output_dir = output_dir
+        self.table_rows = table_rows
+        self.rows: List[tuple] = []
+        self.count = 0
+        self._spool = tempfile.TemporaryFile('w+', encoding='utf-8', dir=output_dir)
+    
+    def add(self, vendor: VendorInfo):
+        self.count += 1
+        if len(self.rows) < self.table_rows:
+            self.rows.append((
+                vendor.name,
+                vendor.website,
+                ', '.join(vendor.services[:3]) if vendor.services else 'N/A',
+                ', '.join(vendor.technology_stack[:3]) if vendor.technology_stack else 'N/A',
+                vendor.contact_info.get('email', 'N/A'),
+            ))
+        
+        f = self._spool
+        f.write(f"## {vendor.name}\n")
+        f.write(f"- **Website**: {vendor.website}\n")
+        f.write(f"- **Services**: {', '.join(vendor.services) if vendor.services else 'N/A'}\n")
+        f.write(f"- **Tech Stack**: {', '.join(vendor.technology_stack) if vendor.technology_stack else 'N/A'}\n")
+        f.write(f"- **Contact**: {vendor.contact_info.get('email', 'N/A')}\n\n")
+    
+    def write(self, summary_file: Path):
+        """Write the report header followed by the spooled vendor sections."""
+        with open(summary_file, 'w', encoding='utf-8') as f:
+            f.write(f"# Vendor Research Summary Report\n\n")
+            f.write(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+            f.write(f"Total vendors researched: {self.count}\n\n")
+            self._spool.seek(0)
+            shutil.copyfileobj(self._spool, f)
+        self._spool.close()
+
 class VendorResearcher:
     """Main class for conducting vendor research."""
     
@@ -36,29 +90,50 @@ class VendorResearcher:
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
         
+        # Per-URL fetch outcomes, kept across runs so failures can be retried
+        self.fetch_log = FetchLog(self.output_dir / 'fetch_log.json')
+        
+        # Technology/service/certification tags of every researched vendor, updated as each is extracted
+        self.tag_index = TagIndex(self.output_dir / 'tag_index.db')
+        
         # Initialize components
         self.scraper = WebScraper(
             user_agent=os.getenv('USER_AGENT', 'VendorResearchBot/1.0'),
-            delay=float(os.getenv('REQUEST_DELAY', '1.0'))
+            delay=float(os.getenv('REQUEST_DELAY', '1.0')),
+            fetch_policy=FetchPolicy(log=self.fetch_log)
         )
         self.processor = ContentProcessor()
+        
+        # Vendor home pages are fetched concurrently and extracted in worker processes
+        self.pipeline = Pipeline(self.scraper.fetch, research_page, name='research')
     
-    def research_vendors(self, vendor_urls: List[str]) -> List[VendorInfo]:
+    def research_vendors(self, vendor_urls: List[str], retry_failed: bool = False,
+                         keep_results: bool = True) -> List[VendorInfo]:
         """
         Research multiple vendors by scraping their websites.
         
         Args:
             vendor_urls: List of vendor website URLs to research
+            retry_failed: Skip URLs that were fetched successfully in a previous run
+            keep_results: Return every VendorInfo; pass False for large batches,
+                whose results are only written to disk
             
         Returns:
-            List of VendorInfo objects
+            List of VendorInfo objects (empty if keep_results is False)
         """
+        if retry_failed:
+            skipped = [url for url in vendor_urls if self.fetch_log.succeeded(url)]
+            vendor_urls = [url for url in vendor_urls if not self.fetch_log.succeeded(url)]
+            if skipped:
+                self.console.print(f"[dim]Skipping {len(skipped)} URL(s) already fetched successfully[/dim]")
+        
         self.console.print(Panel.fit(
             f"[bold blue]Starting vendor research for {len(vendor_urls)} vendors[/bold blue]",
             title="Vendor Research Tool"
         ))
         
         vendor_info_list = []
+        summary = SummaryReport(self.output_dir)
         
         with Progress(
             SpinnerColumn(),
@@ -68,38 +143,52 @@ class VendorResearcher:
             
             task = progress.add_task("Researching vendors...", total=len(vendor_urls))
             
-            for i, url in enumerate(vendor_urls, 1):
-                progress.update(task, description=f"Researching vendor {i}/{len(vendor_urls)}: {url}")
-                
-                try:
-                    # Scrape the vendor website
-                    scraped_data = self.scraper.scrape_url(url)
-                    
-                    if scraped_data:
-                        # Process the content
-                        vendor_info = self.processor.extract_vendor_info(scraped_data)
-                        vendor_info_list.append(vendor_info)
-                        
-                        # Save individual results
-                        self._save_vendor_data(vendor_info, scraped_data)
-                        
-                        self.console.print(f"[green]✓[/green] Successfully researched: {vendor_info.name}")
-                    else:
+            # Fetch, extract and save run as separate stages; see src/pipeline/stages.py
+            done = 0
+            for batch in self.pipeline.iter_batches(vendor_urls):
+                for item in batch:
+                    url = item.url
+                    if item.ok:
+                        scraped_data, vendor_info = item.value
+                        try:
+                            summary.add(vendor_info)
+                            if keep_results:
+                                vendor_info_list.append(vendor_info)
+                            self.tag_index.update_vendor(vendor_info.website or url, {
+                                'technology': vendor_info.technology_stack,
+                                'service': vendor_info.services,
+                                'certification': vendor_info.certifications,
+                            })
+                            
+                            # Save individual results
+                            self._save_vendor_data(vendor_info, scraped_data)
+                            
+                            self.console.print(f"[green]✓[/green] Successfully researched: {vendor_info.name}")
+                        except Exception as e:
+                            logger.error(f"Error researching {url}: {e}")
+                            self.console.print(f"[red]✗[/red] Error researching {url}: {e}")
+                    elif item.stage == FETCH:
+                        logger.error(f"Failed to fetch {url}: {item.error}")
                         self.console.print(f"[red]✗[/red] Failed to scrape: {url}")
-                
-                except Exception as e:
-                    logger.error(f"Error researching {url}: {e}")
-                    self.console.print(f"[red]✗[/red] Error researching {url}: {e}")
-                
-                progress.update(task, advance=1)
+                    else:
+                        logger.error(f"Error researching {url}: {item.error}")
+                        self.console.print(f"[red]✗[/red] Error researching {url}: {item.error}")
+                    
+                    done += 1
+                    progress.update(task, advance=1, description=f"Researched vendor {done}/{len(vendor_urls)}: {url}")
+        
+        self.fetch_log.save()
+        self.tag_index.save()
         
         # Generate summary report
-        self._generate_summary_report(vendor_info_list)
+        self._generate_summary_report(summary)
         
         return vendor_info_list
     
-    def _save_vendor_data(self, vendor_info: VendorInfo, scraped_data: Dict):
+    def _save_vendor_data(self, vendor_info: VendorInfo, scraped_data: Union[PageRecord, Dict]):
         """Save vendor data to files."""
+        if isinstance(scraped_data, PageRecord):
+            scraped_data = scraped_data.to_dict()
         vendor_name = vendor_info.name.replace(' ', '_').replace('/', '_')
         vendor_dir = self.output_dir / vendor_name
         vendor_dir.mkdir(exist_ok=True)
@@ -135,7 +224,7 @@ class VendorResearcher:
             with open(vendor_dir / 'content.md', 'w', encoding='utf-8') as f:
                 f.write(scraped_data['markdown'])
     
-    def _generate_summary_report(self, vendor_info_list: List[VendorInfo]):
+    def _generate_summary_report(self, summary: SummaryReport):
         """Generate a summary report of all vendors."""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
@@ -147,34 +236,16 @@ class VendorResearcher:
         table.add_column("Tech Stack", style="yellow")
         table.add_column("Contact", style="magenta")
         
-        for vendor in vendor_info_list:
-            services = ', '.join(vendor.services[:3]) if vendor.services else 'N/A'
-            tech_stack = ', '.join(vendor.technology_stack[:3]) if vendor.technology_stack else 'N/A'
-            contact = vendor.contact_info.get('email', 'N/A')
-            
-            table.add_row(
-                vendor.name,
-                vendor.website,
-                services,
-                tech_stack,
-                contact
-            )
+        for row in summary.rows:
+            table.add_row(*row)
+        if summary.count > len(summary.rows):
+            table.caption = f"First {len(summary.rows)} of {summary.count} vendors"
         
         self.console.print(table)
         
         # Save summary to file
         summary_file = self.output_dir / f"summary_report_{timestamp}.md"
-        with open(summary_file, 'w', encoding='utf-8') as f:
-            f.write(f"# Vendor Research Summary Report\n\n")
-            f.write(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            f.write(f"Total vendors researched: {len(vendor_info_list)}\n\n")
-            
-            for vendor in vendor_info_list:
-                f.write(f"## {vendor.name}\n")
-                f.write(f"- **Website**: {vendor.website}\n")
-                f.write(f"- **Services**: {', '.join(vendor.services) if vendor.services else 'N/A'}\n")
-                f.write(f"- **Tech Stack**: {', '.join(vendor.technology_stack) if vendor.technology_stack else 'N/A'}\n")
-                f.write(f"- **Contact**: {vendor.contact_info.get('email', 'N/A')}\n\n")
+        summary.write(summary_file)
         
         self.console.print(f"\n[green]Summary report saved to: {summary_file}[/green]")
     
@@ -0,0 +1,177 @@
+"""
+Scrape results whose derived fields are computed on demand.
+
+extract_page() used to compute everything for every page: trafilatura content
+and metadata, a markdownify pass over the content and a BeautifulSoup parse of
+the whole document for the links, although most callers only read the content
+and title. A PageResult keeps the fetched HTML and computes each derived field
+the first time it is read, caching the value; fields nobody reads are never
+computed.
+
+Content, metadata and Markdown come from a single trafilatura extraction
+(include_formatting=True, so the extraction tree keeps headings, emphasis,
+lists and tables): the text is trafilatura's own plain-text serialisation of
+the tree and the Markdown is rendered from the same tree by render_markdown(),
+instead of a markdownify pass (another BeautifulSoup parse) over the text.
+Metadata alone, when no content is needed, is still read with the much cheaper
+extract_metadata().
+
+to_record(fields) computes just the requested fields into a compact PageRecord
+(the form results are stored and sent between processes in), leaving the
+others empty.
+"""
+
+import time
+from functools import cached_property
+from typing import Any, Dict, Iterable, Optional, Tuple
+from urllib.parse import urljoin
+
+import trafilatura
+from bs4 import BeautifulSoup
+from trafilatura.utils import normalize_unicode
+from trafilatura.xml import xmltotxt
+
+from ..crawl.fetcher import FetchResult
+from ..crawl.url_rules import LINK_RULES
+from ..processors.markdown_renderer import render_markdown
+from ..processors.records import Link, PageRecord
+from ..utils.metrics import PARSE_SECONDS, TRAFILATURA_SECONDS
+
+# Fields trafilatura reads from the page metadata
+METADATA_FIELDS = ('title', 'author', 'date', 'description')
+
+# Derived fields, in PageRecord order
+DERIVED_FIELDS = METADATA_FIELDS + ('content', 'markdown', 'links')
+
+# Fields read from the extraction tree
+BODY_FIELDS = ('content', 'markdown')
+
+# Fields known from the fetch itself
+FETCH_FIELDS = ('url', 'status_code', 'content_type', 'scraped_at')
+
+
+class PageResult:
+    """A fetched page; title, content, markdown and links are extracted on first access."""
+
+    def __init__(self, url: str, html: str, status_code: Optional[int] = None,
+                 content_type: Optional[str] = None, scraped_at: Optional[float] = None):
+        self.url = url
+        self.html = html
+        self.status_code = status_code
+        self.content_type = content_type
+        self.scraped_at = scraped_at if scraped_at is not None else time.time()
+
+    @classmethod
+    def from_fetch(cls, url: str, response: FetchResult) -> 'PageResult':
+        return cls(url, response.text, response.status, response.content_type)
+
+    @cached_property
+    def document(self) -> Any:
+        """trafilatura Document (metadata and the formatted extraction tree), or None."""
+        with TRAFILATURA_SECONDS.time(component='web_scraper'):
+            return trafilatura.bare_extraction(
+                self.html,
+                include_comments=False,
+                include_tables=True,
+                include_images=False,
+                include_links=True,
+                include_formatting=True,
+                with_metadata=True,
+                as_dict=False
+            )
+
+    @cached_property
+    def content(self) -> Optional[str]:
+        """Main text of the page (trafilatura), with links and tables kept."""
+        if self.document is None or self.document.body is None:
+            return None
+        return normalize_unicode(xmltotxt(self.document.body, False)) or None
+
+    @cached_property
+    def metadata(self) -> Any:
+        """trafilatura metadata (title, author, date, description), or None."""
+        if 'document' in self.__dict__ and self.document is not None:
+            return self.document
+        with TRAFILATURA_SECONDS.time(component='web_scraper'):
+            return trafilatura.extract_metadata(self.html)
+
+    @property
+    def title(self) -> Optional[str]:
+        return self.metadata.title if self.metadata else None
+
+    @property
+    def author(self) -> Optional[str]:
+        return self.metadata.author if self.metadata else None
+
+    @property
+    def date(self) -> Optional[str]:
+        return self.metadata.date if self.metadata else None
+
+    @property
+    def description(self) -> Optional[str]:
+        return self.metadata.description if self.metadata else None
+
+    @cached_property
+    def markdown(self) -> Optional[str]:
+        """The extracted content as Markdown (ATX headings)."""
+        if self.document is None or self.document.body is None:
+            return None
+        return render_markdown(self.document.body) or None
+
+    @cached_property
+    def links(self) -> Tuple[Link, ...]:
+        """Same-site links worth crawling (see LINK_RULES)."""
+        with PARSE_SECONDS.time(component='web_scraper'):
+            soup = BeautifulSoup(self.html, 'html.parser')
+        links = []
+        for anchor in soup.find_all('a', href=True):
+            full_url = urljoin(self.url, anchor['href'])
+            if LINK_RULES.allows(full_url, self.url):
+                links.append(Link(
+                    url=full_url,
+                    text=anchor.get_text(strip=True),
+                    title=anchor.get('title', '')
+                ))
+        return tuple(links)
+
+    def to_record(self, fields: Optional[Iterable[str]] = None) -> PageRecord:
+        """
+        Compact record of the page.
+
+        Args:
+            fields: Derived fields to compute (DERIVED_FIELDS); None computes all.
+                Fields not selected are left empty in the record.
+
+        Returns:
+            PageRecord with the fetch details and the selected fields
+        """
+        selected = DERIVED_FIELDS if fields is None else tuple(fields)
+        unknown = set(selected) - set(DERIVED_FIELDS) - set(FETCH_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown page fields: {', '.join(sorted(unknown))}")
+        if not set(selected).isdisjoint(BODY_FIELDS):
+            # Extract first so the metadata fields reuse the extraction's metadata
+            self.document
+        return PageRecord(
+            url=self.url,
+            status_code=self.status_code,
+            content_type=self.content_type,
+            scraped_at=self.scraped_at,
+            **{name: getattr(self, name) for name in DERIVED_FIELDS if name in selected}
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON form with every field computed."""
+        return self.to_record().to_dict()
+
+    # Dict-style reads, like PageRecord
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in DERIVED_FIELDS or key in FETCH_FIELDS else default
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in DERIVED_FIELDS and key not in FETCH_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in DERIVED_FIELDS or key in FETCH_FIELDS
@@ -1,25 +1,43 @@
 """
-Web scraper using trafilatura and markdownify for clean content extraction.
+Web scraper using trafilatura for clean content extraction.
 """
 
 import requests
-import trafilatura
-from markdownify import markdownify as md
-from bs4 import BeautifulSoup
-from typing import Dict, Optional, List
-import time
+from functools import partial
+from typing import Iterable, Optional, List
 import logging
-from urllib.parse import urljoin, urlparse
 import os
 
+from ..crawl.fetch_policy import FetchPolicy, shared_fetch_policy
+from ..crawl.fetcher import DEFAULT_MAX_BYTES, FetchResult, fetch_with_requests
+from ..crawl.rate_limiter import HostRateLimiter, shared_rate_limiter
+from ..crawl.url_rules import LINK_RULES
+from ..pipeline.stages import Pipeline
+from ..processors.records import PageRecord
+from .page_result import PageResult
+
 logger = logging.getLogger(__name__)
 
 class WebScraper:
     """Web scraper that extracts clean content using trafilatura and converts to markdown."""
     
-    def __init__(self, user_agent: str = None, delay: float = 1.0):
+    def __init__(self, user_agent: str = None, delay: float = 1.0, rate_limiter: Optional[HostRateLimiter] = None,
+                 fetch_policy: Optional[FetchPolicy] = None, max_bytes: Optional[int] = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            user_agent: User-Agent header to send
+            delay: Minimum seconds between requests to the same host (0 disables rate limiting)
+            rate_limiter: Per-host limiter; defaults to the process-wide shared limiter
+            fetch_policy: Retry/circuit-breaker policy; defaults to the process-wide shared policy
+            max_bytes: Pages larger than this are skipped (None for no limit)
+        """
         self.user_agent = user_agent or os.getenv('USER_AGENT', 'VendorResearchBot/1.0')
         self.delay = delay
+        if rate_limiter is None and delay > 0:
+            rate_limiter = shared_rate_limiter()
+        self.rate_limiter = rate_limiter
+        self.fetch_policy = fetch_policy or shared_fetch_policy()
+        self.max_bytes = max_bytes
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': self.user_agent,
@@ -29,7 +47,23 @@ class WebScraper:
             'Connection': 'keep-alive',
         })
     
-    def scrape_url(self, url: str) -> Optional[Dict]:
+    def fetch(self, url: str) -> FetchResult:
+        """
+        Fetch a page, retrying transient failures.
+        
+        Non-HTML and oversized responses are rejected from their headers
+        without downloading the body.
+        """
+        return fetch_with_requests(
+            self.session,
+            url,
+            rate_limiter=self.rate_limiter,
+            min_interval=self.delay,
+            policy=self.fetch_policy,
+            max_bytes=self.max_bytes
+        )
+    
+    def scrape_url(self, url: str) -> Optional[PageResult]:
         """
         Scrape a single URL and extract clean content.
         
@@ -37,117 +71,71 @@ class WebScraper:
             url: The URL to scrape
             
         Returns:
-            Dictionary with extracted content, metadata, and markdown
+            PageResult; content, metadata, markdown and links are extracted
+            when first read (to_record() keeps them once the HTML is no longer needed)
         """
         try:
             logger.info(f"Scraping URL: {url}")
             
-            # Add delay between requests
-            if self.delay > 0:
-                time.sleep(self.delay)
-            
-            # Fetch the page
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            
-            html_content = response.text
-            
-            # Extract content using trafilatura
-            extracted_content = trafilatura.extract(
-                html_content,
-                include_comments=False,
-                include_tables=True,
-                include_images=False,
-                include_links=True
-            )
-            
-            # Extract metadata
-            metadata = trafilatura.extract_metadata(html_content)
-            
-            # Convert to markdown if content was extracted
-            markdown_content = None
-            if extracted_content:
-                # Use markdownify to convert HTML to markdown
-                markdown_content = md(extracted_content, heading_style="ATX")
-            
-            # Extract links for potential further crawling
-            soup = BeautifulSoup(html_content, 'html.parser')
-            links = []
-            for link in soup.find_all('a', href=True):
-                href = link['href']
-                full_url = urljoin(url, href)
-                if self._is_valid_link(full_url, url):
-                    links.append({
-                        'url': full_url,
-                        'text': link.get_text(strip=True),
-                        'title': link.get('title', '')
-                    })
+            response = self.fetch(url)
+            if not response.ok:
+                logger.error(f"Failed to fetch {url}: {response.error}")
+                return None
             
-            result = {
-                'url': url,
-                'title': metadata.title if metadata else None,
-                'author': metadata.author if metadata else None,
-                'date': metadata.date if metadata else None,
-                'description': metadata.description if metadata else None,
-                'content': extracted_content,
-                'markdown': markdown_content,
-                'links': links,
-                'status_code': response.status_code,
-                'content_type': response.headers.get('content-type', ''),
-                'scraped_at': time.time()
-            }
+            result = PageResult.from_fetch(url, response)
             
             logger.info(f"Successfully scraped {url}")
             return result
             
-        except requests.RequestException as e:
-            logger.error(f"Request error for {url}: {e}")
-            return None
         except Exception as e:
             logger.error(f"Error scraping {url}: {e}")
             return None
     
     def _is_valid_link(self, link_url: str, base_url: str) -> bool:
         """Check if a link is valid for crawling."""
-        try:
-            parsed_link = urlparse(link_url)
-            parsed_base = urlparse(base_url)
-            
-            # Skip external links
-            if parsed_link.netloc != parsed_base.netloc:
-                return False
-            
-            # Skip common non-content URLs
-            skip_patterns = [
-                '/login', '/signup', '/register', '/logout',
-                '/search', '/cart', '/checkout', '/account',
-                '.pdf', '.doc', '.docx', '.xls', '.xlsx',
-                '.zip', '.rar', '.tar', '.gz',
-                'javascript:', 'mailto:', 'tel:'
-            ]
-            
-            for pattern in skip_patterns:
-                if pattern in link_url.lower():
-                    return False
-            
-            return True
-            
-        except Exception:
-            return False
+        return is_valid_link(link_url, base_url)
     
-    def scrape_multiple_urls(self, urls: List[str]) -> List[Dict]:
+    def scrape_multiple_urls(self, urls: List[str], fields: Optional[Iterable[str]] = None) -> List[PageRecord]:
         """
-        Scrape multiple URLs.
+        Scrape multiple URLs, fetching and extracting them concurrently.
         
         Args:
             urls: List of URLs to scrape
+            fields: Derived fields to extract, e.g. ('title', 'content') to skip the
+                markdown conversion and link parsing; None extracts everything
             
         Returns:
-            List of scraped content dictionaries
+            List of scraped PageRecords, in the order they finished; fields not
+            selected are left empty
         """
         results = []
-        for url in urls:
-            result = self.scrape_url(url)
-            if result:
-                results.append(result)
+        with Pipeline(self.fetch, partial(extract_page, fields=fields), name='web_scraper') as pipeline:
+            for batch in pipeline.iter_batches(urls):
+                for item in batch:
+                    if item.ok:
+                        results.append(item.value)
+                    else:
+                        logger.error(f"Error scraping {item.url}: {item.error}")
         return results
+
+
+def extract_page(url: str, response: FetchResult, fields: Optional[Iterable[str]] = None) -> PageRecord:
+    """
+    Extract content, metadata, markdown and links from a fetched page.
+    
+    A module-level function so pipeline worker processes can run it.
+    
+    Args:
+        url: URL the page was fetched from
+        response: Successful fetch of the page
+        fields: Derived fields to compute (see page_result.DERIVED_FIELDS); None computes all
+        
+    Returns:
+        PageRecord for the page
+    """
+    return PageResult.from_fetch(url, response).to_record(fields)
+
+
+def is_valid_link(link_url: str, base_url: str) -> bool:
+    """Check if a link is valid for crawling (a same-site web page; see src/crawl/url_rules.py)."""
+    return LINK_RULES.allows(link_url, base_url)
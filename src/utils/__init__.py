@@ -0,0 +1,3 @@
+"""
+Shared utility modules for vendor research.
+"""
@@ -0,0 +1,93 @@
+"""
+Incremental JSON writers for documents too large to build in memory.
+
+Each generator yields text chunks as items are consumed, so a caller can write
+them to a file or an HTTP response without ever holding the whole document.
+"""
+
+import json
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, Optional
+
+
+def _serialize(item: Any, raw: bool, indent: Optional[int], ensure_ascii: bool,
+               default: Optional[Callable]) -> str:
+    """Serialize one item, or pass it through if it is already JSON text."""
+    if raw:
+        return item
+    return json.dumps(item, indent=indent, ensure_ascii=ensure_ascii, default=default)
+
+
+def iter_json_array(items: Iterable[Any], indent: Optional[int] = None, ensure_ascii: bool = True,
+                    default: Optional[Callable] = None, raw: bool = False) -> Iterator[str]:
+    """
+    Yield a JSON array chunk by chunk.
+
+    With an indent the output is byte-for-byte what json.dumps would produce
+    for the equivalent list.
+
+    Args:
+        items: Items to encode (consumed lazily)
+        indent: Indentation level, as for json.dumps
+        ensure_ascii: Escape non-ASCII characters, as for json.dumps
+        default: Fallback serializer, as for json.dumps
+        raw: Items are already-serialized JSON text and are written as-is
+    """
+    if indent is None:
+        opener, separator, closer, pad = '[', ', ', ']', ''
+    else:
+        pad = ' ' * indent
+        opener, separator, closer = '[\n' + pad, ',\n' + pad, '\n]'
+
+    first = True
+    for item in items:
+        text = _serialize(item, raw, indent, ensure_ascii, default)
+        if pad:
+            # JSON strings never contain raw newlines, so this only re-indents structure
+            text = text.replace('\n', '\n' + pad)
+        yield (opener if first else separator) + text
+        first = False
+
+    yield '[]' if first else closer
+
+
+def iter_ndjson(items: Iterable[Any], ensure_ascii: bool = True, default: Optional[Callable] = None,
+                raw: bool = False) -> Iterator[str]:
+    """Yield newline-delimited JSON, one item per line."""
+    for item in items:
+        yield _serialize(item, raw, None, ensure_ascii, default) + '\n'
+
+
+def iter_json_object(header: Dict[str, Any], array_key: str, items: Iterable[Any],
+                     ensure_ascii: bool = True, default: Optional[Callable] = None,
+                     raw: bool = False) -> Iterator[str]:
+    """
+    Yield a JSON object whose small header fields are written up front and
+    whose (large) array_key member is streamed item by item.
+    """
+    fields = {key: value for key, value in header.items() if key != array_key}
+    head = json.dumps(fields, ensure_ascii=ensure_ascii, default=default)[:-1]
+    if fields:
+        head += ', '
+    yield head + json.dumps(array_key) + ': '
+    yield from iter_json_array(items, ensure_ascii=ensure_ascii, default=default, raw=raw)
+    yield '}'
+
+
+def write_json_array(stream: IO[str], items: Iterable[Any], **kwargs) -> int:
+    """
+    Write items to a text stream as a JSON array.
+
+    Returns:
+        Number of items written
+    """
+    count = 0
+
+    def counted():
+        nonlocal count
+        for item in items:
+            count += 1
+            yield item
+
+    for chunk in iter_json_array(counted(), **kwargs):
+        stream.write(chunk)
+    return count
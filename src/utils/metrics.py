@@ -0,0 +1,263 @@
+"""
+Lightweight in-process metrics for the scrape/extract pipeline.
+
+Counters, gauges and histograms are kept in a process-wide registry and can be
+rendered in the Prometheus text exposition format (served on /metrics by the
+web servers) or summarised at the end of a CLI run.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Upper bounds in seconds, suited to anything from a regex pass to a slow fetch
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Base class holding one value per label combination."""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> Iterator[Tuple[str, Sequence[Tuple[str, str]], float]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        """Render the metric in Prometheus text format."""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for suffix, pairs, value in self._samples():
+            lines.append(f'{self.name}{suffix}{_format_labels(pairs)} {_format_value(value)}')
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield '', list(zip(self.labelnames, key)), value
+
+
+class Gauge(Counter):
+    """Value that can go up and down (queue depths, active crawls)."""
+
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (typically durations in seconds)."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][index] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Time a block and observe its duration. Also usable as a decorator:
+
+            @FETCH_SECONDS.time(host='example.com', fetcher='curl')
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def stats(self, **labels) -> Optional[Dict[str, float]]:
+        """Return count and sum for one label combination, or None if unobserved."""
+        state = self._values.get(self._key(labels))
+        if state is None:
+            return None
+        return {'count': state['count'], 'sum': state['sum']}
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((key, dict(state, counts=list(state['counts']))) for key, state in self._values.items())
+        for key, state in items:
+            pairs = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, state['counts']):
+                cumulative += count
+                yield '_bucket', pairs + [('le', _format_value(bound))], cumulative
+            yield '_sum', pairs, state['sum']
+            yield '_count', pairs, state['count']
+
+
+class MetricsRegistry:
+    """Collection of named metrics."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} already registered with a different definition")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def metrics(self) -> List[_Metric]:
+        with self._lock:
+            return [self._metrics[name] for name in sorted(self._metrics)]
+
+    def render(self) -> str:
+        """Render every metric in Prometheus text format."""
+        lines = []
+        for metric in self.metrics():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> List[str]:
+        """One human-readable line per observed series, for end-of-run output."""
+        lines = []
+        for metric in self.metrics():
+            with metric._lock:
+                items = sorted(metric._values.items())
+            for key, value in items:
+                series = metric.name + _format_labels(list(zip(metric.labelnames, key)))
+                if isinstance(metric, Histogram):
+                    mean = value['sum'] / value['count'] if value['count'] else 0.0
+                    lines.append(f"{series}: count={value['count']} total={value['sum']:.3f}s mean={mean:.3f}s")
+                else:
+                    lines.append(f"{series}: {value:g}")
+        return lines
+
+    def clear(self):
+        """Reset all recorded values (definitions are kept)."""
+        for metric in self.metrics():
+            metric.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+FETCH_SECONDS = REGISTRY.histogram(
+    'vendor_fetch_seconds', 'Time to fetch a page', ('host', 'fetcher'))
+FETCH_BYTES = REGISTRY.counter(
+    'vendor_fetch_bytes_total', 'Bytes of page content downloaded', ('host',))
+FETCH_ERRORS = REGISTRY.counter(
+    'vendor_fetch_errors_total', 'Page fetches that failed', ('host', 'fetcher'))
+PARSE_SECONDS = REGISTRY.histogram(
+    'vendor_parse_seconds', 'Time spent parsing HTML with BeautifulSoup', ('component',))
+TRAFILATURA_SECONDS = REGISTRY.histogram(
+    'vendor_trafilatura_seconds', 'Time spent in trafilatura extraction', ('component',))
+EXTRACTION_SECONDS = REGISTRY.histogram(
+    'vendor_extraction_seconds', 'Time spent in regex-based service/product extraction', ('extractor',))
+DB_WRITE_SECONDS = REGISTRY.histogram(
+    'vendor_db_write_seconds', 'Time spent in SQLite writes', ('operation',))
+QUEUE_DEPTH = REGISTRY.gauge(
+    'vendor_queue_depth', 'Items waiting in a crawl or processing queue', ('queue',))
+PIPELINE_STAGE_SECONDS = REGISTRY.histogram(
+    'vendor_pipeline_stage_seconds', 'Time per item in a pipeline stage (per batch for persist)', ('pipeline', 'stage'))
+PIPELINE_ITEMS = REGISTRY.counter(
+    'vendor_pipeline_items_total', 'Items leaving a pipeline stage', ('pipeline', 'stage', 'outcome'))
+PIPELINE_BLOCKED_SECONDS = REGISTRY.counter(
+    'vendor_pipeline_blocked_seconds_total', 'Time a pipeline stage waited on a full downstream queue',
+    ('pipeline', 'stage'))
+CRAWL_STOPS = REGISTRY.counter(
+    'vendor_crawl_stops_total', 'Site crawls ended, by reason (saturated or exhausted)', ('reason',))
+EXTRACTION_BUDGET_SKIPS = REGISTRY.counter(
+    'vendor_extraction_budget_skips_total', 'Pattern runs skipped because a page used up its time budget',
+    ('runner',))
+
+
+def host_of(url: str) -> str:
+    """Host label for a URL."""
+    return urlparse(url).netloc.lower() or 'unknown'
+
+
+def render_metrics() -> str:
+    """Render the default registry in Prometheus text format."""
+    return REGISTRY.render()
+
+
+def dump_metrics(path) -> None:
+    """Write the default registry in Prometheus text format to a file."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(REGISTRY.render())
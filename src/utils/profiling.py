@@ -0,0 +1,142 @@
+"""
+Opt-in profiling for CLI runs and servers.
+
+Two modes are supported:
+
+- ``cprofile``: deterministic cProfile of the calling thread, saved as a pstats
+  file (``.prof``, readable by pstats, snakeviz or flameprof) plus a text
+  summary sorted by cumulative time.
+- ``sample``: a background thread samples the wall-clock stacks of every
+  thread at a fixed interval and writes them in the collapsed-stack format
+  (``.collapsed``) used by flamegraph.pl and speedscope. Time spent waiting on
+  curl subprocesses, sockets or SQLite shows up here, as do worker threads.
+"""
+
+import cProfile
+import logging
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ('cprofile', 'sample')
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Periodically sample the stacks of all running threads."""
+
+    def __init__(self, interval: float = 0.005):
+        """
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'StackSampler':
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(f"thread {names.get(ident, ident)}")
+                self.samples[';'.join(reversed(stack))] += 1
+            self.sample_count += 1
+
+    def write_collapsed(self, path):
+        """Write samples as 'frame;frame;frame count' lines (root frame first)."""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class RunProfiler:
+    """
+    Context manager that profiles a block and writes the results to a directory.
+
+    Does nothing when mode is None, so callers can wrap their work unconditionally.
+    """
+
+    def __init__(self, mode: Optional[str], output_dir, name: str = 'run', interval: float = 0.005):
+        """
+        Args:
+            mode: 'cprofile', 'sample' or None to disable profiling
+            output_dir: Directory the profile files are written to
+            name: Prefix for the file names (a timestamp is appended)
+            interval: Sampling interval in seconds for 'sample' mode
+        """
+        if mode is not None and mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        self.mode = mode
+        self.output_dir = Path(output_dir)
+        self.name = name
+        self.interval = interval
+        self.paths: List[Path] = []
+        self._profiler: Optional[cProfile.Profile] = None
+        self._sampler: Optional[StackSampler] = None
+
+    def __enter__(self) -> 'RunProfiler':
+        if self.mode == 'cprofile':
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.mode == 'sample':
+            self._sampler = StackSampler(self.interval).start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.mode is None:
+            return False
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stem = self.output_dir / f"{self.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+        if self._profiler is not None:
+            self._profiler.disable()
+            prof_path = stem.with_suffix('.prof')
+            self._profiler.dump_stats(prof_path)
+            text_path = stem.with_suffix('.txt')
+            with open(text_path, 'w', encoding='utf-8') as f:
+                pstats.Stats(self._profiler, stream=f).sort_stats('cumulative').print_stats(50)
+            self.paths.extend([prof_path, text_path])
+
+        if self._sampler is not None:
+            self._sampler.stop()
+            collapsed_path = stem.with_suffix('.collapsed')
+            self._sampler.write_collapsed(collapsed_path)
+            self.paths.append(collapsed_path)
+            logger.info(f"Collected {self._sampler.sample_count} stack samples")
+
+        for path in self.paths:
+            logger.info(f"Profile written to {path}")
+        return False
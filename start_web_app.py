@@ -29,8 +29,8 @@ def main():
         # Start the web server in background
         os.chdir('web_app')
         
-        # Start the server process
-        process = subprocess.Popen([sys.executable, 'simple_web_server.py'], 
+        # Start the server process (extra options such as --profile are passed through)
+        process = subprocess.Popen([sys.executable, 'simple_web_server.py'] + sys.argv[1:], 
                                  stdout=subprocess.PIPE, 
                                  stderr=subprocess.PIPE,
                                  text=True)
@@ -62,8 +62,13 @@ def main():
                     time.sleep(1)
             except KeyboardInterrupt:
                 print("\nStopping server...")
-                process.terminate()
-                process.wait()
+                # SIGINT lets the server shut down cleanly and flush any profile output
+                process.send_signal(signal.SIGINT)
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.terminate()
+                    process.wait()
                 print("Server stopped.")
         else:
             print("✗ Failed to start server")
@@ -0,0 +1,23 @@
+"""Tests for the facet bitmaps of src/analytics/catalog.py."""
+
+from src.analytics.catalog import VendorCatalog
+
+
+def test_counts_follow_vendors_added_after_a_query():
+    catalog = VendorCatalog()
+    catalog.add_vendor('a', tags={'technology': ['Kubernetes']})
+    assert catalog.count({'technology': ['kubernetes']}) == 1
+    catalog.add_vendor('b', tags={'technology': ['Kubernetes']})
+    assert catalog.count({'technology': ['kubernetes']}) == 2
+
+
+def test_substring_terms_follow_new_tags_of_known_vendors():
+    catalog = VendorCatalog()
+    for vendor_id in ('a', 'b', 'c'):
+        catalog.add_vendor(vendor_id, tags={'technology': ['Kubernetes']})
+    assert catalog.count({'technology': ['kube']}) == 3
+    catalog.add_vendor('d', tags={'technology': ['Kubernetes']})
+    assert catalog.count({'technology': ['kube']}) == 4
+    catalog.add_vendor('e', tags={'technology': ['Python']})
+    catalog.add_vendor('e', tags={'technology': ['Kubeflow']})
+    assert catalog.count({'technology': ['kube']}) == 5
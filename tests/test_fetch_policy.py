@@ -0,0 +1,46 @@
+"""Tests for the per-host circuit breaker in src/crawl/fetch_policy.py."""
+
+from src.crawl.fetch_policy import HTTP_4XX, TIMEOUT, CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def open_breaker():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=10.0, clock=clock)
+    breaker.record_failure('example.com', TIMEOUT)
+    breaker.record_failure('example.com', TIMEOUT)
+    assert breaker.is_open('example.com')
+    clock.now = 11.0
+    return breaker, clock
+
+
+def test_trial_answered_with_4xx_closes_circuit():
+    breaker, _ = open_breaker()
+    assert breaker.allow('example.com')  # half-open trial
+    breaker.record_failure('example.com', HTTP_4XX)
+    assert not breaker.is_open('example.com')
+    assert breaker.allow('example.com')
+    assert breaker.allow('example.com')
+
+
+def test_trial_host_failure_reopens_circuit():
+    breaker, clock = open_breaker()
+    assert breaker.allow('example.com')
+    breaker.record_failure('example.com', TIMEOUT)
+    assert breaker.is_open('example.com')
+    assert not breaker.allow('example.com')
+    clock.now = 22.0
+    assert breaker.allow('example.com')
+
+
+def test_second_request_waits_for_trial():
+    breaker, _ = open_breaker()
+    assert breaker.allow('example.com')
+    assert not breaker.allow('example.com')
@@ -0,0 +1,59 @@
+"""Tests for saving one tag index file from several TagIndex instances (src/analytics/tag_index.py)."""
+
+from src.analytics.tag_index import TagIndex
+
+
+def make_index(path):
+    index = TagIndex(path)
+    index.update_vendor('v1', {'technology': ['Python']})
+    index.update_vendor('v2', {'technology': ['Python', 'Rust']})
+    index.save()
+    return index
+
+
+def test_concurrent_saves_keep_both_vendors(tmp_path):
+    path = tmp_path / 'tag_index.db'
+    make_index(path)
+    first, second = TagIndex(path), TagIndex(path)
+    first.update_vendor('v3', {'technology': ['Go']})
+    second.update_vendor('v4', {'technology': ['Python', 'Java']})
+    first.save()
+    second.save()
+
+    loaded = TagIndex(path)
+    assert sorted(key for key in loaded.vendor_keys if key) == ['v1', 'v2', 'v3', 'v4']
+    assert loaded.vendors(loaded.match('technology', 'go')) == ['v3']
+    assert loaded.vendors(loaded.match('technology', 'java')) == ['v4']
+    assert sorted(loaded.vendors(loaded.match('technology', 'python'))) == ['v1', 'v2', 'v4']
+    # The second index moved v4 onto the id the file gave it
+    assert second.vendors(second.match('technology', 'java')) == ['v4']
+
+
+def test_concurrent_saves_merge_removed_tags(tmp_path):
+    path = tmp_path / 'tag_index.db'
+    make_index(path)
+    first, second = TagIndex(path), TagIndex(path)
+    first.update_vendor('v1', {'technology': ['Go']})
+    second.update_vendor('v2', {'technology': ['Rust']})
+    second.update_vendor('v5', {'technology': ['Python']})
+    first.save()
+    second.save()
+
+    loaded = TagIndex(path)
+    assert loaded.vendors(loaded.match('technology', 'python')) == ['v5']
+    assert loaded.vendors(loaded.match('technology', 'go')) == ['v1']
+    assert loaded.vendors(loaded.match('technology', 'rust')) == ['v2']
+    assert loaded.counts('technology') == [('Go', 1), ('Python', 1), ('Rust', 1)]
+
+
+def test_same_new_vendor_saved_twice_gets_one_id(tmp_path):
+    path = tmp_path / 'tag_index.db'
+    first, second = TagIndex(path), TagIndex(path)
+    first.update_vendor('v1', {'industry': ['Healthcare']})
+    second.update_vendor('v1', {'industry': ['Finance']})
+    first.save()
+    second.save()
+
+    loaded = TagIndex(path)
+    assert [key for key in loaded.vendor_keys if key] == ['v1']
+    assert loaded.vendors(loaded.match('industry', 'finance')) == ['v1']
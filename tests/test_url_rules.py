@@ -0,0 +1,26 @@
+"""Tests for the site check of the URL rule sets in src/crawl/url_rules.py."""
+
+from src.crawl.url_rules import OFFERING_RULES, PAGE_RULES
+
+
+def test_www_alias_port_and_subdomains_are_the_same_site():
+    urls = [
+        'https://www.acme.com/products/widget',
+        'https://acme.com:443/services/consulting',
+        'https://shop.acme.com/products/gadget',
+        'https://acme.com/solutions',
+    ]
+    assert OFFERING_RULES.filter(urls, 'https://acme.com') == urls
+    assert OFFERING_RULES.filter(urls, 'https://www.acme.com/') == urls
+
+
+def test_other_sites_are_external():
+    for url in ('https://notacme.com/products', 'https://acme.com.evil.net/products', 'https://other.com/'):
+        result = PAGE_RULES.classify(url, 'https://acme.com')
+        assert not result.crawl
+        assert result.category == 'external'
+
+
+def test_filter_without_base_url_checks_no_host():
+    urls = ['https://www.acme.com/products/widget', 'https://cdn.example.net/services']
+    assert OFFERING_RULES.filter(urls) == urls
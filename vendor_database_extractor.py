@@ -2,35 +2,51 @@
 Vendor Database Extractor - Extracts vendor information into structured markdown for database storage
 """
 
+import argparse
+import io
 import json
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
 from datetime import datetime
 from pathlib import Path
 from urllib.parse import urlparse
 
+from src.analytics.tag_index import TagIndex, tags_from_record
+
 class VendorDatabaseExtractor:
     """Extracts vendor information into database-ready markdown format."""
     
-    def __init__(self, research_output_dir="research_output"):
+    def __init__(self, research_output_dir="research_output", index_tags=True):
         self.research_output_dir = Path(research_output_dir)
         self.database_output_dir = Path("vendor_database")
         self.database_output_dir.mkdir(exist_ok=True)
+        # Tag bitmaps for faceted search, updated per vendor as it is extracted
+        # (worker processes leave the index to the parent)
+        self.tag_index = TagIndex(self.database_output_dir / "tag_index.db") if index_tags else None
     
-    def extract_all_vendors(self):
-        """Extract information from all vendors in the research output directory."""
-        vendor_dirs = [d for d in self.research_output_dir.iterdir() if d.is_dir()]
+    def extract_all_vendors(self, workers=1):
+        """
+        Extract information from all vendors in the research output directory.
+        
+        Vendors are processed in directory name order. With workers > 1 the
+        vendor directories are extracted (and their markdown files written) in
+        that many processes; results and output are still taken in directory
+        order, so the tag index, master database and log match a sequential run.
+        """
+        vendor_dirs = sorted((d for d in self.research_output_dir.iterdir() if d.is_dir()), key=lambda d: d.name)
         
         print(f"Found {len(vendor_dirs)} vendor directories to process")
         
         all_vendor_data = []
         
-        for vendor_dir in vendor_dirs:
-            print(f"Processing: {vendor_dir.name}")
-            vendor_data = self._extract_vendor_data(vendor_dir)
+        for vendor_data in self._process_vendor_dirs(vendor_dirs, workers):
             if vendor_data:
                 all_vendor_data.append(vendor_data)
-                self._save_vendor_to_database(vendor_data)
+                self.tag_index.update_vendor(vendor_data['vendor_id'], tags_from_record(vendor_data))
+        
+        self.tag_index.save()
         
         # Create master database file
         self._create_master_database(all_vendor_data)
@@ -40,6 +56,27 @@ class VendorDatabaseExtractor:
         
         return all_vendor_data
     
+    def _process_vendor_dirs(self, vendor_dirs, workers):
+        """Yield each vendor directory's data in order, extracting in a process pool when workers > 1."""
+        if workers <= 1 or len(vendor_dirs) <= 1:
+            for vendor_dir in vendor_dirs:
+                yield self._process_vendor_dir(vendor_dir)
+            return
+        
+        print(f"Extracting with {workers} worker processes")
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(str(self.research_output_dir),)) as pool:
+            for vendor_data, output in pool.map(_process_in_worker, vendor_dirs):
+                print(output, end='')
+                yield vendor_data
+    
+    def _process_vendor_dir(self, vendor_dir):
+        """Extract one vendor directory and save its database markdown file."""
+        print(f"Processing: {vendor_dir.name}")
+        vendor_data = self._extract_vendor_data(vendor_dir)
+        if vendor_data:
+            self._save_vendor_to_database(vendor_data)
+        return vendor_data
+    
     def _extract_vendor_data(self, vendor_dir):
         """Extract structured data from a vendor directory."""
         try:
@@ -97,16 +134,16 @@ class VendorDatabaseExtractor:
     
     def _extract_services(self, vendor_data):
         """Extract and consolidate services from all pages."""
-        all_services = set()
+        all_services = {}  # Keys in first-seen order, unlike a set
         
         # Get services from main vendor data
         if 'services' in vendor_data:
-            all_services.update(vendor_data['services'])
+            all_services.update(dict.fromkeys(vendor_data['services']))
         
         # Get services from individual pages
         for page in vendor_data.get('pages', []):
             if 'services' in page:
-                all_services.update(page['services'])
+                all_services.update(dict.fromkeys(page['services']))
         
         return list(all_services)
     
@@ -167,16 +204,16 @@ class VendorDatabaseExtractor:
     
     def _extract_technology_stack(self, vendor_data):
         """Extract technology stack from vendor data."""
-        all_tech = set()
+        all_tech = {}  # Keys in first-seen order, unlike a set
         
         # Get tech stack from main vendor data
         if 'technology_stack' in vendor_data:
-            all_tech.update(vendor_data['technology_stack'])
+            all_tech.update(dict.fromkeys(vendor_data['technology_stack']))
         
         # Get tech stack from individual pages
         for page in vendor_data.get('pages', []):
             if 'technology_stack' in page:
-                all_tech.update(page['technology_stack'])
+                all_tech.update(dict.fromkeys(page['technology_stack']))
         
         return list(all_tech)
     
@@ -190,7 +227,7 @@ class VendorDatabaseExtractor:
             prices = price_pattern.findall(content)
             pricing_info.extend(prices)
         
-        return list(set(pricing_info))  # Remove duplicates
+        return list(dict.fromkeys(pricing_info))  # Remove duplicates
     
     def _extract_industry_focus(self, vendor_data):
         """Extract industry focus from vendor data."""
@@ -211,7 +248,7 @@ class VendorDatabaseExtractor:
             if industry in content_lower:
                 industries.append(industry.title())
         
-        return list(set(industries))
+        return list(dict.fromkeys(industries))
     
     def _extract_geographic_presence(self, vendor_data):
         """Extract geographic presence from vendor data."""
@@ -231,7 +268,7 @@ class VendorDatabaseExtractor:
             elif '/ja/' in url:
                 geo_indicators.append('Japan')
         
-        return list(set(geo_indicators))
+        return list(dict.fromkeys(geo_indicators))
     
     def _save_vendor_to_database(self, vendor_data):
         """Save individual vendor data to database markdown file."""
@@ -426,15 +463,34 @@ Total Vendors: {len(all_vendor_data)}
         
         print(f"✓ Created database schema: {schema_file.name}")
 
+# Extractor of a worker process in --workers mode, created by _init_worker
+_worker_extractor = None
+
+def _init_worker(research_output_dir):
+    global _worker_extractor
+    _worker_extractor = VendorDatabaseExtractor(research_output_dir, index_tags=False)
+
+def _process_in_worker(vendor_dir):
+    """Extract one vendor directory in a worker; its output is returned for the parent to print in order."""
+    output = io.StringIO()
+    with redirect_stdout(output):
+        vendor_data = _worker_extractor._process_vendor_dir(vendor_dir)
+    return vendor_data, output.getvalue()
+
 def main():
     """Main function to extract vendor data for database storage."""
+    parser = argparse.ArgumentParser(description='Extract vendor data from research_output/ for database storage')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Vendor directories to extract in parallel processes (0 = one per CPU, default 1)')
+    args = parser.parse_args()
+    
     extractor = VendorDatabaseExtractor()
     
     print("Starting vendor database extraction...")
     print("=" * 50)
     
     # Extract all vendor data
-    vendor_data = extractor.extract_all_vendors()
+    vendor_data = extractor.extract_all_vendors(workers=args.workers or os.cpu_count() or 1)
     
     # Create database schema
     extractor.create_database_schema()
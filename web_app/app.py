@@ -3,27 +3,47 @@ Vendor Research Web Application
 A comprehensive web interface for vendor management, scraping, and analysis.
 """
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Flask, Response, abort, render_template, request, jsonify, redirect, stream_with_context, url_for
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_cors import CORS
+from sqlalchemy import tuple_
+from sqlalchemy.orm import defer
 import os
 import json
 from datetime import datetime
 import subprocess
+import sys
 import threading
 import time
 
-from models.database import db, Vendor, Service, Product, ServiceFeature, ProductFeature
+# Allow importing the shared src package when run from the web_app directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import db, Vendor, VendorPage, Service, Product, ServiceFeature, ProductFeature
+from models.pagination import decode_cursor, encode_cursor, parse_listing_params
 from services.scraper_service import ScraperService
 from services.extractor_service import ExtractorService
 from services.chat_service import ChatService
+from src.analytics.catalog import load_catalog, parse_facet_query
+from src.analytics.tag_index import TAG_FACETS, open_tag_index, tag_index_path
+from src.utils.json_stream import iter_json_object
+from src.utils.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, render_metrics
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///vendor_research.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Exported vendor tables used by /api/facets
+EXPORTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database_exports')
+
+# Service/product tag index used by /api/tags, kept next to the SQLite database
+TAG_INDEX_PATH = tag_index_path('vendor_research.db')
+
+# Scraped pages written (and read back) per round trip to vendor_pages
+PAGE_BATCH_SIZE = 50
+
 # Initialize extensions
 db.init_app(app)
 migrate = Migrate(app, db)
@@ -38,17 +58,96 @@ chat_service = ChatService()
 scraping_status = {}
 extraction_status = {}
 
+def save_vendor_pages(vendor, pages):
+    """Store a scrape's pages as vendor_pages rows, replacing any from a previous scrape; returns the page count."""
+    VendorPage.query.filter_by(vendor_id=vendor.id).delete()
+    count = 0
+    for count, page in enumerate(pages, 1):
+        db.session.add(VendorPage(vendor_id=vendor.id, page_index=count - 1,
+                                  url=page.get('url', ''), data=json.dumps(page)))
+        if count % PAGE_BATCH_SIZE == 0:
+            # Written pages are not referenced again, so the session holds one batch at a time
+            db.session.flush()
+    return count
+
+def iter_vendor_page_json(vendor_id):
+    """Yield a vendor's stored pages as JSON text, in scrape order."""
+    rows = (db.session.query(VendorPage.data)
+            .filter(VendorPage.vendor_id == vendor_id)
+            .order_by(VendorPage.page_index)
+            .yield_per(PAGE_BATCH_SIZE))
+    for row in rows:
+        yield row.data
+
+def load_raw_data(vendor):
+    """
+    Scraped data of a vendor with its pages as a lazy iterator.
+    
+    Pages are read from vendor_pages; vendors scraped before page storage
+    existed still carry their pages inline in raw_data.
+    """
+    raw_data = json.loads(vendor.raw_data)
+    if 'pages' not in raw_data:
+        raw_data['pages'] = (json.loads(page) for page in iter_vendor_page_json(vendor.id))
+    return raw_data
+
+def get_vendor_page(params):
+    """
+    Fetch one keyset-paginated page of vendors without loading raw_data.
+    
+    Aborts with 400 if the cursor's sort value can't be compared against the
+    sort column (a tampered or stale cursor, or one taken from a NULL value).
+    
+    Returns:
+        Tuple of (vendors, next_cursor)
+    """
+    sort = params['sort']
+    sort_column = getattr(Vendor, sort)
+    limit = params['limit']
+    
+    query = Vendor.query.options(defer(Vendor.raw_data))
+    if params['status']:
+        query = query.filter(Vendor.status == params['status'])
+    
+    position = decode_cursor(params['cursor'])
+    if position is not None:
+        sort_value, row_id = position
+        if sort != 'id' and not isinstance(sort_value, str):
+            abort(400, description='Invalid pagination cursor')
+        if sort == 'created_at':
+            try:
+                sort_value = datetime.fromisoformat(sort_value)
+            except ValueError:
+                abort(400, description='Invalid pagination cursor')
+        key = tuple_(sort_column, Vendor.id)
+        query = query.filter(key < (sort_value, row_id) if params['descending'] else key > (sort_value, row_id))
+    
+    if params['descending']:
+        query = query.order_by(sort_column.desc(), Vendor.id.desc())
+    else:
+        query = query.order_by(sort_column.asc(), Vendor.id.asc())
+    
+    vendors = query.limit(limit + 1).all()
+    if len(vendors) <= limit:
+        return vendors, None
+    
+    vendors = vendors[:limit]
+    last = vendors[-1]
+    return vendors, encode_cursor(getattr(last, sort), last.id)
+
 @app.route('/')
 def index():
     """Main dashboard page."""
-    vendors = Vendor.query.all()
-    return render_template('index.html', vendors=vendors)
+    params = parse_listing_params(request.args.to_dict(flat=False))
+    vendors, next_cursor = get_vendor_page(params)
+    return render_template('index.html', vendors=vendors, next_cursor=next_cursor)
 
 @app.route('/admin')
 def admin():
     """Admin panel for vendor management."""
-    vendors = Vendor.query.all()
-    return render_template('admin.html', vendors=vendors)
+    params = parse_listing_params(request.args.to_dict(flat=False))
+    vendors, next_cursor = get_vendor_page(params)
+    return render_template('admin.html', vendors=vendors, next_cursor=next_cursor)
 
 @app.route('/vendor/<int:vendor_id>')
 def vendor_detail(vendor_id):
@@ -63,6 +162,18 @@ def chat():
 
 # API Routes
 
+@app.route('/api/vendors', methods=['GET'])
+def list_vendors():
+    """List vendors with keyset pagination, status filter and sorting."""
+    params = parse_listing_params(request.args.to_dict(flat=False))
+    vendors, next_cursor = get_vendor_page(params)
+    
+    return jsonify({
+        'vendors': [vendor.to_dict() for vendor in vendors],
+        'next_cursor': next_cursor,
+        'limit': params['limit']
+    })
+
 @app.route('/api/vendors', methods=['POST'])
 def add_vendor():
     """Add a new vendor to scrape."""
@@ -97,11 +208,13 @@ def scrape_vendor(vendor_id):
             # Update scraping status
             scraping_status[vendor_id] = {'status': 'starting', 'progress': 0}
             
-            # Run the scraper
-            result = scraper_service.scrape_vendor(vendor.website)
+            # Run the scraper, storing each page as its own row as it is read back
+            crawl = scraper_service.stream_vendor(vendor.website)
             
-            if result:
-                vendor.raw_data = json.dumps(result)
+            if crawl:
+                vendor_info, pages = crawl
+                save_vendor_pages(vendor, pages)
+                vendor.raw_data = json.dumps(vendor_info)
                 vendor.scraped_at = datetime.utcnow()
                 vendor.status = 'scraped'
                 scraping_status[vendor_id] = {'status': 'completed', 'progress': 100}
@@ -143,7 +256,7 @@ def extract_vendor(vendor_id):
             extraction_status[vendor_id] = {'status': 'starting', 'progress': 0}
             
             # Parse raw data
-            raw_data = json.loads(vendor.raw_data)
+            raw_data = load_raw_data(vendor)
             
             # Extract services and products
             result = extractor_service.extract_from_raw_data(raw_data)
@@ -193,6 +306,14 @@ def extract_vendor(vendor_id):
                         )
                         db.session.add(product_feature)
                 
+                # Keep the service/product tag index in step with the database
+                tag_index = open_tag_index(TAG_INDEX_PATH)
+                tag_index.update_vendor(vendor_id, {
+                    'service': result.get('services', []),
+                    'product': result.get('products', []),
+                })
+                tag_index.save()
+                
                 vendor.status = 'completed'
                 extraction_status[vendor_id] = {'status': 'completed', 'progress': 100}
             else:
@@ -242,13 +363,19 @@ def chat_query():
 
 @app.route('/api/vendors/<int:vendor_id>/raw-data')
 def get_raw_data(vendor_id):
-    """Get raw scraped data for a vendor."""
+    """Get raw scraped data for a vendor, streamed one page at a time."""
     vendor = Vendor.query.get_or_404(vendor_id)
     
     if not vendor.raw_data:
         return jsonify({'error': 'No raw data available'}), 404
     
-    return jsonify(json.loads(vendor.raw_data))
+    header = json.loads(vendor.raw_data)
+    if 'pages' in header:
+        pages, raw = header.pop('pages'), False
+    else:
+        pages, raw = iter_vendor_page_json(vendor_id), True
+    chunks = iter_json_object(header, 'pages', pages, raw=raw)
+    return Response(stream_with_context(chunks), mimetype='application/json')
 
 @app.route('/api/vendors/<int:vendor_id>/services')
 def get_vendor_services(vendor_id):
@@ -296,6 +423,28 @@ def get_vendor_products(vendor_id):
     
     return jsonify(products_data)
 
+@app.route('/api/facets')
+def facets():
+    """Filter the exported vendor catalogue by tags, with value counts per facet."""
+    try:
+        catalog = load_catalog(EXPORTS_DIR)
+    except FileNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+    
+    filters, options = parse_facet_query(request.args.to_dict(flat=False))
+    return jsonify(catalog.query(filters, **options))
+
+@app.route('/api/tags')
+def tags():
+    """Filter extracted vendors by service/product tags, with tag counts per facet."""
+    filters, options = parse_facet_query(request.args.to_dict(flat=False), TAG_FACETS)
+    return jsonify(open_tag_index(TAG_INDEX_PATH).query(filters, **options))
+
+@app.route('/metrics')
+def metrics():
+    """Pipeline metrics in Prometheus text format."""
+    return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
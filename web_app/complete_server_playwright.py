@@ -3,6 +3,7 @@
 Complete Vendor Research Server with all functionality
 """
 
+import argparse
 import http.server
 import socketserver
 import json
@@ -10,14 +11,41 @@ import sqlite3
 import socket
 import threading
 import time
-import subprocess
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
-import time as time_module
 import os
-from urllib.parse import urlparse
+import sys
+from urllib.parse import urlparse, parse_qs, urlencode
 from bs4 import BeautifulSoup
 import re
 
+# Allow importing the shared src package when run from the web_app directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.analytics.catalog import load_catalog, parse_facet_query
+from src.analytics.tag_index import TAG_FACETS, open_tag_index, tag_index_path
+from src.crawl.browser_pool import close_shared_browser_pool, shared_browser_pool, should_render
+from src.crawl.canonical import collapse_links
+from src.crawl.crawl_state import DEFAULT_STATE_PATH, DONE, DUPLICATE, QUEUED, CrawlState
+from src.crawl.dedup import NearDuplicateIndex, normalize_url
+from src.crawl.fetch_policy import BLOCKED, shared_fetch_policy
+from src.crawl.fetcher import fetch_with_curl
+from src.crawl.rate_limiter import shared_rate_limiter
+from src.crawl.relevance import rank_discovered
+from src.crawl.saturation import ENABLED as SATURATION_ENABLED, SaturationTracker
+from src.crawl.url_rules import OFFERING_RULES, rules_for
+from src.pipeline.stages import Pipeline
+from src.utils.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE, DB_WRITE_SECONDS, EXTRACTION_SECONDS,
+    TRAFILATURA_SECONDS, render_metrics
+)
+from src.utils.profiling import PROFILE_MODES, RunProfiler
+from models.pagination import build_keyset_query, create_vendor_indexes, parse_listing_params, split_page
+
+# Exported vendor tables used by /api/facets
+EXPORTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database_exports')
+
+# Column order used by the dashboard/admin renderers
+VENDOR_COLUMNS = ('id', 'name', 'website', 'description', 'status', 'html_stored', 'created_at', 'pages_scraped', 'total_pages')
+
 class SimpleVendorDB:
     def __init__(self, db_path='vendor_research.db'):
         self.db_path = db_path
@@ -79,9 +107,12 @@ class SimpleVendorDB:
             )
         ''')
         
+        create_vendor_indexes(cursor)
+        
         conn.commit()
         conn.close()
     
+    @DB_WRITE_SECONDS.time(operation='add_vendor')
     def add_vendor(self, name, website, description=""):
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
@@ -102,6 +133,30 @@ class SimpleVendorDB:
         conn.close()
         return vendors
     
+    def get_vendor_page(self, limit=50, cursor=None, status=None, sort='created_at', descending=True):
+        """Get one page of vendors using keyset pagination; returns (vendors, next_cursor)"""
+        sql, params = build_keyset_query(
+            columns=VENDOR_COLUMNS, limit=limit, cursor=cursor, status=status, sort=sort, descending=descending
+        )
+        conn = sqlite3.connect(self.db_path)
+        db_cursor = conn.cursor()
+        db_cursor.execute(sql, params)
+        rows = db_cursor.fetchall()
+        conn.close()
+        return split_page(rows, limit, sort=sort, columns=VENDOR_COLUMNS)
+    
+    def count_vendors(self, status=None):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        if status:
+            cursor.execute('SELECT COUNT(*) FROM vendors WHERE status = ?', (status,))
+        else:
+            cursor.execute('SELECT COUNT(*) FROM vendors')
+        count = cursor.fetchone()[0]
+        conn.close()
+        return count
+    
+    @DB_WRITE_SECONDS.time(operation='remove_vendor')
     def remove_vendor(self, vendor_id):
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
@@ -111,6 +166,7 @@ class SimpleVendorDB:
         conn.commit()
         conn.close()
     
+    @DB_WRITE_SECONDS.time(operation='update_vendor_status')
     def update_vendor_status(self, vendor_id, status):
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
@@ -118,6 +174,7 @@ class SimpleVendorDB:
         conn.commit()
         conn.close()
     
+    @DB_WRITE_SECONDS.time(operation='update_html_stored')
     def update_html_stored(self, vendor_id, html_stored=True):
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
@@ -125,6 +182,7 @@ class SimpleVendorDB:
         conn.commit()
         conn.close()
     
+    @DB_WRITE_SECONDS.time(operation='update_scraping_progress')
     def update_scraping_progress(self, vendor_id, pages_scraped, total_pages):
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
@@ -132,6 +190,7 @@ class SimpleVendorDB:
         conn.commit()
         conn.close()
     
+    @DB_WRITE_SECONDS.time(operation='add_service')
     def add_service(self, vendor_id, service_name, description=""):
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
@@ -142,6 +201,7 @@ class SimpleVendorDB:
         conn.commit()
         conn.close()
     
+    @DB_WRITE_SECONDS.time(operation='add_product')
     def add_product(self, vendor_id, product_name, description=""):
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
@@ -152,97 +212,63 @@ class SimpleVendorDB:
         conn.commit()
         conn.close()
 
+BROWSER_HEADERS = [
+    'User-Agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept: text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+    'Accept-Language: en-US,en;q=0.9',
+    'Accept-Encoding: gzip, deflate, br',
+    'DNT: 1',
+    'Connection: keep-alive',
+    'Upgrade-Insecure-Requests: 1',
+    'Sec-Fetch-Dest: document',
+    'Sec-Fetch-Mode: navigate',
+    'Sec-Fetch-Site: none',
+    'Sec-Fetch-User: ?1',
+    'Cache-Control: max-age=0',
+]
+
 class PlaywrightScraper:
     def __init__(self):
         self.scraped_urls = set()
         self.max_pages = None  # No limit - scrape all pages
-        self.playwright = None
-        self.browser = None
-        self.context = None
-    
-    def _init_browser(self):
-        """Initialize Playwright browser with stealth settings - thread-safe version"""
-        # Create a new browser instance for this thread to avoid threading issues
-        playwright_instance = sync_playwright().start()
-        browser = playwright_instance.chromium.launch(
-            headless=True,
-            args=['--disable-blink-features=AutomationControlled', '--disable-dev-shm-usage', '--no-sandbox', '--disable-setuid-sandbox']
-        )
-        # Create context with realistic browser settings
-        context = browser.new_context(
-            user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            viewport={'width': 1920, 'height': 1080},
-            locale='en-US',
-            timezone_id='America/New_York',
-            extra_http_headers={
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'DNT': '1',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-            }
-        )
-        
-        # Store thread-local instances
-        self.playwright = playwright_instance
-        self.browser = browser
-        self.context = context
-    
-    def __del__(self):
-        """Cleanup browser resources"""
-        self.close()
-    
-    def close(self):
-        """Close browser and cleanup"""
-        if self.context:
-            self.context.close()
-        if self.browser:
-            self.browser.close()
-        if self.playwright:
-            self.playwright.stop()
+        self.skip_near_duplicates = True  # Drop pages whose content near-duplicates an earlier page
+        self.crawl_state_path = DEFAULT_STATE_PATH  # SQLite checkpoint used to resume interrupted crawls
+        self.rate_limiter = shared_rate_limiter()  # Per-host politeness shared across scrape threads
+        self.fetch_policy = shared_fetch_policy()  # Retries and per-host circuit breaker
+        self.render_js = True  # Render pages whose static HTML has too little text in a headless browser
+        self.browser_pool = shared_browser_pool()  # Started on first use, shared across scrape threads
+        self.stop_when_saturated = SATURATION_ENABLED  # End a crawl once new pages stop yielding new services/products
+        # Fetch stage only: trafilatura runs inside scrape_url, where it decides whether a page needs rendering
+        self.pipeline = Pipeline(self.scrape_url, name='playwright_scraper')
     
     def scrape_url(self, url):
-        """Scrape a single URL using curl (thread-safe)"""
+        """Scrape a single URL using curl, rendering it in the browser pool if the static HTML is too thin (thread-safe)"""
         try:
             # Use curl with browser-like headers to avoid detection
-            cmd = [
-                'curl', '-s', '-L', '--compressed',  # --compressed tells curl to decompress gzip automatically
-                '-H', 'User-Agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                '-H', 'Accept: text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-                '-H', 'Accept-Language: en-US,en;q=0.9',
-                '-H', 'Accept-Encoding: gzip, deflate, br',
-                '-H', 'DNT: 1',
-                '-H', 'Connection: keep-alive',
-                '-H', 'Upgrade-Insecure-Requests: 1',
-                '-H', 'Sec-Fetch-Dest: document',
-                '-H', 'Sec-Fetch-Mode: navigate',
-                '-H', 'Sec-Fetch-Site: none',
-                '-H', 'Sec-Fetch-User: ?1',
-                '-H', 'Cache-Control: max-age=0',
-                url
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            # (--compressed tells curl to decompress gzip automatically; bytes are decoded leniently)
+            result = fetch_with_curl(url, headers=BROWSER_HEADERS, compressed=True,
+                                     rate_limiter=self.rate_limiter, policy=self.fetch_policy)
             
-            if result.returncode == 0:
-                # Check if we got an access denied or blocked page (be very specific)
-                content_lower = result.stdout.lower()
-                # Only check for actual blocking messages, not general keywords
-                blocking_phrases = [
-                    "your request was blocked",
-                    "access denied by administrator",
-                    "403 forbidden",
-                    "cloudflare ray id",
-                    "you have been blocked",
-                    "unauthorized access"
-                ]
-                if any(phrase in content_lower for phrase in blocking_phrases):
-                    print(f"Access denied or blocked for {url}")
-                    return None
-                
-                # Use trafilatura to extract clean content
-                html_content = result.stdout
-                clean_content = self._extract_with_trafilatura(html_content)
+            if result.failure == BLOCKED:
+                # Block and captcha pages are detected by the fetch layer
+                print(f"Access denied or blocked for {url}")
+                return None
+            
+            extracted = self._extract_with_trafilatura(result.text) if result.ok else None
+            if result.ok and self.render_js and should_render(
+                    extracted if extracted is not None else self._visible_text(result.text)):
+                # Little text in the static HTML usually means the page is built by JavaScript
+                rendered = self._render(url)
+                if rendered is not None:
+                    result = rendered
+                    extracted = self._extract_with_trafilatura(result.text)
+            
+            clean_content = extracted if extracted and len(extracted.strip()) > 100 else None
+            if result.ok and extracted is not None and clean_content is None:
+                print("Trafilatura extraction returned minimal content")
+            
+            if result.ok:
+                html_content = result.text
                 
                 if clean_content:
                     # Check if content is too short or contains placeholder text
@@ -257,57 +283,37 @@ class PlaywrightScraper:
                         return None
                     return html_content
             else:
-                print(f"Curl error for {url}: {result.stderr}")
-                return None
-        except UnicodeDecodeError as e:
-            print(f"Unicode decode error for {url}: {e}")
-            # Try again without text=True to get raw bytes
-            try:
-                result = subprocess.run(cmd, capture_output=True, timeout=30)
-                if result.returncode == 0:
-                    # Try to decode with different encodings
-                    content = result.stdout
-                    try:
-                        html_content = content.decode('utf-8')
-                    except UnicodeDecodeError:
-                        try:
-                            html_content = content.decode('latin-1')
-                        except UnicodeDecodeError:
-                            html_content = content.decode('utf-8', errors='ignore')
-                    
-                    # Use trafilatura on the decoded content
-                    clean_content = self._extract_with_trafilatura(html_content)
-                    if clean_content:
-                        # Check if content is valid
-                        if len(clean_content.strip()) < 50 or "# Index" in clean_content:
-                            return None
-                        return clean_content
-                    # Check raw HTML for placeholder content
-                    if "# Index" in html_content:
-                        return None
-                    return html_content
-                return None
-            except Exception as e2:
-                print(f"Error scraping {url} (retry): {e2}")
+                print(f"Fetch failed for {url} ({result.failure}): {result.error}")
                 return None
         except Exception as e:
             print(f"Error scraping {url}: {e}")
             return None
     
+    def _render(self, url):
+        """Render a URL in the shared browser pool; returns None if rendering is unavailable or fails"""
+        try:
+            result = self.browser_pool.render(url, rate_limiter=self.rate_limiter)
+        except ImportError:
+            print("Playwright not available, keeping static HTML")
+            self.render_js = False
+            return None
+        except Exception as e:
+            print(f"Browser rendering failed for {url}: {e}")
+            return None
+        if not result.ok:
+            print(f"Browser rendering failed for {url} ({result.failure}): {result.error}")
+            return None
+        print(f"Rendered {url} in browser")
+        return result
+    
     def _extract_with_trafilatura(self, html_content):
-        """Extract clean content using trafilatura"""
+        """Extract clean content using trafilatura; '' if it finds none, None if it is unavailable or fails"""
         try:
-            import trafilatura
             from trafilatura import extract
             
             # Extract clean text content
-            clean_text = extract(html_content)
-            
-            if clean_text and len(clean_text.strip()) > 100:
-                return clean_text
-            else:
-                print("Trafilatura extraction returned minimal content")
-                return None
+            with TRAFILATURA_SECONDS.time(component='playwright_scraper'):
+                return extract(html_content) or ''
                 
         except ImportError:
             print("Trafilatura not available, using fallback extraction")
@@ -316,54 +322,145 @@ class PlaywrightScraper:
             print(f"Trafilatura error: {e}")
             return None
     
-    def scrape_entire_site(self, base_url, progress_callback=None, save_callback=None):
-        """Scrape entire website using curl"""
+    def _static_text(self, html_content):
+        """Main text of a static page for the render decision; its visible text if trafilatura is unavailable or fails"""
+        extracted = self._extract_with_trafilatura(html_content)
+        return extracted if extracted is not None else self._visible_text(html_content)
+    
+    def _visible_text(self, html_content):
+        """Text a browser would show for the HTML, without scripts and styles"""
+        soup = BeautifulSoup(html_content, 'html.parser')
+        for element in soup(['script', 'style', 'noscript', 'template']):
+            element.decompose()
+        return soup.get_text(' ', strip=True)
+    
+    def iter_site(self, base_url, progress_callback=None):
+        """
+        Crawl a website using curl and yield each new page as soon as it is fetched.
+        
+        Yields {'url', 'content', 'index'} dicts and holds only the current page in memory.
+        A page is checkpointed as done once the consumer asks for the next one, so a page
+        whose processing was interrupted is fetched again when the crawl resumes; pages
+        consumed by an interrupted earlier run are not yielded again.
+        
+        The crawl stops early once the last pages stopped turning up services or products
+        not already found on the site (see src/crawl/saturation.py).
+        
+        The generator's return value is the number of pages done across the whole crawl,
+        including those finished by an interrupted earlier run.
+        """
+        print(f"Starting to scrape entire site: {base_url}")
+        state = CrawlState(f"playwright:{normalize_url(base_url)}", self.crawl_state_path)
         try:
-            print(f"Starting to scrape entire site: {base_url}")
-            all_urls = self._discover_site_urls(base_url)
-            filtered_urls = [url for url in all_urls if not self._is_blog_url(url) and not self._is_legal_page(url) and self._is_english_page(url) and self._is_products_or_services_page(url)]
-            print(f"Found {len(filtered_urls)} English Product/Service pages to scrape")
+            duplicates = NearDuplicateIndex()
+            saturation = SaturationTracker(base_url, enabled=self.stop_when_saturated)
             
-            # Slice URLs if max_pages is set, otherwise scrape all
-            urls_to_scrape = filtered_urls[:self.max_pages] if self.max_pages else filtered_urls
-            total_pages = len(urls_to_scrape)
+            if state.resumed:
+                # Only the near-duplicate index and yield tracker need the pages finished before the interruption
+                for url, content in state.completed_pages():
+                    duplicates.check(url, content)
+                    saturation.observe(self._page_yield(content))
+                urls_to_scrape = state.pending()
+                counts = state.counts()
+                total_pages = sum(counts.values())
+                pages_done = counts.get(DONE, 0)
+                print(f"Resuming crawl: {pages_done} pages done, {len(urls_to_scrape)} still queued")
+            else:
+                all_urls = self._discover_site_urls(base_url)
+                # English product/service pages only; blog, legal and other-language pages are skipped.
+                # Discovery already kept the site's own hosts (www. and subdomains included)
+                filtered_urls = rules_for(base_url, OFFERING_RULES).filter(all_urls)
+                print(f"Found {len(filtered_urls)} English Product/Service pages to scrape")
+                
+                # Slice URLs if max_pages is set (most relevant pages come first), otherwise scrape all
+                urls_to_scrape = filtered_urls[:self.max_pages] if self.max_pages else filtered_urls
+                total_pages = len(urls_to_scrape)
+                pages_done = 0
+                state.start()
+                state.enqueue(urls_to_scrape)
             
-            all_content = []
-            for i, url in enumerate(urls_to_scrape):
-                print(f"Scraping page {i+1}/{total_pages}: {url}")
-                content = self.scrape_url(url)
-                if content:
-                    page_data = {'url': url, 'content': content, 'index': i+1}
-                    all_content.append(page_data)
+            # Pages are fetched (and rendered if needed) concurrently; the loop body is the persist stage
+            batches = self.pipeline.iter_batches(urls_to_scrape)
+            for batch in batches:
+                for item in batch:
+                    url = item.url
+                    content = item.value if item.ok else None
+                    duplicate_of = duplicates.check(url, content) if content and self.skip_near_duplicates else None
+                    if duplicate_of:
+                        print(f"Skipping near-duplicate of {duplicate_of}: {url}")
+                        state.mark_duplicate(url, duplicate_of, content)
+                    elif content:
+                        print(f"Scraped page {pages_done + 1}/{total_pages}: {url}")
+                        yield {'url': url, 'content': content, 'index': state.position(url) + 1}
+                        state.mark_done(url, content, content)
+                        pages_done += 1
+                        saturation.observe(self._page_yield(content))
+                    else:
+                        state.mark_failed(url)
                     
-                    # Save immediately if callback provided
-                    if save_callback:
-                        save_callback(page_data)
-                
-                # Update progress
-                if progress_callback:
-                    progress_callback(len(all_content), total_pages)
+                    # Update progress
+                    if progress_callback:
+                        progress_callback(pages_done, total_pages)
                 
-                time_module.sleep(1)
+                if saturation.saturated():
+                    # Stops the fetch stage; the rest of the frontier is dropped with the checkpoint
+                    batches.close()
+                    break
             
-            print(f"Successfully scraped {len(all_content)} pages")
-            return all_content
+            counts = state.counts()
+            yield_summary = saturation.finish(remaining=counts.get(QUEUED, 0))
+            state.finish()
+            print(f"Successfully scraped {pages_done} pages ({counts.get(DUPLICATE, 0)} near-duplicates skipped)")
+            print(f"Distinct services/products after each page: {yield_summary['curve']}")
+            if yield_summary['stopped_early']:
+                print(f"Stopped early: {yield_summary['marginal_yield']} new services/products per page over the "
+                      f"last {yield_summary['window']} pages; {yield_summary['pages_skipped']} queued pages not fetched")
+            return pages_done
+        finally:
+            state.close()
+    
+    def _page_yield(self, content):
+        """Services and products the extractor finds on a page, for the saturation tracker"""
+        # Timed on its own so the extraction metric only counts real extraction runs
+        with EXTRACTION_SECONDS.time(extractor='saturation_probe'):
+            services, products = SimpleExtractor().extract(content)
+        return {'service': services, 'product': products}
+    
+    def scrape_entire_site(self, base_url, progress_callback=None, save_callback=None):
+        """
+        Scrape entire website using curl, handing each page to save_callback as it is fetched.
+        
+        Returns the number of pages the crawl has done, including pages saved by an
+        interrupted earlier run that this one resumed (0 on error); pages are not retained.
+        """
+        crawl = self.iter_site(base_url, progress_callback)
+        try:
+            while True:
+                try:
+                    page_data = next(crawl)
+                except StopIteration as done:
+                    return done.value or 0
+                if save_callback:
+                    save_callback(page_data)
         except Exception as e:
             print(f"Error scraping entire site {base_url}: {e}")
-            return []
+            return 0
     
     def _discover_site_urls(self, base_url):
         """Discover all URLs using curl"""
         try:
             from urllib.parse import urljoin
             # Use curl to get HTML
-            cmd = ['curl', '-s', '-L', base_url]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            result = fetch_with_curl(base_url, rate_limiter=self.rate_limiter, policy=self.fetch_policy)
             
-            if result.returncode != 0:
+            if not result.ok:
                 return [base_url]
             
-            html_content = result.stdout
+            # JavaScript-built home pages often have no links in the static HTML
+            if self.render_js and should_render(self._static_text(result.text)):
+                result = self._render(base_url) or result
+            
+            html_content = result.text
             urls = set([base_url])
             
             # Parse HTML to find links
@@ -389,33 +486,22 @@ class PlaywrightScraper:
                 clean_url = full_url.split('#')[0].split('?')[0]
                 urls.add(clean_url)
             
-            return list(urls)
+            # Each page once, as its canonical English variant, most relevant first
+            return rank_discovered(soup, base_url, collapse_links(soup, base_url, urls))
         except Exception as e:
             print(f"Error discovering URLs for {base_url}: {e}")
             return [base_url]
-    
-    def _is_blog_url(self, url):
-        blog_keywords = ['blog', 'news', 'article', 'post', 'press-release']
-        return any(keyword in url.lower() for keyword in blog_keywords)
-    
-    def _is_legal_page(self, url):
-        legal_keywords = ['privacy-policy', 'privacy_policy', 'privacy', 'terms-of-use', 'terms_of_use', 'terms', 'accessibility-statement', 'accessibility_statement', 'accessibility', 'cookie-policy', 'cookie_policy', 'cookies', 'legal', 'disclaimer', 'sitemap', 'contact-us', 'contact_us', 'contact']
-        return any(keyword in url.lower() for keyword in legal_keywords)
-    
-    def _is_english_page(self, url):
-        non_english_codes = ['/de/', '/fr/', '/es/', '/it/', '/pt/', '/ru/', '/ja/', '/ko/', '/zh/', '/ar/', '/sv/', '/no/', '/fi/', '/nl/', '/da/', '/pl/', '/cs/', '/hu/', '/ro/', '/bg/', '/hr/', '/sk/', '/sl/', '/et/', '/lv/', '/lt/', '/el/', '/tr/', '/he/', '/th/', '/vi/', '/id/', '/ms/', '/tl/']
-        return not any(code in url.lower() for code in non_english_codes)
-    
-    def _is_products_or_services_page(self, url):
-        """Check if URL is a Products or Services page"""
-        url_lower = url.lower()
-        return '/products/' in url_lower or '/services/' in url_lower or '/solutions/' in url_lower
 
 class SimpleExtractor:
     def __init__(self):
         pass
     
+    @EXTRACTION_SECONDS.time(extractor='simple_extractor')
     def extract_services_products(self, content):
+        return self.extract(content)
+    
+    def extract(self, content):
+        """Services and products found in a page (clean text or HTML), without timing the call"""
         if not content:
             return [], []
         
@@ -506,15 +592,23 @@ class SimpleWebHandler(http.server.BaseHTTPRequestHandler):
     
     def do_GET(self):
         print(f"GET request for: {self.path}")
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
         
-        if self.path == '/':
-            self.serve_dashboard()
-        elif self.path == '/admin':
-            self.serve_admin()
+        if parsed.path == '/':
+            self.serve_dashboard(query)
+        elif parsed.path == '/admin':
+            self.serve_admin(query)
         elif self.path == '/api/vendors/progress':
             self.api_get_progress()
         elif self.path.startswith('/api/vendors/'):
             self.handle_vendor_api()
+        elif parsed.path == '/api/facets':
+            self.api_get_facets(query)
+        elif parsed.path == '/api/tags':
+            self.api_get_tags(query)
+        elif parsed.path == '/metrics':
+            self.serve_metrics()
         else:
             self.send_error(404)
     
@@ -543,8 +637,10 @@ class SimpleWebHandler(http.server.BaseHTTPRequestHandler):
         else:
             self.send_error(404)
     
-    def serve_dashboard(self):
-        vendors = self.db.get_vendors()
+    def serve_dashboard(self, query=None):
+        params = parse_listing_params(query or {})
+        vendors, next_cursor = self.db.get_vendor_page(**params)
+        total_vendors = self.db.count_vendors(params['status'])
         
         html = f"""
         <!DOCTYPE html>
@@ -592,8 +688,9 @@ class SimpleWebHandler(http.server.BaseHTTPRequestHandler):
                 <a href="/admin" class="btn btn-primary">Admin Panel</a>
             </div>
             
-            <h2>Vendors ({len(vendors)})</h2>
+            <h2>Vendors ({total_vendors})</h2>
             {self._render_vendors(vendors)}
+            {self._render_pagination('/', params, next_cursor)}
         </body>
         </html>
         """
@@ -603,8 +700,10 @@ class SimpleWebHandler(http.server.BaseHTTPRequestHandler):
         self.end_headers()
         self.wfile.write(html.encode())
     
-    def serve_admin(self):
-        vendors = self.db.get_vendors()
+    def serve_admin(self, query=None):
+        params = parse_listing_params(query or {})
+        vendors, next_cursor = self.db.get_vendor_page(**params)
+        total_vendors = self.db.count_vendors(params['status'])
         
         html = f"""
         <!DOCTYPE html>
@@ -687,7 +786,7 @@ class SimpleWebHandler(http.server.BaseHTTPRequestHandler):
                 <button type="submit" class="btn btn-primary">Add Vendors</button>
             </form>
             
-            <h2>Vendors ({len(vendors)})</h2>
+            <h2>Vendors ({total_vendors})</h2>
             <div style="margin-bottom: 15px;">
                 <button class="btn btn-success" onclick="selectAllVendors()">Select All</button>
                 <button class="btn btn-warning" onclick="extractSelectedVendors()">Extract Selected</button>
@@ -709,6 +808,7 @@ class SimpleWebHandler(http.server.BaseHTTPRequestHandler):
                     {self._render_vendor_table(vendors)}
                 </tbody>
             </table>
+            {self._render_pagination('/admin', params, next_cursor)}
             
             <script>
                 document.getElementById('addVendorForm').addEventListener('submit', function(e) {{
@@ -932,6 +1032,21 @@ class SimpleWebHandler(http.server.BaseHTTPRequestHandler):
             """
         return html
     
+    def _render_pagination(self, base_path, params, next_cursor):
+        if not next_cursor:
+            return ""
+        
+        link_params = {
+            'cursor': next_cursor,
+            'limit': params['limit'],
+            'sort': params['sort'],
+            'order': 'desc' if params['descending'] else 'asc'
+        }
+        if params['status']:
+            link_params['status'] = params['status']
+        
+        return f'<p><a href="{base_path}?{urlencode(link_params)}" class="btn btn-primary">Next page</a></p>'
+    
     def _render_vendor_table(self, vendors):
         if not vendors:
             return "<tr><td colspan='7'>No vendors found.</td></tr>"
@@ -1010,6 +1125,9 @@ class SimpleWebHandler(http.server.BaseHTTPRequestHandler):
     def api_remove_vendor(self, vendor_id):
         try:
             self.db.remove_vendor(vendor_id)
+            tag_index = open_tag_index(tag_index_path(self.db.db_path))
+            tag_index.remove_vendor(vendor_id)
+            tag_index.save()
             response = {'success': True, 'message': 'Vendor removed successfully'}
         except Exception as e:
             response = {'success': False, 'error': str(e)}
@@ -1065,6 +1183,42 @@ class SimpleWebHandler(http.server.BaseHTTPRequestHandler):
         self.end_headers()
         self.wfile.write(json.dumps(response).encode())
     
+    def api_get_facets(self, query=None):
+        """Filter the exported vendor catalogue by tags, with value counts per facet"""
+        try:
+            catalog = load_catalog(EXPORTS_DIR)
+            filters, options = parse_facet_query(query or {})
+            response = catalog.query(filters, **options)
+            status = 200
+        except FileNotFoundError as e:
+            response = {'error': str(e)}
+            status = 404
+        
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.end_headers()
+        self.wfile.write(json.dumps(response).encode())
+    
+    def api_get_tags(self, query=None):
+        """Filter extracted vendors by service/product tags, with tag counts per facet"""
+        tag_index = open_tag_index(tag_index_path(self.db.db_path))
+        filters, options = parse_facet_query(query or {}, TAG_FACETS)
+        response = tag_index.query(filters, **options)
+        
+        self.send_response(200)
+        self.send_header('Content-type', 'application/json')
+        self.end_headers()
+        self.wfile.write(json.dumps(response).encode())
+    
+    def serve_metrics(self):
+        """Expose pipeline metrics in Prometheus text format"""
+        body = render_metrics().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-type', METRICS_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
     def api_get_progress(self):
         """Get scraping progress for all vendors"""
         try:
@@ -1106,12 +1260,12 @@ class SimpleWebHandler(http.server.BaseHTTPRequestHandler):
             def progress_callback(pages_scraped, total_pages):
                 self.db.update_scraping_progress(vendor_id, pages_scraped, total_pages)
             
-            all_content = self.scraper.scrape_entire_site(url, progress_callback=progress_callback, save_callback=save_page_callback)
+            pages_scraped = self.scraper.scrape_entire_site(url, progress_callback=progress_callback, save_callback=save_page_callback)
             
-            if all_content:
+            if pages_scraped:
                 self.db.update_vendor_status(vendor_id, 'scraped')
                 self.db.update_html_stored(vendor_id, True)
-                print(f"Scraping completed for vendor {vendor_id} - {len(all_content)} pages scraped")
+                print(f"Scraping completed for vendor {vendor_id} - {pages_scraped} pages scraped")
             else:
                 self.db.update_vendor_status(vendor_id, 'error')
                 print(f"Scraping failed for vendor {vendor_id}")
@@ -1305,6 +1459,11 @@ class SimpleWebHandler(http.server.BaseHTTPRequestHandler):
                     for product in products:
                         self.db.add_product(vendor_id, product)
                     
+                    # Keep the service/product tag index in step with the database
+                    tag_index = open_tag_index(tag_index_path(self.db.db_path))
+                    tag_index.update_vendor(vendor_id, {'service': services, 'product': products})
+                    tag_index.save()
+                    
                     # Create markdown report in same format as original
                     self._create_markdown_report(vendor_id, vendor, html_content, services, products)
                     
@@ -1397,7 +1556,15 @@ class SimpleWebHandler(http.server.BaseHTTPRequestHandler):
         except Exception as e:
             print(f"Error creating markdown report for vendor {vendor_id}: {e}")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description='Complete Vendor Research Server')
+    parser.add_argument('--profile', choices=PROFILE_MODES,
+                        help='Profile the server until it stops (sample covers scrape worker threads)')
+    parser.add_argument('--profile-dir', default='profiles', help='Directory for profile output')
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
     PORT = 61541
     
     # Check if trafilatura is available
@@ -1407,11 +1574,25 @@ def main():
     except ImportError:
         print("⚠️  Trafilatura not available, using fallback extraction")
     
-    print(f"🎭 Using Playwright for undetectable scraping")
+    print(f"🎭 Using Playwright to render JavaScript-heavy pages")
     print(f"Starting Complete Vendor Research Server on port {PORT}")
     print(f"Access the application at: http://localhost:{PORT}")
     print(f"Admin Panel: http://localhost:{PORT}/admin")
+    if args.profile:
+        print(f"Profiling enabled ({args.profile}); output is written to {args.profile_dir} on shutdown")
     
+    profiler = RunProfiler(args.profile, args.profile_dir, name='complete_server')
+    try:
+        with profiler:
+            serve(PORT)
+    except KeyboardInterrupt:
+        print("\nServer stopped")
+    finally:
+        close_shared_browser_pool()
+        for path in profiler.paths:
+            print(f"Profile saved to {path}")
+
+def serve(PORT):
     try:
         with socketserver.TCPServer(("", PORT), SimpleWebHandler) as httpd:
             print(f"Server running on http://localhost:{PORT}")
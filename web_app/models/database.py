@@ -10,12 +10,20 @@ db = SQLAlchemy()
 class Vendor(db.Model):
     """Vendor model for storing vendor information."""
     
+    # Composite indexes backing keyset pagination on the listing endpoints
+    __table_args__ = (
+        db.Index('idx_vendors_created_at', 'created_at', 'id'),
+        db.Index('idx_vendors_name', 'name', 'id'),
+        db.Index('idx_vendors_status', 'status', 'created_at', 'id'),
+        db.Index('idx_vendors_status_id', 'status', 'id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=False)
     website = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text)
     status = db.Column(db.String(50), default='pending')  # pending, scraping, scraped, extracting, completed, failed
-    raw_data = db.Column(db.Text)  # JSON string of scraped data
+    raw_data = db.Column(db.Text)  # JSON string of scraped data (pages are in VendorPage rows)
     scraped_at = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -36,6 +44,20 @@ class Vendor(db.Model):
             'updated_at': self.updated_at.isoformat()
         }
 
+class VendorPage(db.Model):
+    """One scraped page of a vendor, stored as its own row so pages can be written and read one at a time."""
+    
+    __tablename__ = 'vendor_pages'
+    __table_args__ = (
+        db.Index('idx_vendor_pages_vendor', 'vendor_id', 'page_index'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    vendor_id = db.Column(db.Integer, db.ForeignKey('vendor.id'), nullable=False)
+    page_index = db.Column(db.Integer, nullable=False)
+    url = db.Column(db.Text)
+    data = db.Column(db.Text, nullable=False)  # JSON string of the page
+
 class Service(db.Model):
     """Service model for storing vendor services."""
     
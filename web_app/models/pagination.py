@@ -0,0 +1,139 @@
+"""
+Keyset pagination helpers for the vendor listing endpoints.
+
+Pages are addressed by an opaque cursor holding the sort value and id of the
+last row on the previous page, so fetching page N costs the same as page 1
+and never touches the raw_data column.
+"""
+
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Columns backed by an index on the vendors table; only these may be sorted on
+SORTABLE_COLUMNS = ('created_at', 'name', 'status', 'id')
+
+# Columns returned by listing queries (raw_data is deliberately excluded)
+VENDOR_LIST_COLUMNS = ('id', 'name', 'website', 'description', 'status', 'scraped_at', 'created_at')
+
+VENDOR_INDEXES = {
+    'idx_vendors_created_at': ('created_at', 'id'),
+    'idx_vendors_name': ('name', 'id'),
+    'idx_vendors_status': ('status', 'created_at', 'id'),  # ?status=X in the default created_at order
+    'idx_vendors_status_id': ('status', 'id'),  # sort=status, which orders by (status, id)
+}
+
+
+def create_vendor_indexes(cursor, table='vendors'):
+    """Create the indexes that keyset pagination relies on."""
+    for index_name, columns in VENDOR_INDEXES.items():
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({", ".join(columns)})')
+
+
+def encode_cursor(sort_value, row_id):
+    """Encode the position after (sort_value, row_id) as a URL-safe token."""
+    payload = json.dumps([sort_value, row_id], default=str)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Decode a cursor token; returns (sort_value, row_id) or None if invalid."""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return sort_value, int(row_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE):
+    """Parse a requested page size, clamped to [1, MAX_PAGE_SIZE]."""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def parse_listing_params(query):
+    """Parse listing options from a parsed query string (dict of lists)."""
+    def first(name, default=None):
+        values = query.get(name)
+        return values[0] if values else default
+
+    sort = first('sort', 'created_at')
+    if sort not in SORTABLE_COLUMNS:
+        sort = 'created_at'
+
+    return {
+        'limit': parse_page_size(first('limit')),
+        'cursor': first('cursor'),
+        'status': first('status') or None,
+        'sort': sort,
+        'descending': first('order', 'desc').lower() != 'asc',
+    }
+
+
+def build_keyset_query(columns=VENDOR_LIST_COLUMNS, table='vendors', limit=DEFAULT_PAGE_SIZE,
+                       cursor=None, status=None, sort='created_at', descending=True):
+    """
+    Build a keyset-paginated SELECT for the vendors table.
+
+    One extra row is requested so callers can tell whether a next page exists.
+
+    Returns:
+        Tuple of (sql, params)
+    """
+    if sort not in SORTABLE_COLUMNS:
+        raise ValueError(f"Cannot sort on unindexed column: {sort}")
+
+    direction = 'DESC' if descending else 'ASC'
+    comparison = '<' if descending else '>'
+    order_columns = [sort, 'id'] if sort != 'id' else ['id']
+
+    conditions = []
+    params = []
+
+    if status:
+        conditions.append('status = ?')
+        params.append(status)
+
+    position = decode_cursor(cursor)
+    if position is not None:
+        sort_value, row_id = position
+        if sort == 'id':
+            conditions.append(f'id {comparison} ?')
+            params.append(row_id)
+        else:
+            conditions.append(f'({sort}, id) {comparison} (?, ?)')
+            params.extend([sort_value, row_id])
+
+    sql = f'SELECT {", ".join(columns)} FROM {table}'
+    if conditions:
+        sql += ' WHERE ' + ' AND '.join(conditions)
+    sql += ' ORDER BY ' + ', '.join(f'{column} {direction}' for column in order_columns)
+    sql += ' LIMIT ?'
+    params.append(limit + 1)
+
+    return sql, params
+
+
+def split_page(rows, limit, sort='created_at', columns=VENDOR_LIST_COLUMNS):
+    """
+    Trim the look-ahead row from a keyset query result.
+
+    Returns:
+        Tuple of (rows, next_cursor); next_cursor is None on the last page
+    """
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    sort_value = last[columns.index(sort)]
+    row_id = last[columns.index('id')]
+    return rows, encode_cursor(sort_value, row_id)
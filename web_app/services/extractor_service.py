@@ -5,65 +5,89 @@ Extractor service for the Vendor Research Web Application.
 import re
 from urllib.parse import urlparse
 
+from src.processors.boilerplate import remove_boilerplate
+from src.processors.extraction_rules import RuleRunner
+from src.utils.metrics import EXTRACTION_SECONDS
+
 class ExtractorService:
     """Service for extracting services and products from scraped data."""
     
     def __init__(self):
         self.email_pattern = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
         self.phone_pattern = re.compile(r'(\+?1[-.\s]?)?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})')
+        # Runs the content patterns with chunking and a per-page time budget
+        self.rules = RuleRunner('extractor_service')
     
+    @EXTRACTION_SECONDS.time(extractor='extractor_service')
     def extract_from_raw_data(self, raw_data):
         """Extract services and products from raw scraped data."""
         try:
-            result = {
-                'services': [],
-                'products': []
-            }
-            
-            # Extract services from all pages
-            for page in raw_data.get('pages', []):
-                page_url = page.get('url', '')
-                page_title = page.get('title', '')
-                page_content = page.get('content', '')
-                
-                # Check if this is a service page
-                if self._is_service_page(page_url, page_title):
-                    service_info = {
-                        'name': self._extract_service_name(page_title, page_content),
-                        'category': self._extract_service_category(page_url, page_title),
-                        'description': self._extract_service_description(page_content),
-                        'url': page_url,
-                        'pricing': self._extract_service_pricing(page_content),
-                        'features': self._extract_service_features(page_content),
-                        'benefits': self._extract_service_benefits(page_content),
-                        'use_cases': self._extract_service_use_cases(page_content)
-                    }
-                    result['services'].append(service_info)
-                
-                # Check if this is a product page
-                if self._is_product_page(page_url, page_title):
-                    product_info = {
-                        'name': self._extract_product_name(page_title, page_content),
-                        'category': self._extract_product_category(page_url, page_title),
-                        'description': self._extract_product_description(page_content),
-                        'url': page_url,
-                        'pricing': self._extract_product_pricing(page_content),
-                        'target_audience': self._extract_target_audience(page_content),
-                        'requirements': self._extract_requirements(page_content),
-                        'deployment': self._extract_deployment_info(page_content),
-                        'support': self._extract_support_info(page_content),
-                        'features': self._extract_product_features(page_content),
-                        'benefits': self._extract_product_benefits(page_content),
-                        'use_cases': self._extract_product_use_cases(page_content)
-                    }
-                    result['products'].append(product_info)
+            # Strip blocks repeated across most of the site's pages before running the patterns
+            pages = [dict(page) for page in raw_data.get('pages', [])]
+            remove_boilerplate(pages)
             
-            return result
+            return self.extract_from_pages(pages)
             
         except Exception as e:
             print(f"Error extracting from raw data: {e}")
             return None
     
+    def extract_from_pages(self, pages):
+        """
+        Extract services and products from pages as they arrive.
+        
+        pages may be a generator such as the one from ScraperService.stream_vendor();
+        each page is released once its services and products are extracted.
+        Boilerplate should already have been removed.
+        """
+        with self.rules.run():
+            return self._extract_pages(pages)
+    
+    def _extract_pages(self, pages):
+        result = {
+            'services': [],
+            'products': []
+        }
+        
+        for page in pages:
+            page_url = page.get('url', '')
+            page_title = page.get('title', '')
+            page_content = page.get('content', '')
+            
+            # Check if this is a service page
+            if self._is_service_page(page_url, page_title):
+                service_info = {
+                    'name': self._extract_service_name(page_title, page_content),
+                    'category': self._extract_service_category(page_url, page_title),
+                    'description': self._extract_service_description(page_content),
+                    'url': page_url,
+                    'pricing': self._extract_service_pricing(page_content),
+                    'features': self._extract_service_features(page_content),
+                    'benefits': self._extract_service_benefits(page_content),
+                    'use_cases': self._extract_service_use_cases(page_content)
+                }
+                result['services'].append(service_info)
+            
+            # Check if this is a product page
+            if self._is_product_page(page_url, page_title):
+                product_info = {
+                    'name': self._extract_product_name(page_title, page_content),
+                    'category': self._extract_product_category(page_url, page_title),
+                    'description': self._extract_product_description(page_content),
+                    'url': page_url,
+                    'pricing': self._extract_product_pricing(page_content),
+                    'target_audience': self._extract_target_audience(page_content),
+                    'requirements': self._extract_requirements(page_content),
+                    'deployment': self._extract_deployment_info(page_content),
+                    'support': self._extract_support_info(page_content),
+                    'features': self._extract_product_features(page_content),
+                    'benefits': self._extract_product_benefits(page_content),
+                    'use_cases': self._extract_product_use_cases(page_content)
+                }
+                result['products'].append(product_info)
+        
+        return result
+    
     def _is_service_page(self, url, title):
         """Determine if a page is a service page."""
         service_indicators = [
@@ -106,7 +130,7 @@ class ExtractorService:
         ]
         
         for pattern in desc_patterns:
-            matches = re.findall(pattern, content)
+            matches = self.rules.findall(pattern, content)
             if matches:
                 return matches[0].strip()
         
@@ -126,7 +150,7 @@ class ExtractorService:
         ]
         
         for pattern in feature_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
+            matches = self.rules.findall(pattern, content, re.IGNORECASE)
             for match in matches:
                 feature = match.strip()
                 if len(feature) > 10 and len(feature) < 200:
@@ -148,7 +172,7 @@ class ExtractorService:
         ]
         
         for pattern in benefit_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
+            matches = self.rules.findall(pattern, content, re.IGNORECASE)
             for match in matches:
                 benefit = match.strip()
                 if len(benefit) > 10 and len(benefit) < 200:
@@ -169,7 +193,7 @@ class ExtractorService:
         ]
         
         for pattern in use_case_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
+            matches = self.rules.findall(pattern, content, re.IGNORECASE)
             for match in matches:
                 use_case = match.strip()
                 if len(use_case) > 10 and len(use_case) < 200:
@@ -179,8 +203,8 @@ class ExtractorService:
     
     def _extract_service_pricing(self, content):
         """Extract service pricing from content."""
-        price_pattern = re.compile(r'[\$€£¥]\s*[\d,]+(?:\.\d{2})?(?:\s*(?:per|/)\s*(?:month|year|hour|day|user|seat))?', re.IGNORECASE)
-        prices = price_pattern.findall(content)
+        price_pattern = r'[\$€£¥]\s*[\d,]+(?:\.\d{2})?(?:\s*(?:per|/)\s*(?:month|year|hour|day|user|seat))?'
+        prices = self.rules.findall(price_pattern, content, re.IGNORECASE)
         return prices[0] if prices else None
     
     def _extract_service_category(self, url, title):
@@ -217,7 +241,7 @@ class ExtractorService:
         ]
         
         for pattern in desc_patterns:
-            matches = re.findall(pattern, content)
+            matches = self.rules.findall(pattern, content)
             if matches:
                 return matches[0].strip()
         
@@ -238,7 +262,7 @@ class ExtractorService:
         ]
         
         for pattern in feature_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
+            matches = self.rules.findall(pattern, content, re.IGNORECASE)
             for match in matches:
                 feature = match.strip()
                 if len(feature) > 10 and len(feature) < 200:
@@ -261,7 +285,7 @@ class ExtractorService:
         ]
         
         for pattern in benefit_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
+            matches = self.rules.findall(pattern, content, re.IGNORECASE)
             for match in matches:
                 benefit = match.strip()
                 if len(benefit) > 10 and len(benefit) < 200:
@@ -283,7 +307,7 @@ class ExtractorService:
         ]
         
         for pattern in use_case_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
+            matches = self.rules.findall(pattern, content, re.IGNORECASE)
             for match in matches:
                 use_case = match.strip()
                 if len(use_case) > 10 and len(use_case) < 200:
@@ -293,8 +317,8 @@ class ExtractorService:
     
     def _extract_product_pricing(self, content):
         """Extract product pricing from content."""
-        price_pattern = re.compile(r'[\$€£¥]\s*[\d,]+(?:\.\d{2})?(?:\s*(?:per|/)\s*(?:month|year|hour|day|user|seat))?', re.IGNORECASE)
-        prices = price_pattern.findall(content)
+        price_pattern = r'[\$€£¥]\s*[\d,]+(?:\.\d{2})?(?:\s*(?:per|/)\s*(?:month|year|hour|day|user|seat))?'
+        prices = self.rules.findall(price_pattern, content, re.IGNORECASE)
         return prices[0] if prices else None
     
     def _extract_product_category(self, url, title):
@@ -328,7 +352,7 @@ class ExtractorService:
         ]
         
         for pattern in audience_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
+            matches = self.rules.findall(pattern, content, re.IGNORECASE)
             if matches:
                 return matches[0].strip()
         
@@ -344,7 +368,7 @@ class ExtractorService:
         ]
         
         for pattern in req_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
+            matches = self.rules.findall(pattern, content, re.IGNORECASE)
             if matches:
                 return matches[0].strip()
         
@@ -360,7 +384,7 @@ class ExtractorService:
         ]
         
         for pattern in deploy_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
+            matches = self.rules.findall(pattern, content, re.IGNORECASE)
             if matches:
                 return matches[0].strip()
         
@@ -376,7 +400,7 @@ class ExtractorService:
         ]
         
         for pattern in support_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
+            matches = self.rules.findall(pattern, content, re.IGNORECASE)
             if matches:
                 return matches[0].strip()
         
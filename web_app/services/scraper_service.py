@@ -3,17 +3,30 @@ Scraper service for the Vendor Research Web Application.
 """
 
 import requests
-import subprocess
 import json
 import time
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 import re
+from functools import partial
+
+from src.crawl.canonical import CanonicalIndex, collapse_links
+from src.crawl.crawl_state import ALTERNATE, DEFAULT_STATE_PATH, DONE, DUPLICATE, CrawlState
+from src.crawl.dedup import NearDuplicateIndex, normalize_url
+from src.crawl.fetch_policy import shared_fetch_policy
+from src.crawl.fetcher import fetch_with_curl
+from src.crawl.rate_limiter import shared_rate_limiter
+from src.crawl.relevance import rank_discovered
+from src.crawl.url_rules import rules_for
+from src.pipeline.pages import parse_html_page
+from src.pipeline.stages import Pipeline
+from src.processors.boilerplate import BoilerplateModel, split_blocks
+from src.utils.metrics import PARSE_SECONDS
 
 class ScraperService:
     """Service for scraping vendor websites."""
     
-    def __init__(self):
+    def __init__(self, crawl_state_path=DEFAULT_STATE_PATH):
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
@@ -22,70 +35,185 @@ class ScraperService:
             'Accept-Encoding': 'gzip, deflate',
             'Connection': 'keep-alive',
         })
+        # Per-host politeness shared with the other scrapers in this process
+        self.rate_limiter = shared_rate_limiter()
+        # Retries transient failures and stops fetching from hosts that keep failing
+        self.fetch_policy = shared_fetch_policy()
+        # SQLite checkpoint so an interrupted crawl resumes instead of restarting
+        self.crawl_state_path = crawl_state_path
+        # Fetch/parse stages for a site's pages; sized by the PIPELINE_* settings
+        self.pipeline = Pipeline(self._fetch, partial(parse_html_page, component='scraper_service', annotations=True),
+                                 name='scraper_service')
     
     def scrape_vendor(self, url):
-        """Scrape a vendor website and return structured data."""
+        """
+        Scrape a vendor website and return structured data (resuming an interrupted crawl of the same site).
+        
+        Holds every page in vendor_info['pages']; use stream_vendor() to process pages one at a time.
+        """
+        crawl = self.stream_vendor(url)
+        if crawl is None:
+            return None
+        vendor_info, pages = crawl
+        try:
+            vendor_info['pages'] = list(pages)
+        except Exception as e:
+            print(f"Error scraping {url}: {e}")
+            return None
+        return vendor_info
+    
+    def stream_vendor(self, url):
+        """
+        Crawl a vendor website and stream its pages.
+        
+        Pages are fetched and checkpointed to the crawl state first; only the
+        boilerplate model and near-duplicate fingerprints stay in memory. The
+        returned generator then reads the pages back from the checkpoint one at
+        a time with the site's boilerplate removed, so memory does not grow with
+        the number of pages.
+        
+        Returns:
+            Tuple of (vendor_info, page generator), or None if the home page could not be fetched.
+            vendor_info carries total_pages_scraped, duplicate_pages_skipped and
+            alternate_pages_skipped (other-language and non-canonical variants) but no pages.
+        """
+        state = None
+        # Canonical/hreflang links seen so far; variants of a page are not fetched
+        canonical = CanonicalIndex()
         try:
             print(f"Starting scrape of: {url}")
+            state = CrawlState(f"scraper_service:{normalize_url(url)}", self.crawl_state_path)
             
-            # Use curl to fetch the content (bypassing SSL issues)
-            content = self._fetch_url_with_curl(url)
-            if not content:
-                return None
-            
-            # Parse with Beautiful Soup
-            soup = BeautifulSoup(content, 'html.parser')
-            
-            # Extract basic information
-            vendor_info = self._extract_basic_info(soup, url)
-            
-            # Find all relevant pages
-            relevant_pages = self._find_relevant_pages(soup, url)
-            
-            print(f"Found {len(relevant_pages)} relevant pages to scrape")
+            if state.resumed:
+                # Home page info and the page list were checkpointed by the interrupted run
+                vendor_info = state.meta()
+                print(f"Resuming crawl: {state.counts()}")
+            else:
+                # Use curl to fetch the content (bypassing SSL issues)
+                content = self._fetch_url_with_curl(url)
+                if not content:
+                    state.close()
+                    return None
+                
+                # Parse with Beautiful Soup
+                with PARSE_SECONDS.time(component='scraper_service'):
+                    soup = BeautifulSoup(content, 'html.parser')
+                
+                # Extract basic information
+                vendor_info = self._extract_basic_info(soup, url)
+                
+                # Find all relevant pages
+                relevant_pages = self._find_relevant_pages(soup, url, canonical)
+                
+                print(f"Found {len(relevant_pages)} relevant pages to scrape")
+                state.start(vendor_info)
+                state.enqueue(relevant_pages)
             
-            # Scrape each relevant page
-            all_content = []
-            for page_url in relevant_pages:
-                print(f"Scraping page: {page_url}")
-                page_content = self._fetch_url_with_curl(page_url)
-                if page_content:
-                    page_soup = BeautifulSoup(page_content, 'html.parser')
-                    page_data = self._extract_page_content(page_soup, page_url)
-                    all_content.append(page_data)
-                time.sleep(1)  # Be respectful
+            # Scrape each relevant page, recording its text blocks in the site's boilerplate model
+            boilerplate = BoilerplateModel()
+            duplicates = NearDuplicateIndex()
+            for page_url, page in state.completed_pages():
+                duplicates.check(page_url, '\n'.join(page['blocks']))
+                boilerplate.add_page(page['blocks'])
             
-            # Combine all content
-            vendor_info['pages'] = all_content
-            vendor_info['total_pages_scraped'] = len(all_content)
+            # Pages are fetched concurrently and parsed in worker processes; each
+            # batch is checkpointed here in one transaction
+            alternates = []
+            pending = self._skip_alternates(state.pending(), canonical, alternates)
+            for batch in self.pipeline.iter_batches(pending):
+                with state.batch():
+                    self._mark_alternates(state, alternates)
+                    for item in batch:
+                        page_url = item.url
+                        if not item.ok:
+                            print(f"Error scraping {page_url}: {item.error}")
+                            state.mark_failed(page_url, getattr(item.fetched, 'failure', None))
+                            continue
+                        target = canonical.observe(item.value['annotations'])
+                        if normalize_url(target) != normalize_url(page_url) and state.is_seen(target):
+                            print(f"Skipping variant of {target}: {page_url}")
+                            state.mark_alternate(page_url, target)
+                            continue
+                        print(f"Scraped page: {page_url}")
+                        page = {'url': page_url, 'title': item.value['title'],
+                                'blocks': split_blocks(item.value['content'])}
+                        page_text = '\n'.join(page['blocks'])
+                        duplicate_of = duplicates.check(page_url, page_text)
+                        if duplicate_of:
+                            print(f"Skipping near-duplicate of {duplicate_of}: {page_url}")
+                            state.mark_duplicate(page_url, duplicate_of, page_text)
+                        else:
+                            boilerplate.add_page(page['blocks'])
+                            state.mark_done(page_url, page_text, page)
             
-            return vendor_info
+            with state.batch():
+                self._mark_alternates(state, alternates)
             
+            counts = state.counts()
+            vendor_info['total_pages_scraped'] = counts.get(DONE, 0)
+            vendor_info['duplicate_pages_skipped'] = counts.get(DUPLICATE, 0)
+            vendor_info['alternate_pages_skipped'] = counts.get(ALTERNATE, 0)
         except Exception as e:
             print(f"Error scraping {url}: {e}")
+            if state is not None:
+                state.close()
             return None
+        
+        return vendor_info, self._iter_pages(state, boilerplate)
     
-    def _fetch_url_with_curl(self, url):
-        """Fetch URL content using curl."""
-        try:
-            cmd = [
-                'curl', '-s', '-L', '--max-time', '30',
-                '-H', 'User-Agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
-                '-H', 'Accept: text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                url
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            
-            if result.returncode == 0:
-                return result.stdout
+    def _skip_alternates(self, urls, canonical, alternates):
+        """
+        Yield the queued URLs that are not a variant of another queued page.
+        
+        Runs in the pipeline's fetch thread as it pulls URLs, so alternates
+        announced by pages parsed earlier in the crawl are dropped before they
+        are fetched. Skipped (url, canonical) pairs are appended to alternates
+        for the persist loop to checkpoint; the crawl state is not touched here.
+        """
+        queued = {normalize_url(url) for url in urls}
+        for url in urls:
+            target = canonical.resolve(url)
+            if target is None or (normalize_url(target) != normalize_url(url) and normalize_url(target) in queued):
+                alternates.append((url, target))
             else:
-                print(f"Curl error: {result.stderr}")
-                return None
-                
-        except Exception as e:
-            print(f"Error fetching {url}: {e}")
+                yield url
+    
+    def _mark_alternates(self, state, alternates):
+        """Checkpoint the URLs _skip_alternates() has dropped so far."""
+        while alternates:
+            url, target = alternates.pop()
+            print(f"Skipping variant of {target or 'another page'}: {url}")
+            state.mark_alternate(url, target)
+    
+    def _iter_pages(self, state, boilerplate):
+        """Replay checkpointed pages with boilerplate removed, then drop the finished crawl's checkpoint."""
+        try:
+            # Drop blocks repeated across most pages before extraction and storage
+            for page_url, page in state.completed_pages():
+                yield self._extract_page_content(page, boilerplate)
+            state.finish()
+        finally:
+            state.close()
+    
+    def _fetch(self, url):
+        """Fetch URL using curl (waits on the per-host rate limiter); returns the FetchResult."""
+        return fetch_with_curl(
+            url,
+            headers=[
+                'User-Agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
+                'Accept: text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            ],
+            rate_limiter=self.rate_limiter,
+            policy=self.fetch_policy
+        )
+    
+    def _fetch_url_with_curl(self, url):
+        """Fetch URL content using curl (waits on the per-host rate limiter)."""
+        result = self._fetch(url)
+        if not result.ok:
+            print(f"Error fetching {url}: {result.error}")
             return None
+        return result.text
     
     def _extract_basic_info(self, soup, url):
         """Extract basic vendor information."""
@@ -113,20 +241,21 @@ class ScraperService:
             'scraped_at': time.time()
         }
     
-    def _find_relevant_pages(self, soup, base_url):
-        """Find all relevant pages (products, services, etc.) excluding blogs."""
+    def _find_relevant_pages(self, soup, base_url, canonical=None):
+        """Find all relevant pages (products, services, etc.) excluding blogs and other-language variants."""
         relevant_pages = [base_url]  # Include main page
         
         # Find all links first
         links = soup.find_all('a', href=True)
         print(f"Total links found: {len(links)}")
         
-        # Collect all unique URLs
-        all_urls = set()
+        # Collect all unique URLs (tracking-parameter and trailing-slash variants collapse together)
+        all_urls = {}
         for link in links:
             href = link['href']
             full_url = urljoin(base_url, href)
-            all_urls.add(full_url)
+            all_urls.setdefault(normalize_url(full_url), full_url)
+        all_urls = list(all_urls.values())
         
         print(f"Unique URLs found: {len(all_urls)}")
         
@@ -136,51 +265,21 @@ class ScraperService:
                 if url not in relevant_pages:
                     relevant_pages.append(url)
         
-        return relevant_pages
+        # Queue each page once, as its canonical English variant, most relevant first
+        return rank_discovered(soup, base_url, collapse_links(soup, base_url, relevant_pages, canonical))
     
     def _is_relevant_page(self, url, base_url):
         """Check if a page is relevant (not blog, not external, etc.)."""
-        try:
-            parsed_url = urlparse(url)
-            parsed_base = urlparse(base_url)
-            
-            # Must be same domain
-            if parsed_url.netloc != parsed_base.netloc:
-                return False
-            
-            # Skip common non-content URLs
-            skip_patterns = [
-                '/login', '/signup', '/register', '/logout',
-                '/search', '/cart', '/checkout', '/account',
-                '.pdf', '.doc', '.docx', '.xls', '.xlsx',
-                '.zip', '.rar', '.tar', '.gz',
-                'javascript:', 'mailto:', 'tel:',
-                '#',  # Skip anchors
-                '/wp-admin', '/admin', '/dashboard'
-            ]
-            
-            for pattern in skip_patterns:
-                if pattern in url.lower():
-                    return False
-            
-            # Skip query parameters for now (but include main pages)
-            if '?' in url and url != base_url:
-                return False
-            
-            # Include main domain and subpages
-            return True
-            
-        except Exception:
-            return False
+        # The site's own pages, minus account pages, documents, anchors and query-string
+        # variants (the start URL is kept even with a query string)
+        return url == base_url or rules_for(base_url).allows(url, base_url)
     
-    def _extract_page_content(self, soup, url):
-        """Extract content from a specific page."""
-        # Get page title
-        title = soup.find('title')
-        title_text = title.get_text().strip() if title else ""
-        
-        # Extract main content
-        main_content = self._extract_main_content(soup)
+    def _extract_page_content(self, page, boilerplate=None):
+        """Extract content from a parsed page, skipping site boilerplate blocks."""
+        url = page['url']
+        title_text = page['title']
+        blocks = boilerplate.strip(page['blocks']) if boilerplate else page['blocks']
+        main_content = '\n'.join(blocks)
         
         # Extract contact info from this page
         contact_info = self._extract_contact_info(main_content)
@@ -200,27 +299,6 @@ class ScraperService:
             'technology_stack': tech_stack
         }
     
-    def _extract_main_content(self, soup):
-        """Extract main content from page."""
-        # Try to find main content areas
-        content_selectors = [
-            'main', 'article', '.content', '#content', '.main-content',
-            '.page-content', '.post-content', '.entry-content',
-            '.services', '.products', '.solutions'
-        ]
-        
-        for selector in content_selectors:
-            element = soup.select_one(selector)
-            if element:
-                return element.get_text(strip=True)
-        
-        # Fallback to body
-        body = soup.find('body')
-        if body:
-            return body.get_text(strip=True)
-        
-        return ""
-    
     def _extract_contact_info(self, content):
         """Extract contact information from content."""
         contact_info = {}
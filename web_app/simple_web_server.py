@@ -3,21 +3,50 @@ Simple Web Server for Vendor Research
 A minimal web interface that works with available packages.
 """
 
+import argparse
 import http.server
 import socketserver
 import json
 import sqlite3
 import os
 import urllib.parse
-import subprocess
 import threading
 import time
 import re
 import socket
+import sys
 from datetime import datetime
-from urllib.parse import urlparse, urljoin
+from functools import partial
+from urllib.parse import urlparse, urljoin, parse_qs
 from bs4 import BeautifulSoup
 
+# Allow importing the shared src package when run from the web_app directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.analytics.catalog import load_catalog, parse_facet_query
+from src.analytics.tag_index import TAG_FACETS, open_tag_index, tag_index_path
+from src.utils.json_stream import iter_json_object, iter_ndjson
+from src.crawl.canonical import collapse_links
+from src.crawl.fetch_policy import shared_fetch_policy
+from src.crawl.fetcher import fetch_with_curl
+from src.crawl.rate_limiter import shared_rate_limiter
+from src.crawl.relevance import rank_discovered
+from src.crawl.url_rules import rules_for
+from src.pipeline.pages import parse_html_page
+from src.pipeline.stages import Pipeline
+from src.utils.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE, DB_WRITE_SECONDS, EXTRACTION_SECONDS,
+    PARSE_SECONDS, render_metrics
+)
+from src.utils.profiling import PROFILE_MODES, RunProfiler
+from models.pagination import (
+    VENDOR_LIST_COLUMNS, build_keyset_query, create_vendor_indexes,
+    parse_listing_params, split_page
+)
+
+# Exported vendor tables used by /api/facets
+EXPORTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database_exports')
+
 class SimpleVendorDB:
     """Simple SQLite database for vendors."""
     
@@ -91,9 +120,25 @@ class SimpleVendorDB:
             )
         ''')
         
+        # Scraped pages are stored one row each so they can be streamed
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS vendor_pages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                vendor_id INTEGER NOT NULL,
+                page_index INTEGER NOT NULL,
+                url TEXT,
+                data TEXT NOT NULL,
+                FOREIGN KEY (vendor_id) REFERENCES vendors (id)
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_vendor_pages_vendor ON vendor_pages (vendor_id, page_index)')
+        
+        create_vendor_indexes(cursor)
+        
         conn.commit()
         conn.close()
     
+    @DB_WRITE_SECONDS.time(operation='add_vendor')
     def add_vendor(self, name, website, description=''):
         """Add a new vendor."""
         conn = sqlite3.connect(self.db_path)
@@ -107,6 +152,7 @@ class SimpleVendorDB:
         conn.close()
         return vendor_id
     
+    @DB_WRITE_SECONDS.time(operation='remove_vendor')
     def remove_vendor(self, vendor_id):
         """Remove a vendor and all associated data."""
         conn = sqlite3.connect(self.db_path)
@@ -124,6 +170,9 @@ class SimpleVendorDB:
         # Remove products
         cursor.execute('DELETE FROM products WHERE vendor_id = ?', (vendor_id,))
         
+        # Remove stored pages
+        cursor.execute('DELETE FROM vendor_pages WHERE vendor_id = ?', (vendor_id,))
+        
         # Remove vendor
         cursor.execute('DELETE FROM vendors WHERE id = ?', (vendor_id,))
         
@@ -133,14 +182,33 @@ class SimpleVendorDB:
         return cursor.rowcount > 0
     
     def get_vendors(self):
-        """Get all vendors."""
+        """Get all vendors (without the raw_data column)."""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
-        cursor.execute('SELECT * FROM vendors ORDER BY created_at DESC')
+        cursor.execute(f'SELECT {", ".join(VENDOR_LIST_COLUMNS)} FROM vendors ORDER BY created_at DESC')
         vendors = cursor.fetchall()
         conn.close()
         return vendors
     
+    def get_vendor_page(self, limit=50, cursor=None, status=None, sort='created_at', descending=True):
+        """
+        Get one page of vendors using keyset pagination.
+        
+        Rows contain VENDOR_LIST_COLUMNS in order; raw_data is never loaded.
+        
+        Returns:
+            Tuple of (vendors, next_cursor)
+        """
+        sql, params = build_keyset_query(
+            limit=limit, cursor=cursor, status=status, sort=sort, descending=descending
+        )
+        conn = sqlite3.connect(self.db_path)
+        db_cursor = conn.cursor()
+        db_cursor.execute(sql, params)
+        rows = db_cursor.fetchall()
+        conn.close()
+        return split_page(rows, limit, sort=sort)
+    
     def get_vendor(self, vendor_id):
         """Get a specific vendor."""
         conn = sqlite3.connect(self.db_path)
@@ -150,6 +218,7 @@ class SimpleVendorDB:
         conn.close()
         return vendor
     
+    @DB_WRITE_SECONDS.time(operation='update_vendor_status')
     def update_vendor_status(self, vendor_id, status, raw_data=None):
         """Update vendor status."""
         conn = sqlite3.connect(self.db_path)
@@ -161,6 +230,65 @@ class SimpleVendorDB:
         conn.commit()
         conn.close()
     
+    @DB_WRITE_SECONDS.time(operation='save_scrape_result')
+    def save_scrape_result(self, vendor_id, result):
+        """
+        Store a scrape result and mark the vendor as scraped.
+        
+        Vendor-level fields go into raw_data; each page is stored as its own
+        row in vendor_pages, replacing any pages from a previous scrape.
+        """
+        header = {key: value for key, value in result.items() if key != 'pages'}
+        
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM vendor_pages WHERE vendor_id = ?', (vendor_id,))
+        cursor.executemany(
+            'INSERT INTO vendor_pages (vendor_id, page_index, url, data) VALUES (?, ?, ?, ?)',
+            (
+                (vendor_id, index, page.get('url', ''), json.dumps(page))
+                for index, page in enumerate(result.get('pages', []))
+            )
+        )
+        cursor.execute(
+            'UPDATE vendors SET status = ?, raw_data = ?, scraped_at = ? WHERE id = ?',
+            ('scraped', json.dumps(header), datetime.now().isoformat(), vendor_id)
+        )
+        conn.commit()
+        conn.close()
+    
+    def count_vendor_pages(self, vendor_id):
+        """Count stored pages for a vendor."""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT COUNT(*) FROM vendor_pages WHERE vendor_id = ?', (vendor_id,))
+        count = cursor.fetchone()[0]
+        conn.close()
+        return count
+    
+    def iter_vendor_page_json(self, vendor_id, batch_size=50):
+        """Yield stored pages for a vendor as JSON text, in scrape order."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                'SELECT data FROM vendor_pages WHERE vendor_id = ? ORDER BY page_index',
+                (vendor_id,)
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row[0]
+        finally:
+            conn.close()
+    
+    def iter_vendor_pages(self, vendor_id, batch_size=50):
+        """Yield stored pages for a vendor as dictionaries, in scrape order."""
+        for page_json in self.iter_vendor_page_json(vendor_id, batch_size):
+            yield json.loads(page_json)
+    
     def get_vendor_services(self, vendor_id):
         """Get services for a vendor."""
         conn = sqlite3.connect(self.db_path)
@@ -179,6 +307,7 @@ class SimpleVendorDB:
         conn.close()
         return products
     
+    @DB_WRITE_SECONDS.time(operation='add_service')
     def add_service(self, vendor_id, name, category, description, url, pricing):
         """Add a service."""
         conn = sqlite3.connect(self.db_path)
@@ -192,6 +321,7 @@ class SimpleVendorDB:
         conn.close()
         return service_id
     
+    @DB_WRITE_SECONDS.time(operation='add_product')
     def add_product(self, vendor_id, name, category, description, url, pricing, target_audience, requirements, deployment, support):
         """Add a product."""
         conn = sqlite3.connect(self.db_path)
@@ -210,6 +340,14 @@ class SimpleScraper:
     
     def __init__(self):
         self.progress_callbacks = {}
+        # Per-host politeness shared with the other scrapers in this process
+        self.rate_limiter = shared_rate_limiter()
+        # Retries transient failures and stops fetching from hosts that keep failing
+        self.fetch_policy = shared_fetch_policy()
+        # Fetch/parse stages for a vendor's pages; sized by the PIPELINE_* settings
+        self.pipeline = Pipeline(self._fetch, partial(parse_html_page, separator='', main_only=False,
+                                                      component='simple_scraper'),
+                                 name='simple_scraper')
     
     def set_progress_callback(self, vendor_id, callback):
         """Set progress callback for a vendor."""
@@ -228,7 +366,8 @@ class SimpleScraper:
             
             self._update_progress(vendor_id, 20, "Main page fetched, parsing...")
             
-            soup = BeautifulSoup(content, 'html.parser')
+            with PARSE_SECONDS.time(component='simple_scraper'):
+                soup = BeautifulSoup(content, 'html.parser')
             
             vendor_info = self._extract_basic_info(soup, url)
             
@@ -242,16 +381,17 @@ class SimpleScraper:
             all_content = []
             total_pages = len(relevant_pages[:5])
             
-            for i, page_url in enumerate(relevant_pages[:5]):
-                print(f"[{vendor_id}] Scraping page {i+1}/{total_pages}: {page_url}")
-                self._update_progress(vendor_id, 50 + (i * 40 / total_pages), f"Scraping page {i+1}/{total_pages}")
-                
-                page_content = self._fetch_url_with_curl(page_url)
-                if page_content:
-                    page_soup = BeautifulSoup(page_content, 'html.parser')
-                    page_data = self._extract_page_content(page_soup, page_url)
-                    all_content.append(page_data)
-                time.sleep(1)
+            # Pages are fetched concurrently and parsed in worker processes
+            done = 0
+            for batch in self.pipeline.iter_batches(relevant_pages[:5]):
+                for item in batch:
+                    if item.ok:
+                        all_content.append(item.value)
+                    else:
+                        print(f"[{vendor_id}] Error scraping {item.url}: {item.error}")
+                done += len(batch)
+                print(f"[{vendor_id}] Scraped {done}/{total_pages} pages")
+                self._update_progress(vendor_id, 50 + (done * 40 / total_pages), f"Scraped {done}/{total_pages} pages")
             
             vendor_info['pages'] = all_content
             vendor_info['total_pages_scraped'] = len(all_content)
@@ -271,26 +411,22 @@ class SimpleScraper:
         if vendor_id in self.progress_callbacks:
             self.progress_callbacks[vendor_id](percentage, message)
     
+    def _fetch(self, url):
+        """Fetch URL using curl (waits on the per-host rate limiter); returns the FetchResult."""
+        return fetch_with_curl(
+            url,
+            headers=['User-Agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'],
+            rate_limiter=self.rate_limiter,
+            policy=self.fetch_policy
+        )
+    
     def _fetch_url_with_curl(self, url):
-        """Fetch URL content using curl."""
-        try:
-            cmd = [
-                'curl', '-s', '-L', '--max-time', '30',
-                '-H', 'User-Agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
-                url
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            
-            if result.returncode == 0:
-                return result.stdout
-            else:
-                print(f"Curl error: {result.stderr}")
-                return None
-                
-        except Exception as e:
-            print(f"Error fetching {url}: {e}")
+        """Fetch URL content using curl (waits on the per-host rate limiter)."""
+        result = self._fetch(url)
+        if not result.ok:
+            print(f"Error fetching {url}: {result.error}")
             return None
+        return result.text
     
     def _extract_basic_info(self, soup, url):
         """Extract basic vendor information."""
@@ -324,45 +460,13 @@ class SimpleScraper:
                 if full_url not in relevant_pages:
                     relevant_pages.append(full_url)
         
-        return relevant_pages[:10]
+        # Queue each page once, as its canonical English variant, most relevant first
+        return rank_discovered(soup, base_url, collapse_links(soup, base_url, relevant_pages))[:10]
     
     def _is_relevant_page(self, url, base_url):
         """Check if a page is relevant."""
-        try:
-            parsed_url = urlparse(url)
-            parsed_base = urlparse(base_url)
-            
-            if parsed_url.netloc != parsed_base.netloc:
-                return False
-            
-            skip_patterns = [
-                '/login', '/signup', '/register', '/logout',
-                '/search', '/cart', '/checkout', '/account',
-                '.pdf', '.doc', '.docx', '.xls', '.xlsx',
-                'javascript:', 'mailto:', 'tel:', '#'
-            ]
-            
-            for pattern in skip_patterns:
-                if pattern in url.lower():
-                    return False
-            
-            return True
-            
-        except Exception:
-            return False
-    
-    def _extract_page_content(self, soup, url):
-        """Extract content from a specific page."""
-        title = soup.find('title')
-        title_text = title.get_text().strip() if title else ""
-        
-        main_content = soup.get_text(strip=True)
-        
-        return {
-            'url': url,
-            'title': title_text,
-            'content': main_content
-        }
+        # Same-site pages, minus account pages, documents, anchors and query-string variants
+        return rules_for(base_url).allows(url, base_url)
     
     def _extract_vendor_name(self, title, url):
         """Extract vendor name from title or URL."""
@@ -379,6 +483,7 @@ class SimpleExtractor:
     def __init__(self):
         pass
     
+    @EXTRACTION_SECONDS.time(extractor='simple_extractor')
     def extract_from_raw_data(self, raw_data):
         """Extract services and products from raw scraped data."""
         try:
@@ -546,20 +651,23 @@ class SimpleWebHandler(http.server.BaseHTTPRequestHandler):
     
     def do_GET(self):
         """Handle GET requests."""
-        if self.path == '/':
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        
+        if parsed.path == '/':
             self.serve_dashboard()
-        elif self.path == '/admin':
-            self.serve_admin()
+        elif parsed.path == '/admin':
+            self.serve_admin(query)
         elif self.path == '/chat':
             self.serve_chat()
         elif self.path.startswith('/vendor/'):
             vendor_id = int(self.path.split('/')[-1])
             self.serve_vendor_detail(vendor_id)
-        elif self.path == '/api/vendors':
-            self.api_get_vendors()
-        elif self.path.startswith('/api/vendors/') and self.path.endswith('/raw-data'):
-            vendor_id = int(self.path.split('/')[-2])
-            self.api_get_raw_data(vendor_id)
+        elif parsed.path == '/api/vendors':
+            self.api_get_vendors(query)
+        elif parsed.path.startswith('/api/vendors/') and parsed.path.endswith('/raw-data'):
+            vendor_id = int(parsed.path.split('/')[-2])
+            self.api_get_raw_data(vendor_id, query)
         elif self.path.startswith('/api/vendors/') and self.path.endswith('/services'):
             vendor_id = int(self.path.split('/')[-2])
             self.api_get_services(vendor_id)
@@ -569,6 +677,12 @@ class SimpleWebHandler(http.server.BaseHTTPRequestHandler):
         elif self.path.startswith('/api/vendors/') and self.path.endswith('/progress'):
             vendor_id = int(self.path.split('/')[-2])
             self.api_get_progress(vendor_id)
+        elif parsed.path == '/api/facets':
+            self.api_get_facets(query)
+        elif parsed.path == '/api/tags':
+            self.api_get_tags(query)
+        elif parsed.path == '/metrics':
+            self.serve_metrics()
         else:
             self.send_error(404)
     
@@ -592,7 +706,7 @@ class SimpleWebHandler(http.server.BaseHTTPRequestHandler):
     
     def serve_dashboard(self):
         """Serve the dashboard page."""
-        vendors = self.db.get_vendors()
+        vendors, _ = self.db.get_vendor_page(limit=5)
         
         html = f"""
         <!DOCTYPE html>
@@ -674,9 +788,10 @@ class SimpleWebHandler(http.server.BaseHTTPRequestHandler):
         self.end_headers()
         self.wfile.write(html.encode())
     
-    def serve_admin(self):
-        """Serve the admin panel."""
-        vendors = self.db.get_vendors()
+    def serve_admin(self, query=None):
+        """Serve the admin panel, one page of vendors at a time."""
+        params = parse_listing_params(query or {})
+        vendors, next_cursor = self.db.get_vendor_page(**params)
         
         html = f"""
         <!DOCTYPE html>
@@ -781,6 +896,7 @@ class SimpleWebHandler(http.server.BaseHTTPRequestHandler):
             
             <h2>Vendor Management</h2>
             {self._render_vendor_table(vendors)}
+            {self._render_pagination(params, next_cursor)}
             
             <script>
                 document.getElementById('vendorForm').addEventListener('submit', function(e) {{
@@ -1114,6 +1230,9 @@ class SimpleWebHandler(http.server.BaseHTTPRequestHandler):
         success = self.db.remove_vendor(vendor_id)
         
         if success:
+            tag_index = open_tag_index(tag_index_path(self.db.db_path))
+            tag_index.remove_vendor(vendor_id)
+            tag_index.save()
             response = {'success': True, 'message': 'Vendor removed successfully'}
         else:
             response = {'error': 'Vendor not found'}
@@ -1152,7 +1271,7 @@ class SimpleWebHandler(http.server.BaseHTTPRequestHandler):
                 result = self.scraper.scrape_vendor(vendor_id, url)
                 
                 if result:
-                    self.db.update_vendor_status(vendor_id, 'scraped', json.dumps(result))
+                    self.db.save_scrape_result(vendor_id, result)
                 else:
                     self.db.update_vendor_status(vendor_id, 'failed')
                 
@@ -1169,26 +1288,26 @@ class SimpleWebHandler(http.server.BaseHTTPRequestHandler):
         thread = threading.Thread(target=scrape_worker)
         thread.start()
     
-    def api_get_vendors(self):
-        """API endpoint to get all vendors."""
-        vendors = self.db.get_vendors()
-        vendors_data = []
+    def api_get_vendors(self, query=None):
+        """
+        API endpoint to list vendors.
         
-        for vendor in vendors:
-            vendors_data.append({
-                'id': vendor[0],
-                'name': vendor[1],
-                'website': vendor[2],
-                'description': vendor[3],
-                'status': vendor[4],
-                'scraped_at': vendor[6],
-                'created_at': vendor[7]
-            })
+        Supports ?limit=, ?cursor= (keyset pagination), ?status= and
+        ?sort=created_at|name|status|id with ?order=asc|desc.
+        """
+        params = parse_listing_params(query or {})
+        vendors, next_cursor = self.db.get_vendor_page(**params)
+        
+        response = {
+            'vendors': [dict(zip(VENDOR_LIST_COLUMNS, vendor)) for vendor in vendors],
+            'next_cursor': next_cursor,
+            'limit': params['limit']
+        }
         
         self.send_response(200)
         self.send_header('Content-type', 'application/json')
         self.end_headers()
-        self.wfile.write(json.dumps(vendors_data).encode())
+        self.wfile.write(json.dumps(response).encode())
     
     def api_scrape_vendor(self, vendor_id):
         """API endpoint to scrape a vendor."""
@@ -1233,7 +1352,7 @@ class SimpleWebHandler(http.server.BaseHTTPRequestHandler):
             self.send_error(404)
             return
         
-        if not vendor[5]:
+        if not vendor[5] and not self.db.count_vendor_pages(vendor_id):
             response = {'error': 'No scraped data available'}
             self.send_response(400)
             self.send_header('Content-type', 'application/json')
@@ -1243,7 +1362,7 @@ class SimpleWebHandler(http.server.BaseHTTPRequestHandler):
         
         def extract_worker():
             try:
-                raw_data = json.loads(vendor[5])
+                raw_data = self._load_raw_data(vendor)
                 result = self.extractor.extract_from_raw_data(raw_data)
                 
                 if result:
@@ -1271,6 +1390,14 @@ class SimpleWebHandler(http.server.BaseHTTPRequestHandler):
                             product_data.get('support', '')
                         )
                     
+                    # Keep the service/product tag index in step with the database
+                    tag_index = open_tag_index(tag_index_path(self.db.db_path))
+                    tag_index.update_vendor(vendor_id, {
+                        'service': result.get('services', []),
+                        'product': result.get('products', []),
+                    })
+                    tag_index.save()
+                    
                     self.db.update_vendor_status(vendor_id, 'completed')
                 else:
                     self.db.update_vendor_status(vendor_id, 'failed')
@@ -1289,19 +1416,95 @@ class SimpleWebHandler(http.server.BaseHTTPRequestHandler):
         self.end_headers()
         self.wfile.write(json.dumps(response).encode())
     
-    def api_get_raw_data(self, vendor_id):
-        """API endpoint to get raw scraped data."""
+    def _load_raw_data(self, vendor):
+        """
+        Load scraped data for a vendor row with its pages as a lazy iterator.
+        
+        Pages are read from vendor_pages; rows scraped before page storage
+        existed still carry their pages inline in raw_data.
+        """
+        raw_data = json.loads(vendor[5]) if vendor[5] else {}
+        if 'pages' not in raw_data:
+            raw_data['pages'] = self.db.iter_vendor_pages(vendor[0])
+        return raw_data
+    
+    def api_get_raw_data(self, vendor_id, query=None):
+        """
+        API endpoint to get raw scraped data.
+        
+        The response is streamed with chunked transfer encoding, one page at a
+        time. ?format=ndjson returns one page per line instead of a single
+        JSON document.
+        """
         vendor = self.db.get_vendor(vendor_id)
-        if not vendor or not vendor[5]:
+        if not vendor or (not vendor[5] and not self.db.count_vendor_pages(vendor_id)):
             self.send_error(404)
             return
         
-        raw_data = json.loads(vendor[5])
+        header = json.loads(vendor[5]) if vendor[5] else {}
+        if 'pages' in header:
+            pages, raw = header.pop('pages'), False
+        else:
+            pages, raw = self.db.iter_vendor_page_json(vendor_id), True
+        
+        fmt = (query or {}).get('format', ['json'])[0]
+        if fmt == 'ndjson':
+            self._send_chunked(iter_ndjson(pages, raw=raw), 'application/x-ndjson')
+        else:
+            self._send_chunked(iter_json_object(header, 'pages', pages, raw=raw), 'application/json')
+    
+    def api_get_facets(self, query=None):
+        """API endpoint to filter the exported vendor catalogue by tags, with value counts per facet."""
+        try:
+            catalog = load_catalog(EXPORTS_DIR)
+            filters, options = parse_facet_query(query or {})
+            response = catalog.query(filters, **options)
+            status = 200
+        except FileNotFoundError as e:
+            response = {'error': str(e)}
+            status = 404
+        
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.end_headers()
+        self.wfile.write(json.dumps(response).encode())
+    
+    def api_get_tags(self, query=None):
+        """API endpoint to filter extracted vendors by service/product tags, with tag counts per facet."""
+        tag_index = open_tag_index(tag_index_path(self.db.db_path))
+        filters, options = parse_facet_query(query or {}, TAG_FACETS)
+        response = tag_index.query(filters, **options)
         
         self.send_response(200)
         self.send_header('Content-type', 'application/json')
         self.end_headers()
-        self.wfile.write(json.dumps(raw_data, indent=2).encode())
+        self.wfile.write(json.dumps(response).encode())
+    
+    def serve_metrics(self):
+        """Expose pipeline metrics in Prometheus text format."""
+        body = render_metrics().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-type', METRICS_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _send_chunked(self, chunks, content_type):
+        """Send a response body from an iterator of text chunks using chunked encoding."""
+        # Chunked transfer needs an HTTP/1.1 status line; the connection is closed afterwards
+        self.protocol_version = 'HTTP/1.1'
+        self.send_response(200)
+        self.send_header('Content-type', content_type)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        
+        for chunk in chunks:
+            data = chunk.encode('utf-8')
+            if data:
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+        self.wfile.write(b'0\r\n\r\n')
     
     def api_get_services(self, vendor_id):
         """API endpoint to get vendor services."""
@@ -1446,6 +1649,22 @@ class SimpleWebHandler(http.server.BaseHTTPRequestHandler):
         html += "</tbody></table>"
         return html
     
+    def _render_pagination(self, params, next_cursor):
+        """Render the link to the next page of the vendor table."""
+        if not next_cursor:
+            return ""
+        
+        link_params = {
+            'cursor': next_cursor,
+            'limit': params['limit'],
+            'sort': params['sort'],
+            'order': 'desc' if params['descending'] else 'asc'
+        }
+        if params['status']:
+            link_params['status'] = params['status']
+        
+        return f'<p><a href="/admin?{urllib.parse.urlencode(link_params)}" class="btn btn-primary">Next page</a></p>'
+    
     def _render_services(self, services):
         """Render services list."""
         if not services:
@@ -1490,8 +1709,18 @@ def find_free_port():
         port = s.getsockname()[1]
     return port
 
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description='Vendor Research Web Server')
+    parser.add_argument('--profile', choices=PROFILE_MODES,
+                        help='Profile the server until it stops (sample covers scrape worker threads)')
+    parser.add_argument('--profile-dir', default='profiles', help='Directory for profile output')
+    return parser.parse_args()
+
 def main():
     """Main function to start the web server."""
+    args = parse_args()
+    
     # Try to find a free port
     PORT = find_free_port()
     
@@ -1499,7 +1728,21 @@ def main():
     print(f"Access the application at: http://localhost:{PORT}")
     print(f"Admin Panel: http://localhost:{PORT}/admin")
     print(f"Chat Interface: http://localhost:{PORT}/chat")
+    if args.profile:
+        print(f"Profiling enabled ({args.profile}); output is written to {args.profile_dir} on shutdown")
     
+    profiler = RunProfiler(args.profile, args.profile_dir, name='simple_web_server')
+    try:
+        with profiler:
+            serve(PORT)
+    except KeyboardInterrupt:
+        print("\nServer stopped")
+    finally:
+        for path in profiler.paths:
+            print(f"Profile saved to {path}")
+
+def serve(PORT):
+    """Run the HTTP server until interrupted."""
     try:
         with socketserver.TCPServer(("", PORT), SimpleWebHandler) as httpd:
             print(f"Server running on http://localhost:{PORT}")